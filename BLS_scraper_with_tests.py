@@ -1,19 +1,74 @@
 import requests
-from bs4 import BeautifulSoup
+import calendar
+import contextlib
+import datetime
+import email.utils
+import hashlib
+import json
 import os
+import pandas as pd
+import random
+import shutil
+import tempfile
+import threading
 import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, mock_open
+from urllib.parse import urlparse
 
-# Download a single xlsx based on SeriesId
-def DownloadTable(folder, Industry, SeriesId, maxRetryNum = 5):
-    
-    url = "https://data.bls.gov/pdq/SurveyOutputServlet"
+from bls_api import BLSApiClient, RecordsFrame
+from bls_standin_server import StandInServerMixin
+from series_catalog import CATALOG_TTL, ParseCatalog, SeriesCatalog
+from series_table import ReadSeriesTable, SplitSeriesReport, WriteSeriesTable
+
+BLS_URL = "https://data.bls.gov/pdq/SurveyOutputServlet"
+
+THROTTLE_STATUS = (429, 503)
+
+# The servlet accepts repeated series_id fields; larger requests are refused
+MAX_SERIES_PER_REQUEST = 50
+
+# The metrics dict of one series before any request; status says what happened without one
+def NewResult(Industry, SeriesId, status = 'skipped'):
+    return {'Industry': Industry, 'SeriesId': SeriesId, 'status': status, 'attempts': 0,
+            'http_status': None, 'bytes': 0, 'latency': 0.0, 'error': None}
+
+
+# Download a single xlsx based on SeriesId and return what happened as a metrics dict
+# session/rateLimiter/breaker/metrics let BulkDownload share one connection pool, request budget and log across threads
+def DownloadTable(folder, Industry, SeriesId, maxRetryNum = 5, session = None, url = BLS_URL, rateLimiter = None,
+                  breaker = None, metrics = None, baseDelay = 1.0, maxDelay = 60.0):
     
     file_name = f"{folder}/{Industry}_{SeriesId}.xlsx"
     
+    result = NewResult(Industry, SeriesId)
+    
     if os.path.exists(file_name):
-        return
+        return result
+    
+    start = time.perf_counter()
+    content = FetchTable(SeriesId, result, maxRetryNum, session, url, rateLimiter, breaker, baseDelay, maxDelay)
+    if content is not None:
+        WriteAtomic(file_name, content)
+        print(file_name,'Download Complete')
+        result['status'] = 'downloaded'
+    else:
+        result['status'] = 'failed'
+        print(file_name, 'Download Failed after', maxRetryNum, 'attempts:', result['error'])
+
+    result['latency'] = round(time.perf_counter() - start, 4)
+    if metrics is not None:
+        metrics.emit(result)
+    return result
+
+
+# POST the excelTable request for SeriesId, or a list of them (optionally only fromYear..toYear), retrying with backoff
+# Fills attempts/http_status/bytes/error of result and returns the response body, or None once retries run out
+def FetchTable(SeriesId, result, maxRetryNum = 5, session = None, url = BLS_URL, rateLimiter = None, breaker = None,
+               baseDelay = 1.0, maxDelay = 60.0, fromYear = None, toYear = None):
+    
+    http = session if session is not None else requests
     
     payload = {
         "request_action": "get_data",
@@ -29,6 +84,9 @@ def DownloadTable(folder, Industry, SeriesId, maxRetryNum = 5):
         "annualAveragesRequested": "false",
         "series_id": SeriesId
     }
+    if fromYear is not None:
+        payload["from_year"] = str(fromYear)
+        payload["to_year"] = str(toYear or datetime.date.today().year)
 
     headers = {
         "Host": "data.bls.gov",
@@ -54,25 +112,343 @@ def DownloadTable(folder, Industry, SeriesId, maxRetryNum = 5):
 
     retry = 0
     while retry < maxRetryNum:
+        retryAfter = None
         try:
-            response = requests.post(url, data=payload, headers=headers, timeout=10)
+            if breaker is not None:
+                breaker.wait()
+            if rateLimiter is not None:
+                rateLimiter.wait(url)
+            response = http.post(url, data=payload, headers=headers, timeout=10)
+            result['http_status'] = response.status_code
             if response.status_code == 200:
-                with open(file_name, "wb") as f:
-                    f.write(response.content)
-                print(file_name,'Download Complete')
-                return
-            else:
-                retry += 1
-                print(f'Retrying {retry} / {maxRetryNum}...')
-                time.sleep(5)
+                if breaker is not None:
+                    breaker.record(False)
+                result.update(attempts=retry + 1, bytes=len(response.content), error=None)
+                return response.content
+            retryAfter = ParseRetryAfter(response.headers.get('Retry-After'))
+            if breaker is not None:
+                breaker.record(response.status_code in THROTTLE_STATUS, retryAfter)
+            result['error'] = f'HTTP {response.status_code}'
                 
         except Exception as e:
-            retry += 1
-            print(f'Retrying {retry} / {maxRetryNum}... for {e}')
-            time.sleep(5)
+            result['error'] = str(e)
+        retry += 1
+        result['attempts'] = retry
+        if retry < maxRetryNum:
+            delay = BackoffDelay(retry, baseDelay, maxDelay, retryAfter)
+            print(f'Retrying {retry} / {maxRetryNum} in {delay:.1f}s... for {result["error"]}')
+            time.sleep(delay)
+    return None
+
+
+# Write through a temp file in the same folder and rename it over file_name, so readers never see a partial file
+def WriteAtomic(file_name, content):
+    tmp_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_name, "wb") as f:
+        f.write(content)
+    os.replace(tmp_name, file_name)
+
+
+# POST up to MAX_SERIES_PER_REQUEST series ids at once (optionally only fromYear on) and return the response body,
+# or None once retries run out, with the {SeriesId: (header, rows)} tables it holds
+def FetchBatch(SeriesIds, batch, maxRetryNum = 5, session = None, url = BLS_URL, rateLimiter = None, breaker = None,
+               baseDelay = 1.0, maxDelay = 60.0, fromYear = None):
+    if len(SeriesIds) > MAX_SERIES_PER_REQUEST:
+        raise ValueError(f'At most {MAX_SERIES_PER_REQUEST} series per request, got {len(SeriesIds)}')
+    content = FetchTable(list(SeriesIds), batch, maxRetryNum, session, url, rateLimiter, breaker, baseDelay, maxDelay,
+                         fromYear=fromYear)
+    tables = SplitSeriesReport(content) if content is not None else {}
+    if content is not None and not tables and len(SeriesIds) == 1:
+        # A single series comes back as the plain table DownloadTable saves
+        header, rows = ReadSeriesTable(content)
+        tables = {SeriesIds[0]: (header, rows)} if header is not None else {}
+    return content, tables
+
+
+# Fetch up to MAX_SERIES_PER_REQUEST series in one POST and write each one to the file DownloadTable would
+def DownloadBatch(folder, items, maxRetryNum = 5, session = None, url = BLS_URL, rateLimiter = None,
+                  breaker = None, metrics = None, baseDelay = 1.0, maxDelay = 60.0):
+    batch = {'status': 'failed', 'attempts': 0, 'http_status': None, 'bytes': 0, 'latency': 0.0, 'error': None}
+    start = time.perf_counter()
+    content, tables = FetchBatch([SeriesId for _, SeriesId in items], batch, maxRetryNum, session, url, rateLimiter,
+                                 breaker, baseDelay, maxDelay)
+
+    results = []
+    for Industry, SeriesId in items:
+        result = dict(batch, Industry=Industry, SeriesId=SeriesId, batch=len(items), bytes=batch['bytes'] // len(items))
+        if SeriesId in tables:
+            file_name = f"{folder}/{Industry}_{SeriesId}.xlsx"
+            WriteAtomic(file_name, WriteSeriesTable(*tables[SeriesId]))
+            print(file_name,'Download Complete')
+            result['status'] = 'downloaded'
+        elif content is not None:
+            result['error'] = 'missing from batch response'
+        result['latency'] = round(time.perf_counter() - start, 4)
+        if metrics is not None:
+            metrics.emit(result)
+        results.append(result)
+    return results
+
+
+# Newer observations win; a month the new pull leaves empty keeps the stored value
+def MergeSeriesRows(stored, fetched):
+    merged = {year: list(values) for year, values in stored.items()}
+    for year, values in fetched.items():
+        old = merged.get(year, [None] * len(values))
+        merged[year] = [new if new is not None else prev for new, prev in zip(values, old)]
+    return merged
+
+
+# Latest 'YYYY-MM' holding a value, or None for an empty table
+def LastObservedPeriod(header, rows):
+    if header is None:
+        return None
+    months = {index: list(calendar.month_abbr).index(name) for index, name in enumerate(header[1:])
+              if name in calendar.month_abbr[1:]}
+    for year in sorted(rows, reverse=True):
+        filled = [months[index] for index, value in enumerate(rows[year]) if value is not None and index in months]
+        if filled:
+            return f"{year}-{max(filled):02d}"
+    return None
+
+
+# Per-folder record of what each series file holds: {SeriesId: {file, last_period, sha256, fetched_at}}
+# Several processes may refresh series of one folder (download_queue workers), so each write merges this process's
+# entry into what is on disk under an exclusive lock file instead of overwriting the other processes' entries
+class Manifest:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = self.read()
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def get(self, SeriesId):
+        with self.lock:
+            return self.entries.get(SeriesId)
+
+    def update(self, SeriesId, file_name, content, last_period):
+        self.save(SeriesId, {'file': os.path.basename(file_name), 'last_period': last_period,
+                             'sha256': hashlib.sha256(content).hexdigest(), 'fetched_at': time.time()})
+
+    def touch(self, SeriesId):
+        self.save(SeriesId, dict(self.get(SeriesId), fetched_at=time.time()))
+
+    def save(self, SeriesId, entry):
+        with self.lock, FileLock(f'{self.path}.lock'):
+            self.entries = self.read()
+            self.entries[SeriesId] = entry
+            WriteAtomic(self.path, json.dumps(self.entries, indent=1, sort_keys=True).encode())
+
+
+# Hold path, created exclusively, as a lock between processes; a lock left older than stale seconds by a process
+# that died is taken over
+@contextlib.contextmanager
+def FileLock(path, stale = 30.0):
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > stale:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.005)
+    try:
+        yield
+    finally:
+        os.remove(path)
+
+
+# Incremental counterpart of DownloadTable: series checked within maxAge seconds are left alone, series the manifest
+# vouches for only request the years from their last observed period on, anything else gets a full download
+def RefreshTable(folder, Industry, SeriesId, manifest, maxRetryNum = 5, session = None, url = BLS_URL,
+                 rateLimiter = None, breaker = None, metrics = None, baseDelay = 1.0, maxDelay = 60.0, maxAge = 86400):
+
+    file_name = f"{folder}/{Industry}_{SeriesId}.xlsx"
+
+    result = NewResult(Industry, SeriesId, 'fresh')
+
+    plan = PlanRefresh(file_name, SeriesId, manifest, maxAge)
+    if plan is None:
+        return result
+
+    start = time.perf_counter()
+    stored, fromYear = plan
+    content = FetchTable(SeriesId, result, maxRetryNum, session, url, rateLimiter, breaker, baseDelay, maxDelay,
+                         fromYear=fromYear)
+    if content is None:
+        result['status'] = 'failed'
+        print(file_name, 'Refresh Failed after', maxRetryNum, 'attempts:', result['error'])
+    else:
+        result['status'] = ApplyRefresh(file_name, SeriesId, manifest, stored, *ReadSeriesTable(content), content)
+
+    result['latency'] = round(time.perf_counter() - start, 4)
+    if metrics is not None:
+        metrics.emit(result)
+    return result
+
+
+# What RefreshTable has to request for a series: (stored file bytes or None, fromYear or None for everything),
+# or None while the series was checked within maxAge seconds
+def PlanRefresh(file_name, SeriesId, manifest, maxAge = 86400):
+    entry = manifest.get(SeriesId)
+    stored = None
+    if entry is not None and os.path.exists(file_name):
+        with open(file_name, 'rb') as f:
+            stored = f.read()
+        if hashlib.sha256(stored).hexdigest() != entry['sha256'] or not entry['last_period']:
+            stored = None
+        elif time.time() - entry['fetched_at'] < maxAge:
+            return None
+    return stored, int(entry['last_period'][:4]) if stored is not None else None
+
+
+# Merge a fetched table into the stored copy, write it and record it in the manifest; returns the refresh status
+# content is the response body, written as-is for a full download, or None to serialise header and rows
+def ApplyRefresh(file_name, SeriesId, manifest, stored, header, rows, content = None):
+    if stored is not None:
+        stored_header, stored_rows = ReadSeriesTable(stored)
+        rows = MergeSeriesRows(stored_rows, rows)
+        header = stored_header
+        if rows == stored_rows:
+            manifest.touch(SeriesId)
+            return 'unchanged'
+        content, status = WriteSeriesTable(header, rows), 'refreshed'
+    else:
+        content, status = content if content is not None else WriteSeriesTable(header, rows), 'downloaded'
+    WriteAtomic(file_name, content)
+    manifest.update(SeriesId, file_name, content, LastObservedPeriod(header, rows))
+    print(file_name, 'Refresh Complete' if stored is not None else 'Download Complete')
+    return status
+
+
+# RefreshTable for up to MAX_SERIES_PER_REQUEST series in one POST; items are (Industry, SeriesId, stored) whose
+# plans share fromYear
+def RefreshBatch(folder, items, manifest, fromYear = None, maxRetryNum = 5, session = None, url = BLS_URL,
+                 rateLimiter = None, breaker = None, metrics = None, baseDelay = 1.0, maxDelay = 60.0):
+    batch = {'status': 'failed', 'attempts': 0, 'http_status': None, 'bytes': 0, 'latency': 0.0, 'error': None}
+    start = time.perf_counter()
+    content, tables = FetchBatch([SeriesId for _, SeriesId, _ in items], batch, maxRetryNum, session, url,
+                                 rateLimiter, breaker, baseDelay, maxDelay, fromYear=fromYear)
+
+    results = []
+    for Industry, SeriesId, stored in items:
+        result = dict(batch, Industry=Industry, SeriesId=SeriesId, batch=len(items), bytes=batch['bytes'] // len(items))
+        file_name = f"{folder}/{Industry}_{SeriesId}.xlsx"
+        if SeriesId in tables:
+            result['status'] = ApplyRefresh(file_name, SeriesId, manifest, stored, *tables[SeriesId])
+        elif content is not None:
+            result['error'] = 'missing from batch response'
+        else:
+            print(file_name, 'Refresh Failed after', maxRetryNum, 'attempts:', result['error'])
+        result['latency'] = round(time.perf_counter() - start, 4)
+        if metrics is not None:
+            metrics.emit(result)
+        results.append(result)
+    return results
+
+
+# Seconds to wait before retry number `attempt`: the server's Retry-After if it sent one,
+# otherwise exponential backoff with full jitter capped at maxDelay
+def BackoffDelay(attempt, baseDelay = 1.0, maxDelay = 60.0, retryAfter = None):
+    if retryAfter is not None:
+        return min(retryAfter, maxDelay)
+    return random.uniform(0, min(maxDelay, baseDelay * 2 ** (attempt - 1)))
+
+
+# Retry-After is either a number of seconds or an HTTP date
+def ParseRetryAfter(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+# Pauses every worker of a run once the server answers `threshold` throttle responses in a row
+class CircuitBreaker:
+    def __init__(self, threshold = 5, cooldown = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.consecutive = 0
+        self.openUntil = 0.0
+
+    def record(self, throttled, retryAfter = None):
+        with self.lock:
+            if not throttled:
+                self.consecutive = 0
+                return
+            self.consecutive += 1
+            if self.consecutive >= self.threshold:
+                pause = max(self.cooldown, retryAfter or 0.0)
+                self.openUntil = max(self.openUntil, time.monotonic() + pause)
+                print(f'Server is throttling, pausing all downloads for {pause:.0f}s')
+
+    def wait(self):
+        while True:
+            with self.lock:
+                delay = self.openUntil - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+
+# Appends one JSON line per finished download; safe to share between threads
+class MetricsLog:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(dict(record, time=datetime.datetime.now(datetime.timezone.utc).isoformat()))
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+# The 19 supersector average weekly earnings series main() downloads
+AVERAGE_WEEKLY_EARNINGS_SERIES = [
+    'CES0500000011',
+    'CES0600000011',
+    'CES1000000011',
+    'CES2000000011',
+    'CES3000000011',
+    'CES3100000011',
+    'CES3200000011',
+    'CES0800000011',
+    'CES4000000011',
+    'CES4142000011',
+    'CES4200000011',
+    'CES4300000011',
+    'CES4422000011',
+    'CES5000000011',
+    'CES5500000011',
+    'CES6000000011',
+    'CES6500000011',
+    'CES7000000011',
+    'CES8000000011',
+]
 
 # Get the query page results under filter conditions -- get the corresponding SuperSector, SeriesId
-def getTableInfos():
+# With a SeriesCatalog, a catalog stored less than ttl seconds ago is answered locally without any request
+def getTableInfos(seriesIds = AVERAGE_WEEKLY_EARNINGS_SERIES, catalog = None, ttl = CATALOG_TTL, url = BLS_URL):
+    if catalog is not None and catalog.IsFresh(seriesIds, ttl):
+        return catalog.Lookup(seriesIds)
+
     cookies = {
         'JSESSIONID': 'E6BBDD7514B5B9D2F61E4F53854D2CC4._t4_08v',
         '_ga': 'GA1.3.590876299.1713971271',
@@ -102,71 +478,175 @@ def getTableInfos():
         'sec-ch-ua-platform': '"Windows"',
     }
 
-    data = [
-        ('series_id', 'CES0500000011'),
-        ('series_id', 'CES0600000011'),
-        ('series_id', 'CES1000000011'),
-        ('series_id', 'CES2000000011'),
-        ('series_id', 'CES3000000011'),
-        ('series_id', 'CES3100000011'),
-        ('series_id', 'CES3200000011'),
-        ('series_id', 'CES0800000011'),
-        ('series_id', 'CES4000000011'),
-        ('series_id', 'CES4142000011'),
-        ('series_id', 'CES4200000011'),
-        ('series_id', 'CES4300000011'),
-        ('series_id', 'CES4422000011'),
-        ('series_id', 'CES5000000011'),
-        ('series_id', 'CES5500000011'),
-        ('series_id', 'CES6000000011'),
-        ('series_id', 'CES6500000011'),
-        ('series_id', 'CES7000000011'),
-        ('series_id', 'CES8000000011'),
-        ('survey', 'lf'),
-        ('htmlpage', 'cesbtab3.htm'),
-        ('format', ''),
-        ('html_tables', ''),
-        ('delimiter', ''),
-        ('catalog', ''),
-        ('print_line_length', ''),
-        ('lines_per_page', ''),
-        ('row_stub_key', ''),
-        ('year', ''),
-        ('date', ''),
-        ('net_change_start', ''),
-        ('net_change_end', ''),
-        ('percent_change_start', ''),
-        ('percent_change_end', ''),
-    ]
-
-    response = requests.post('https://data.bls.gov/pdq/SurveyOutputServlet', headers=headers, cookies=cookies, data=data, timeout=15)
-    html = response.text
-    soup = BeautifulSoup(html,'html.parser')
-    tables = soup.find_all('table',{'class':'catalog'})
-    index = []
-    for table in tables:
-        Industry,SeriesId = None,None
-        trs = table.find_all('tr')
-        for tr in trs:
-            if tr.find('th'):
-                key = tr.find('th').text.strip()
-                value = tr.find('td').text.strip()
-                if key == 'Industry:':
-                    Industry = value
-                elif key == 'Series Id:':
-                    SeriesId = value
-        index.append((Industry,SeriesId))
-
-    return index
-
-
-def main():
-    index = getTableInfos()
-    folder = 'Average_Weekly_Earnings'
-    os.makedirs(folder,exist_ok=True)
-    for Industry,SeriesId in index:
-        DownloadTable(folder,Industry,SeriesId)
+    entries = []
+    for i in range(0, len(seriesIds), MAX_SERIES_PER_REQUEST):
+        data = [('series_id', SeriesId) for SeriesId in seriesIds[i:i + MAX_SERIES_PER_REQUEST]] + [
+            ('survey', 'lf'),
+            ('htmlpage', 'cesbtab3.htm'),
+            ('format', ''),
+            ('html_tables', ''),
+            ('delimiter', ''),
+            ('catalog', ''),
+            ('print_line_length', ''),
+            ('lines_per_page', ''),
+            ('row_stub_key', ''),
+            ('year', ''),
+            ('date', ''),
+            ('net_change_start', ''),
+            ('net_change_end', ''),
+            ('percent_change_start', ''),
+            ('percent_change_end', ''),
+        ]
+        response = requests.post(url, headers=headers, cookies=cookies, data=data, timeout=15)
+        entries.extend(ParseCatalog(response.text))
+
+    if catalog is not None:
+        catalog.Store(seriesIds, entries)
+    return [(entry['industry'], entry['series_id']) for entry in entries]
+
+
+# Spaces out request start times per host so concurrent workers stay under maxRequestsPerSecond
+class HostRateLimiter:
+    def __init__(self, maxRequestsPerSecond = None):
+        self.interval = 1.0 / maxRequestsPerSecond if maxRequestsPerSecond else 0.0
+        self.lock = threading.Lock()
+        self.nextSlot = {}
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.nextSlot.get(host, now))
+            self.nextSlot[host] = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+# One keep-alive session whose connection pool can serve poolSize threads at once
+def CreateSession(poolSize = 8):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
 
+# Download every (Industry, SeriesId) of index concurrently and return the per-series metrics of DownloadTable
+# With incremental=True each series goes through RefreshTable against {folder}/manifest.json instead,
+# with batchSize > 1 missing series are fetched batchSize at a time through DownloadBatch, or with incremental=True
+# the series to refresh batchSize at a time through RefreshBatch, grouped by the year their request starts from
+def BulkDownload(folder, index, maxWorkers = 8, maxRequestsPerSecond = None, maxRetryNum = 5, url = BLS_URL,
+                 metricsFile = None, breakerThreshold = 5, breakerCooldown = 60.0, baseDelay = 1.0,
+                 incremental = False, maxAge = 86400, batchSize = 1):
+    os.makedirs(folder, exist_ok=True)
+    rateLimiter = HostRateLimiter(maxRequestsPerSecond)
+    breaker = CircuitBreaker(breakerThreshold, breakerCooldown)
+    metrics = MetricsLog(metricsFile) if metricsFile else None
+    manifest = Manifest(os.path.join(folder, 'manifest.json')) if incremental else None
+
+    def fetch(item):
+        Industry, SeriesId = item
+        if manifest is not None:
+            return RefreshTable(folder, Industry, SeriesId, manifest, maxRetryNum, session=session, url=url,
+                                rateLimiter=rateLimiter, breaker=breaker, metrics=metrics, baseDelay=baseDelay,
+                                maxAge=maxAge)
+        return DownloadTable(folder, Industry, SeriesId, maxRetryNum, session=session, url=url, rateLimiter=rateLimiter,
+                             breaker=breaker, metrics=metrics, baseDelay=baseDelay)
+
+    def fetchBatch(items):
+        return DownloadBatch(folder, items, maxRetryNum, session=session, url=url, rateLimiter=rateLimiter,
+                             breaker=breaker, metrics=metrics, baseDelay=baseDelay)
+
+    def refreshBatch(batch):
+        fromYear, items = batch
+        return RefreshBatch(folder, items, manifest, fromYear, maxRetryNum, session=session, url=url,
+                            rateLimiter=rateLimiter, breaker=breaker, metrics=metrics, baseDelay=baseDelay)
+
+    with CreateSession(maxWorkers) as session, ThreadPoolExecutor(max_workers=maxWorkers) as pool:
+        if batchSize <= 1:
+            return list(pool.map(fetch, index))
+        batchSize = min(batchSize, MAX_SERIES_PER_REQUEST)
+        if manifest is not None:
+            # Fresh series need no request; the rest are batched with the series whose request starts the same year
+            results, groups = {}, {}
+            for Industry, SeriesId in index:
+                plan = PlanRefresh(f"{folder}/{Industry}_{SeriesId}.xlsx", SeriesId, manifest, maxAge)
+                if plan is None:
+                    results[(Industry, SeriesId)] = NewResult(Industry, SeriesId, 'fresh')
+                else:
+                    groups.setdefault(plan[1], []).append((Industry, SeriesId, plan[0]))
+            batches = [(fromYear, items[i:i + batchSize]) for fromYear, items in groups.items()
+                       for i in range(0, len(items), batchSize)]
+            batchResults = pool.map(refreshBatch, batches)
+        else:
+            # Files already on disk are skipped without a request, as DownloadTable does, so only batch the rest
+            results = {item: NewResult(*item) for item in index if os.path.exists(f"{folder}/{item[0]}_{item[1]}.xlsx")}
+            missing = [item for item in index if item not in results]
+            batches = [missing[i:i + batchSize] for i in range(0, len(missing), batchSize)]
+            batchResults = pool.map(fetchBatch, batches)
+        for batch in batchResults:
+            results.update(((result['Industry'], result['SeriesId']), result) for result in batch)
+        return [results[item] for item in index]
+
+
+# Long (series_id, year, period, value) frame for every series of index, from either backend of LoadSeries
+def LoadXlsxSeries(index, startYear, endYear, folder = 'Average_Weekly_Earnings', **options):
+    summary = BulkDownload(folder, index, **options)
+    records = []
+    for result in summary:
+        if result['status'] == 'failed':
+            continue
+        header, rows = ReadSeriesTable(f"{folder}/{result['Industry']}_{result['SeriesId']}.xlsx")
+        months = [f"M{list(calendar.month_abbr).index(name):02d}" for name in header[1:]]
+        for year in rows:
+            if startYear <= year <= endYear:
+                records.extend((result['SeriesId'], year, period, value) for period, value in zip(months, rows[year])
+                               if value is not None)
+    return RecordsFrame(records)
+
+
+# xlsx-only options such as folder or maxWorkers are accepted and ignored, so callers can switch backends freely
+def LoadJsonSeries(index, startYear, endYear, registrationKey = None, url = None, **options):
+    client = BLSApiClient(registrationKey, **({'url': url} if url else {}))
+    with client.session:
+        return client.Frame([SeriesId for _, SeriesId in index], startYear, endYear)
+
+
+SERIES_BACKENDS = {'xlsx': LoadXlsxSeries, 'json': LoadJsonSeries}
+
+
+# Single entry point for series data: backend='xlsx' goes through DownloadTable and the saved tables,
+# backend='json' reads the BLS timeseries API straight into pandas without writing any files
+def LoadSeries(index, backend = 'xlsx', startYear = 2014, endYear = None, **options):
+    endYear = endYear or datetime.date.today().year
+    return SERIES_BACKENDS[backend](index, startYear, endYear, **options)
+
+
+# With queuePath the series go into a resumable SQLite job queue drained by `processes` worker processes, each
+# refreshing one series at a time (incrementally unless incremental=False); rerunning after a crash picks up where
+# the last run stopped. Otherwise maxWorkers threads (8 by default) download them, and batchSize > 1 fetches that
+# many series per request
+def main(maxWorkers = None, maxRequestsPerSecond = 4, incremental = True, queuePath = None, processes = 4,
+         batchSize = 1):
+    if queuePath is not None and (maxWorkers is not None or batchSize > 1):
+        raise ValueError('maxWorkers and batchSize apply to BulkDownload; with queuePath, set processes instead')
+    index = getTableInfos(catalog=SeriesCatalog())
+    folder = 'Average_Weekly_Earnings'
+    if queuePath is not None:
+        from download_queue import DownloadQueue, RunWorkers
+        queue = DownloadQueue(queuePath)
+        queue.Enqueue(folder, index)
+        RunWorkers(queuePath, processes, maxRequestsPerSecond, incremental=incremental)
+        print(queue.Status())
+        return
+    summary = BulkDownload(folder, index, maxWorkers or 8, maxRequestsPerSecond,
+                           metricsFile=os.path.join(folder, 'download_metrics.jsonl'), incremental=incremental,
+                           batchSize=batchSize)
+    failed = [result['SeriesId'] for result in summary if result['status'] == 'failed']
+    print(len(summary) - len(failed), 'of', len(summary), 'series available,', 'failed:', failed)
 
 if __name__ == '__main__':
     main()
@@ -179,29 +659,342 @@ class TestDownloadTable(unittest.TestCase):
     def test_file_already_exists(self, mock_exists):
         mock_exists.return_value = True
         result = DownloadTable('test_folder', 'test_industry', '123456')
-        self.assertIsNone(result, "Function should return None if file already exists")
+        self.assertEqual(result['status'], 'skipped', "Function should skip the series if file already exists")
+        self.assertEqual(result['attempts'], 0)
 
+    @patch('os.replace')
     @patch('os.path.exists')
-    @patch('requests.get')
-    def test_download_success(self, mock_get, mock_exists):
+    @patch('requests.post')
+    def test_download_success(self, mock_post, mock_exists, mock_replace):
         mock_exists.return_value = False
         response = requests.Response()
         response.status_code = 200
-        mock_get.return_value = response
+        response._content = b'xlsx'
+        mock_post.return_value = response
         with patch("builtins.open", mock_open()):
             result = DownloadTable('test_folder', 'test_industry', '123456')
-            self.assertIsNone(result, "Function should successfully download and return None")
+            self.assertEqual(result['status'], 'downloaded', "Function should successfully download")
+            self.assertEqual((result['attempts'], result['bytes']), (1, 4))
+            mock_replace.assert_called_once()
 
+    @patch('time.sleep')
     @patch('os.path.exists')
-    @patch('requests.get')
-    def test_retry_logic(self, mock_get, mock_exists):
+    @patch('requests.post')
+    def test_retry_logic(self, mock_post, mock_exists, mock_sleep):
         mock_exists.return_value = False
         response = requests.Response()
         response.status_code = 404  # Not found
-        mock_get.side_effect = [response] * 5  # Simulate retries
+        mock_post.side_effect = [response] * 5  # Simulate retries
         with patch("builtins.open", mock_open()):
             result = DownloadTable('test_folder', 'test_industry', '123456', maxRetryNum=5)
-            self.assertIsNone(result, "Function should retry 5 times and return None")
+            self.assertEqual(result['status'], 'failed', "Function should retry 5 times and report the failure")
+            self.assertEqual((result['attempts'], result['http_status']), (5, 404))
+            self.assertEqual(mock_sleep.call_count, 4)
+
+    @patch('os.replace')
+    @patch('time.sleep')
+    @patch('os.path.exists')
+    @patch('requests.post')
+    def test_retry_after_is_honoured(self, mock_post, mock_exists, mock_sleep, mock_replace):
+        mock_exists.return_value = False
+        throttled = requests.Response()
+        throttled.status_code = 429
+        throttled.headers['Retry-After'] = '7'
+        ok = requests.Response()
+        ok.status_code = 200
+        ok._content = b'xlsx'
+        mock_post.side_effect = [throttled, ok]
+        with patch("builtins.open", mock_open()):
+            result = DownloadTable('test_folder', 'test_industry', '123456')
+        self.assertEqual((result['status'], result['attempts']), ('downloaded', 2))
+        mock_sleep.assert_called_once_with(7.0)
+
+    @patch('os.path.exists')
+    @patch('requests.post')
+    def test_metrics_are_written_as_json_lines(self, mock_post, mock_exists):
+        mock_exists.return_value = False
+        mock_post.side_effect = requests.ConnectionError('refused')
+        folder = tempfile.mkdtemp()
+        try:
+            metrics = MetricsLog(os.path.join(folder, 'metrics.jsonl'))
+            DownloadTable(folder, 'test_industry', '123456', maxRetryNum=1, metrics=metrics)
+            with open(metrics.path) as f:
+                records = [json.loads(line) for line in f]
+        finally:
+            shutil.rmtree(folder)
+        self.assertEqual(len(records), 1)
+        self.assertEqual((records[0]['SeriesId'], records[0]['status'], records[0]['error']), ('123456', 'failed', 'refused'))
+
+
+class TestIncrementalRefresh(StandInServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.mkdtemp()
+        self.index = [('Construction', 'CES2000000011')]
+        self.file_name = f"{self.folder}/Construction_CES2000000011.xlsx"
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_merge_keeps_stored_values_the_pull_leaves_empty(self):
+        stored = {2023: [1.0, 2.0], 2024: [3.0, None]}
+        fetched = {2024: [3.5, None], 2025: [5.0, None]}
+        self.assertEqual(MergeSeriesRows(stored, fetched), {2023: [1.0, 2.0], 2024: [3.5, None], 2025: [5.0, None]})
+        self.assertEqual(LastObservedPeriod(['Year', 'Jan', 'Feb'], stored), '2024-01')
+
+    def test_first_run_downloads_and_records_manifest(self):
+        summary = BulkDownload(self.folder, self.index, url=self.url, incremental=True)
+        self.assertEqual(summary[0]['status'], 'downloaded')
+        entry = Manifest(os.path.join(self.folder, 'manifest.json')).get('CES2000000011')
+        self.assertEqual(entry['last_period'], '2024-03')
+        with open(self.file_name, 'rb') as f:
+            self.assertEqual(hashlib.sha256(f.read()).hexdigest(), entry['sha256'])
+
+    def test_refresh_requests_only_new_years_and_merges(self):
+        BulkDownload(self.folder, self.index, url=self.url, incremental=True)
+        header, rows = ReadSeriesTable(self.file_name)
+        # Pretend the stored copy was taken before 2023 was published
+        truncated = {year: values for year, values in rows.items() if year < 2023}
+        content = WriteSeriesTable(header, truncated)
+        WriteAtomic(self.file_name, content)
+        manifest = Manifest(os.path.join(self.folder, 'manifest.json'))
+        manifest.update('CES2000000011', self.file_name, content, LastObservedPeriod(header, truncated))
+
+        summary = BulkDownload(self.folder, self.index, url=self.url, incremental=True, maxAge=0)
+        self.assertEqual(summary[0]['status'], 'refreshed')
+        self.assertEqual(ReadSeriesTable(self.file_name)[1], rows)
+        full = BulkDownload(tempfile.mkdtemp(dir=self.folder), self.index, url=self.url)
+        self.assertLess(summary[0]['bytes'], full[0]['bytes'])
+
+        summary = BulkDownload(self.folder, self.index, url=self.url, incremental=True, maxAge=0)
+        self.assertEqual(summary[0]['status'], 'unchanged')
+        summary = BulkDownload(self.folder, self.index, url=self.url, incremental=True)
+        self.assertEqual((summary[0]['status'], summary[0]['attempts']), ('fresh', 0))
+
+    def test_edited_file_is_downloaded_again(self):
+        BulkDownload(self.folder, self.index, url=self.url, incremental=True)
+        with open(self.file_name, 'ab') as f:
+            f.write(b'edited')
+        summary = BulkDownload(self.folder, self.index, url=self.url, incremental=True)
+        self.assertEqual(summary[0]['status'], 'downloaded')
+
+
+class TestDownloadBatch(StandInServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.mkdtemp()
+        self.index = [('Construction', 'CES2000000011'), ('Utilities', 'CES4422000011'),
+                      ('Information', 'CES5000000011'), ('Retail trade', 'CES4200000011'),
+                      ('Mining and logging', 'CES1000000011')]
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_batches_match_single_downloads(self):
+        single = tempfile.mkdtemp(dir=self.folder)
+        batched = tempfile.mkdtemp(dir=self.folder)
+        BulkDownload(single, self.index, url=self.url)
+        summary = BulkDownload(batched, self.index, url=self.url, batchSize=2)
+        self.assertEqual([result['status'] for result in summary], ['downloaded'] * 5)
+        self.assertEqual([result['batch'] for result in summary], [2, 2, 2, 2, 1])
+        self.assertEqual(self.server.RequestHandlerClass.requests, 5 + 3)
+        for Industry, SeriesId in self.index:
+            self.assertEqual(ReadSeriesTable(f"{batched}/{Industry}_{SeriesId}.xlsx"),
+                             ReadSeriesTable(f"{single}/{Industry}_{SeriesId}.xlsx"))
+
+    def test_existing_and_unknown_series_in_a_batch(self):
+        open(f"{self.folder}/Construction_CES2000000011.xlsx", 'wb').close()
+        index = self.index[:2] + [('Nowhere', 'CES9999999999')]
+        summary = BulkDownload(self.folder, index, url=self.url, batchSize=10)
+        self.assertEqual([result['status'] for result in summary], ['skipped', 'downloaded', 'failed'])
+        self.assertEqual(summary[2]['error'], 'missing from batch response')
+
+    def test_incremental_refreshes_are_batched_by_start_year(self):
+        single = tempfile.mkdtemp(dir=self.folder)
+        BulkDownload(single, self.index, url=self.url)
+        summary = BulkDownload(self.folder, self.index, url=self.url, incremental=True, batchSize=2)
+        self.assertEqual([result['status'] for result in summary], ['downloaded'] * 5)
+        manifest = Manifest(os.path.join(self.folder, 'manifest.json'))
+        for Industry, SeriesId in self.index[:2]:
+            # Pretend the stored copies were taken before 2023 was published
+            file_name = f"{self.folder}/{Industry}_{SeriesId}.xlsx"
+            header, rows = ReadSeriesTable(file_name)
+            truncated = {year: values for year, values in rows.items() if year < 2023}
+            content = WriteSeriesTable(header, truncated)
+            WriteAtomic(file_name, content)
+            manifest.update(SeriesId, file_name, content, LastObservedPeriod(header, truncated))
+        requests = self.server.RequestHandlerClass.requests
+        summary = BulkDownload(self.folder, self.index, url=self.url, incremental=True, maxAge=0, batchSize=2)
+        self.assertEqual([result['status'] for result in summary], ['refreshed'] * 2 + ['unchanged'] * 3)
+        self.assertEqual([result['batch'] for result in summary], [2, 2, 2, 2, 1])
+        self.assertEqual(self.server.RequestHandlerClass.requests - requests, 3)
+        for Industry, SeriesId in self.index:
+            self.assertEqual(ReadSeriesTable(f"{self.folder}/{Industry}_{SeriesId}.xlsx")[1],
+                             ReadSeriesTable(f"{single}/{Industry}_{SeriesId}.xlsx")[1])
+        summary = BulkDownload(self.folder, self.index, url=self.url, incremental=True, batchSize=2)
+        self.assertEqual({result['status'] for result in summary}, {'fresh'})
+
+    def test_batch_size_is_capped(self):
+        with self.assertRaises(ValueError):
+            DownloadBatch(self.folder, [('Industry', str(i)) for i in range(MAX_SERIES_PER_REQUEST + 1)])
+        with self.assertRaises(ValueError):
+            main(queuePath=os.path.join(self.folder, 'queue.sqlite'), batchSize=10)
+
+
+class TestLoadSeries(StandInServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.mkdtemp()
+        self.index = [('Construction', 'CES2000000011'), ('Utilities', 'CES4422000011')]
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_backends_return_the_same_frame(self):
+        apiUrl = self.url.replace('/pdq/SurveyOutputServlet', '/publicAPI/v2/timeseries/data/')
+        fromXlsx = LoadSeries(self.index, 'xlsx', 2016, 2024, folder=self.folder, url=self.url)
+        fromJson = LoadSeries(self.index, 'json', 2016, 2024, registrationKey='key', url=apiUrl)
+        self.assertEqual(len(fromJson), 2 * (8 * 12 + 3))
+        pd.testing.assert_frame_equal(fromXlsx, fromJson)
+        self.assertEqual(len(os.listdir(self.folder)), 2)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(KeyError):
+            LoadSeries(self.index, 'csv')
+
+
+class TestGetTableInfos(StandInServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_catalog_is_cached_until_ttl(self):
+        catalog = SeriesCatalog(os.path.join(self.folder, 'catalog.sqlite'))
+        index = getTableInfos(catalog=catalog, url=self.url)
+        self.assertEqual(len(index), 19)
+        self.assertEqual(index[3], ('Construction', 'CES2000000011'))
+        self.assertEqual(getTableInfos(catalog=catalog, url=self.url), index)
+        self.assertEqual(self.server.RequestHandlerClass.requests, 1)
+        getTableInfos(catalog=catalog, ttl=0, url=self.url)
+        self.assertEqual(self.server.RequestHandlerClass.requests, 2)
+
+    def test_detailed_series_are_indexed_by_supersector(self):
+        catalog = SeriesCatalog(os.path.join(self.folder, 'catalog.sqlite'))
+        seriesIds = sorted(SeriesId for SeriesId in self.server.RequestHandlerClass.tables if SeriesId.endswith('01'))
+        getTableInfos(seriesIds, catalog=catalog, url=self.url)
+        self.assertEqual(self.server.RequestHandlerClass.requests, -(-len(seriesIds) // MAX_SERIES_PER_REQUEST))
+        construction = catalog.Lookup(supersector='Construction')
+        self.assertIn(('Construction', 'CES2000000001'), construction)
+        self.assertTrue(all(SeriesId.startswith('CES20') for _, SeriesId in construction))
+
+
+# DownloadTable over real HTTP against the stand-in server, including injected failures
+
+class TestDownloadTableStandIn(StandInServerMixin, unittest.TestCase):
+    server_options = None
+
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def start(self, **faults):
+        server, url = self.start_server(**faults)
+        return server.RequestHandlerClass, url
+
+    def test_download_writes_the_served_table(self):
+        handler, url = self.start()
+        result = DownloadTable(self.folder, 'Construction', 'CES2000000011', url=url)
+        self.assertEqual((result['status'], result['attempts'], result['http_status']), ('downloaded', 1, 200))
+        with open(handler.tables['CES2000000011'], 'rb') as f:
+            served = f.read()
+        with open(f"{self.folder}/Construction_CES2000000011.xlsx", 'rb') as f:
+            self.assertEqual(f.read(), served)
+        self.assertEqual(result['bytes'], len(served))
+
+    def test_server_errors_exhaust_retries(self):
+        handler, url = self.start(error_rate=1.0)
+        result = DownloadTable(self.folder, 'Construction', 'CES2000000011', maxRetryNum=3, url=url, baseDelay=0.01)
+        self.assertEqual((result['status'], result['attempts'], result['http_status']), ('failed', 3, 500))
+        self.assertEqual(handler.errors, 3)
+        self.assertFalse(os.path.exists(f"{self.folder}/Construction_CES2000000011.xlsx"))
+
+    def test_throttling_trips_the_breaker_for_everyone(self):
+        handler, url = self.start(throttle_rate=1.0, retry_after=0.3)
+        breaker = CircuitBreaker(threshold=2, cooldown=0.1)
+        for SeriesId in ('CES2000000011', 'CES4422000011'):
+            DownloadTable(self.folder, 'Industry', SeriesId, maxRetryNum=1, url=url, breaker=breaker)
+        start = time.perf_counter()
+        breaker.wait()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+        self.assertEqual(handler.throttled, 2)
+
+
+class TestBackoff(unittest.TestCase):
+    def test_backoff_grows_and_is_capped(self):
+        for attempt in range(1, 10):
+            self.assertLessEqual(BackoffDelay(attempt, 1.0, 30.0), min(30.0, 2 ** (attempt - 1)))
+
+    def test_parse_retry_after(self):
+        self.assertEqual(ParseRetryAfter('120'), 120.0)
+        self.assertIsNone(ParseRetryAfter(None))
+        self.assertEqual(ParseRetryAfter('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+    def test_circuit_breaker_pauses_after_threshold(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=0.2)
+        breaker.record(True)
+        start = time.perf_counter()
+        breaker.wait()
+        self.assertLess(time.perf_counter() - start, 0.05)
+        breaker.record(True)
+        breaker.wait()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.15)
+
+
+# Bulk download tests run against the local stand-in server, so they never touch data.bls.gov
+
+class TestBulkDownload(StandInServerMixin, unittest.TestCase):
+    server_options = {'latency': 0.05}
+
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.mkdtemp()
+        self.index = [('Construction', 'CES2000000011'), ('Utilities', 'CES4422000011'),
+                      ('Information', 'CES5000000011'), ('Retail trade', 'CES4200000011')]
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_downloads_every_series(self):
+        summary = BulkDownload(self.folder, self.index, maxWorkers=4, url=self.url)
+        self.assertEqual([result['status'] for result in summary], ['downloaded'] * 4)
+        self.assertEqual([result['SeriesId'] for result in summary], [SeriesId for _, SeriesId in self.index])
+        for Industry, SeriesId in self.index:
+            self.assertTrue(os.path.getsize(f"{self.folder}/{Industry}_{SeriesId}.xlsx") > 0)
+
+    def test_existing_and_unknown_series(self):
+        open(f"{self.folder}/Construction_CES2000000011.xlsx", 'wb').close()
+        index = self.index[:1] + [('Nowhere', 'CES9999999999')]
+        summary = BulkDownload(self.folder, index, maxWorkers=2, maxRetryNum=2, url=self.url, baseDelay=0.01)
+        self.assertEqual([result['status'] for result in summary], ['skipped', 'failed'])
+        self.assertEqual((summary[1]['attempts'], summary[1]['http_status']), (2, 404))
+
+    def test_concurrency_overlaps_round_trips(self):
+        # The server counts the requests it is answering at once rather than timing the run, which a loaded machine
+        # can stretch; its latency keeps each request open long enough for the others to arrive
+        server, url = self.start_server(latency=0.25)
+        BulkDownload(self.folder, self.index, maxWorkers=4, url=url)
+        self.assertGreater(server.RequestHandlerClass.peak_in_flight, 1)
+
+    def test_rate_limit_spaces_requests(self):
+        start = time.perf_counter()
+        BulkDownload(self.folder, self.index, maxWorkers=4, maxRequestsPerSecond=20, url=self.url)
+        self.assertGreaterEqual(time.perf_counter() - start, 3 / 20)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,246 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import periods
+from periods import MONTHS
+
+LEVELS = ('M', 'Q', 'Y', 'FY')
+REDUCERS = ('mean', 'sum', 'count', 'min', 'max', 'last')
+
+
+def reduce_runs(partials: dict, starts: np.ndarray) -> dict:
+    """
+    Combines consecutive runs of rows of partial aggregates into one row per run: sums and counts add up, minima
+    and maxima ignore NaN, and the last value is the last one that is not NaN. Raw observations are partials too,
+    with a count of 1 where they are present, so every level of the pyramid is this applied to the level below.
+
+    Parameters:
+    partials (dict): 'sum', 'count', 'min', 'max' and 'last' 2-D arrays with one row per input row.
+    starts (np.ndarray): The first row of every run, increasing and starting at 0.
+
+    Returns:
+    dict: The same arrays with one row per run.
+
+    DocTest:
+    >>> values = np.array([[1.0], [np.nan], [3.0], [np.nan]])
+    >>> runs = reduce_runs(raw_partials(values), np.array([0, 2]))
+    >>> runs['sum'].ravel().tolist(), runs['count'].ravel().tolist(), runs['last'].ravel().tolist()
+    ([1.0, 3.0], [1, 1], [1.0, 3.0])
+    """
+    last = partials['last']
+    rows = np.arange(len(last))[:, None]
+    # The position of the last present value of every run and column, -1 when the run has none
+    position = np.maximum.reduceat(np.where(np.isnan(last), -1, rows), starts, axis=0)
+    columns = np.arange(last.shape[1])
+    return {'sum': np.add.reduceat(partials['sum'], starts, axis=0),
+            'count': np.add.reduceat(partials['count'], starts, axis=0),
+            'min': np.fmin.reduceat(partials['min'], starts, axis=0),
+            'max': np.fmax.reduceat(partials['max'], starts, axis=0),
+            'last': np.where(position >= 0, last[np.maximum(position, 0), columns], np.nan)}
+
+
+def raw_partials(values: np.ndarray) -> dict:
+    """The partial aggregates of single observations, as reduce_runs takes them."""
+    present = ~np.isnan(values)
+    return {'sum': np.where(present, values, 0.0), 'count': present.astype(np.int64), 'min': values, 'max': values,
+            'last': values}
+
+
+def run_starts(groups: np.ndarray, buckets: np.ndarray) -> np.ndarray:
+    """The first row of every run of equal (group, bucket) pairs in rows sorted by group and bucket."""
+    if len(groups) == 0:
+        return np.zeros(0, dtype=np.int64)
+    changed = (groups[1:] != groups[:-1]) | (buckets[1:] != buckets[:-1])
+    return np.flatnonzero(np.r_[True, changed])
+
+
+class FrequencyPyramid:
+    """
+    Monthly, quarterly, annual and fiscal-year aggregates of every column of a dated panel, built in one pass.
+    The rows are sorted by group and date once and reduced to monthly partial aggregates (sum, count, min, max,
+    last); quarters are reduced from months, years from quarters and fiscal years from months, so no level
+    re-reads the source rows. Any level and reducer is then served from these partials and kept for later calls,
+    so switching between frequencies does not resample the frame again.
+
+    Periods without any row are absent from a level rather than present as NaN rows, and a sum over a period
+    whose values are all missing is NaN, like resample().sum(min_count=1).
+    """
+
+    def __init__(self, df: pd.DataFrame, date: str = 'Date', columns=None, by=None, fiscal_year_start: int = 10):
+        """
+        Parameters:
+        df (pd.DataFrame): The panel, one row per date (daily, monthly, ...) and group, in any order.
+        date (str): The date column: datetimes, date strings or Periods.
+        columns (list): The columns to aggregate; defaults to every numeric column except date and by.
+        by (str or list): The grouping column(s), e.g. 'State', or None for a single series per column.
+        fiscal_year_start (int): The first month of the fiscal year; 10 is the US federal October-September year,
+                                 which is labelled by the calendar year it ends in.
+        """
+        self.date = date
+        self.by = [by] if isinstance(by, str) else list(by or [])
+        if columns is None:
+            columns = [column for column in df.columns
+                       if column != date and column not in self.by and pd.api.types.is_numeric_dtype(df[column])]
+        self.columns = list(columns)
+        self.fiscal_year_start = fiscal_year_start
+        self.frames = {}
+
+        dates = df[date]
+        if isinstance(dates.dtype, pd.PeriodDtype):
+            dates = dates.dt.to_timestamp()
+        dates = pd.to_datetime(dates)
+        if self.by:
+            groups = df.groupby(self.by, observed=True, dropna=False).ngroup().to_numpy()
+        else:
+            groups = np.zeros(len(df), dtype=np.int64)
+        order = np.lexsort((dates.to_numpy(), groups))
+        groups = groups[order]
+        # Month ordinals count months since 1970-01, as those of monthly Periods do
+        months = ((dates.dt.year.to_numpy() - 1970) * 12 + dates.dt.month.to_numpy() - 1).astype(np.int64)[order]
+        values = df[self.columns].to_numpy(dtype=np.float64)[order]
+
+        starts = run_starts(groups, months)
+        first = order[np.unique(groups, return_index=True)[1]] if len(groups) else order
+        self.keys = df[self.by].iloc[first].reset_index(drop=True) if self.by else None
+        self.levels = {'M': (groups[starts], months[starts], reduce_runs(raw_partials(values), starts))}
+        # Quarter and year ordinals count quarters and years since 1970, as those of Q-DEC and A-DEC Periods do
+        self.levels['Q'] = self.coarsen('M', self.levels['M'][1] // 3)
+        self.levels['Y'] = self.coarsen('Q', self.levels['Q'][1] // 4)
+        # A fiscal year is labelled by the calendar year it ends in, as A-SEP (etc.) Periods are
+        self.levels['FY'] = self.coarsen('M', (self.levels['M'][1] + (13 - fiscal_year_start) % 12) // 12)
+
+    def __repr__(self):
+        return (f"FrequencyPyramid({len(self.columns)} columns, {0 if self.keys is None else len(self.keys)} groups, "
+                f"{len(self.levels['M'][1])} group-months)")
+
+    def coarsen(self, level: str, buckets: np.ndarray) -> tuple:
+        """Reduces the partials of a level to the coarser buckets given for each of its rows."""
+        groups, _, partials = self.levels[level]
+        starts = run_starts(groups, buckets)
+        return groups[starts], buckets[starts], reduce_runs(partials, starts)
+
+    def frequency(self, level: str) -> str:
+        """The pandas Period frequency of a level."""
+        if level == 'FY':
+            return 'A-' + MONTHS[(self.fiscal_year_start - 2) % 12].upper()
+        return {'M': 'M', 'Q': 'Q-DEC', 'Y': 'A-DEC'}[level]
+
+    def get(self, level: str = 'Y', reducer: str = 'mean') -> pd.DataFrame:
+        """
+        The aggregates of every column at one level.
+
+        Parameters:
+        level (str): 'M', 'Q', 'Y' or 'FY'.
+        reducer (str): 'mean', 'sum', 'count', 'min', 'max' or 'last' (the latest value present).
+
+        Returns:
+        pd.DataFrame: One column per aggregated column, indexed by Periods named after the date column, preceded
+                      by the by columns when grouped. The frame is shared between calls; copy it before editing.
+
+        DocTest:
+        >>> df = pd.DataFrame({'Date': pd.date_range('2023-08-01', periods=4, freq='MS'), 'Rate': [1.0, 2.0, 3.0, 6.0]})
+        >>> pyramid = FrequencyPyramid(df)
+        >>> pyramid.get('Q')['Rate']
+        Date
+        2023Q3    1.5
+        2023Q4    4.5
+        Freq: Q-DEC, Name: Rate, dtype: float64
+        >>> pyramid.get('FY', 'last')['Rate'].tolist()
+        [2.0, 6.0]
+        """
+        if level not in LEVELS or reducer not in REDUCERS:
+            raise ValueError(f'Unknown level {level!r} or reducer {reducer!r}; expected one of {LEVELS} and {REDUCERS}')
+        if (level, reducer) not in self.frames:
+            groups, buckets, partials = self.levels[level]
+            if reducer == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    values = partials['sum'] / partials['count']
+            elif reducer == 'sum':
+                values = np.where(partials['count'] > 0, partials['sum'], np.nan)
+            else:
+                values = partials[reducer]
+            period_index = pd.PeriodIndex(pd.arrays.PeriodArray(buckets, dtype=pd.PeriodDtype(self.frequency(level))),
+                                        name=self.date)
+            if self.by:
+                labels = self.keys.iloc[groups]
+                index = pd.MultiIndex.from_arrays([labels[column].to_numpy() for column in self.by] + [period_index],
+                                                  names=self.by + [self.date])
+            else:
+                index = period_index
+            self.frames[(level, reducer)] = pd.DataFrame(values, index=index, columns=self.columns)
+        return self.frames[(level, reducer)]
+
+    @classmethod
+    def from_monthly_table(cls, table: pd.DataFrame, year: str = 'Year', by=None, **options) -> 'FrequencyPyramid':
+        """
+        Builds the pyramid of a Year x Jan..Dec table (the BLS xlsx tables and *_summary.csv files), whose annual
+        averages the notebooks otherwise take across the month columns by hand.
+
+        Parameters:
+        table (pd.DataFrame): The table; several series may be stacked and told apart by the by columns.
+        year (str): The year column.
+        by (str or list): The column(s) identifying a series, e.g. 'CES'.
+        **options: Passed to the constructor, e.g. fiscal_year_start.
+
+        Returns:
+        FrequencyPyramid: The pyramid of a single 'value' column.
+        """
+        by = [by] if isinstance(by, str) else list(by or [])
+        present, ordinals, values = periods.unpack_monthly_table(table, year)
+        long = table[by].iloc[np.repeat(np.arange(len(table)), len(present))].reset_index(drop=True)
+        long['Date'] = pd.PeriodIndex(pd.arrays.PeriodArray(ordinals.ravel(), dtype=pd.PeriodDtype('M'))).to_timestamp()
+        long['value'] = values.ravel()
+        return cls(long, 'Date', ['value'], by or None, **options)
+
+
+# Unit tests compare every level and reducer with pandas resampling of the same panel
+
+class TestFrequencyPyramid(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        dates = pd.date_range('2019-11-03', '2023-02-17', freq='D')
+        self.daily = pd.DataFrame({'Date': np.tile(dates, 2), 'State': np.repeat(['Ohio', 'Utah'], len(dates)),
+                                   'a': rng.normal(size=2 * len(dates)), 'b': rng.normal(size=2 * len(dates))})
+        self.daily.loc[rng.random(len(self.daily)) < 0.2, 'a'] = np.nan
+        # All of Utah's February 2021 is missing
+        self.daily.loc[(self.daily['State'] == 'Utah') & (self.daily['Date'].dt.strftime('%Y-%m') == '2021-02'),
+                       'b'] = np.nan
+        self.daily = self.daily.sample(frac=1.0, random_state=0)
+        self.pyramid = FrequencyPyramid(self.daily, by='State')
+
+    def resampled(self, rule, reducer):
+        grouped = self.daily.set_index('Date').groupby('State')[['a', 'b']].resample(rule)
+        expected = grouped.last() if reducer == 'last' else grouped.agg(reducer)
+        if reducer == 'sum':
+            expected = grouped.sum(min_count=1)
+        expected = expected.dropna(how='all') if reducer != 'count' else expected[expected.sum(axis=1) > 0]
+        return expected
+
+    def test_levels_match_resample(self):
+        for level, rule in (('M', 'M'), ('Q', 'Q'), ('Y', 'A'), ('FY', 'A-SEP')):
+            for reducer in REDUCERS:
+                result = self.pyramid.get(level, reducer)
+                expected = self.resampled(rule, reducer)
+                self.assertEqual(result.index.get_level_values('Date').freqstr, pd.Period('2020', rule).freqstr)
+                np.testing.assert_allclose(result.to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64),
+                                           err_msg=f'{level} {reducer}')
+                self.assertEqual(result.index.get_level_values('State').tolist(),
+                                 expected.index.get_level_values('State').tolist())
+
+    def test_fiscal_year_labels_and_cached_frames(self):
+        fiscal = self.pyramid.get('FY', 'count').loc['Ohio']
+        self.assertEqual(fiscal.index.astype(str).tolist(), ['2020', '2021', '2022', '2023'])
+        self.assertEqual(int(fiscal.loc['2020', 'b']), 333)
+        self.assertIs(self.pyramid.get('FY', 'count'), self.pyramid.get('FY', 'count'))
+        with self.assertRaises(ValueError):
+            self.pyramid.get('W')
+
+    def test_monthly_table_averages_match_the_month_columns(self):
+        import os
+        summary = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data', 'data-bls-gov',
+                                           'Average_Weekly_Earnings_summary.csv'))
+        annual = FrequencyPyramid.from_monthly_table(summary, by='CES').get('Y')
+        expected = summary.set_index(['CES', 'Year'])[MONTHS].mean(axis=1)
+        np.testing.assert_allclose(annual['value'].to_numpy(), expected.sort_index().to_numpy())
@@ -0,0 +1,476 @@
+import calendar
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import aggregation
+import BLS_scraper_with_tests as scraper
+import deflator
+import growth
+import main
+import panel
+import periods
+import series_store
+import utils
+from bls_standin_server import start_standin_server, stop_standin_server
+
+
+def benchmark_bulk_download(concurrency_levels: tuple = (1, 2, 4, 8, 16), latency: float = 0.2,
+                            batch_size: int = 1) -> list:
+    """
+    Measures BulkDownload throughput against the local stand-in server at each concurrency level,
+    downloading every canned series into a fresh temporary folder per level.
+
+    Parameters:
+    concurrency_levels (tuple): The maxWorkers values to measure.
+    latency (float): Seconds the stand-in server waits before answering each request.
+    batch_size (int): Series packed into each request (see BulkDownload's batchSize).
+
+    Returns:
+    list: One dict per level with the worker count, requests sent, series downloaded, elapsed seconds and
+          series per second.
+    """
+    server, url = start_standin_server(latency=latency)
+    index = [('Series', series_id) for series_id in sorted(server.RequestHandlerClass.tables)]
+    results = []
+    try:
+        for workers in concurrency_levels:
+            folder = tempfile.mkdtemp()
+            try:
+                server.RequestHandlerClass.requests = 0
+                start = time.perf_counter()
+                summary = scraper.BulkDownload(folder, index, maxWorkers=workers, url=url, batchSize=batch_size)
+                elapsed = time.perf_counter() - start
+            finally:
+                shutil.rmtree(folder)
+            downloaded = sum(result['status'] == 'downloaded' for result in summary)
+            results.append({'workers': workers, 'requests': server.RequestHandlerClass.requests, 'series': downloaded,
+                            'seconds': round(elapsed, 3), 'series_per_second': round(downloaded / elapsed, 1)})
+    finally:
+        stop_standin_server(server)
+    return results
+
+
+def load_test(concurrency_levels: tuple = (1, 4, 16), latency: float = 0.1, jitter: float = 0.1,
+              error_rate: float = 0.05, throttle_rate: float = 0.05, retry_after: float = 0.5, batch_size: int = 1,
+              series: int = None, base_delay: float = 0.1, seed: int = 0) -> list:
+    """
+    Drives BulkDownload against a stand-in server with injected latency, 500s and 429s at each concurrency level,
+    and summarises throughput, tail latency and retry behaviour from the per-series JSON-lines metrics.
+
+    Parameters:
+    concurrency_levels (tuple): The maxWorkers values to measure.
+    latency (float): Base seconds the stand-in server waits before answering.
+    jitter (float): Up to this many extra seconds of random latency per request.
+    error_rate (float): Fraction of requests answered with HTTP 500.
+    throttle_rate (float): Fraction of requests answered with HTTP 429.
+    retry_after (float): Retry-After seconds sent with each 429.
+    batch_size (int): Series packed into each request.
+    series (int): How many canned series to download; None means all of them.
+    base_delay (float): BulkDownload's backoff base delay, scaled down so runs finish quickly.
+    seed (int): Seed of the server's fault and jitter draws.
+
+    Returns:
+    list: One dict per level with throughput, p50/p95/p99 per-series latency, mean attempts, failures and
+          the server's request, error and throttle counts.
+    """
+    results = []
+    for workers in concurrency_levels:
+        server, url = start_standin_server(latency=latency, jitter=jitter, error_rate=error_rate,
+                                           throttle_rate=throttle_rate, retry_after=retry_after, seed=seed)
+        handler = server.RequestHandlerClass
+        index = [('Series', series_id) for series_id in sorted(handler.tables)[:series]]
+        folder = tempfile.mkdtemp()
+        try:
+            metrics_file = os.path.join(folder, 'metrics.jsonl')
+            start = time.perf_counter()
+            scraper.BulkDownload(os.path.join(folder, 'tables'), index, maxWorkers=workers, url=url,
+                                 metricsFile=metrics_file, batchSize=batch_size, baseDelay=base_delay,
+                                 breakerCooldown=retry_after or 1.0)
+            elapsed = time.perf_counter() - start
+            with open(metrics_file) as f:
+                records = [json.loads(line) for line in f]
+        finally:
+            shutil.rmtree(folder)
+            stop_standin_server(server)
+        latencies = np.array([record['latency'] for record in records])
+        attempts = np.array([record['attempts'] for record in records])
+        downloaded = sum(record['status'] == 'downloaded' for record in records)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        results.append({'workers': workers, 'series': len(index), 'downloaded': downloaded,
+                        'failed': len(index) - downloaded, 'seconds': round(elapsed, 3),
+                        'series_per_second': round(downloaded / elapsed, 1), 'p50': round(p50, 3),
+                        'p95': round(p95, 3), 'p99': round(p99, 3), 'mean_attempts': round(attempts.mean(), 2),
+                        'requests': handler.requests, 'errors': handler.errors, 'throttled': handler.throttled})
+    return results
+
+
+def benchmark_xlsx_readers(data_dir: str = 'Data', repeat: int = 3) -> list:
+    """
+    Compares the layout-sniffing read_xlsx_table with the pd.read_excel calls it replaced, on every BLS and Eurostat
+    file under data_dir, without the Excel cache. Each reader is run once to warm imports before measuring.
+
+    Parameters:
+    data_dir (str): The root of the data tree.
+    repeat (int): How many passes over the files are timed.
+
+    Returns:
+    list: One dict per reader with the seconds per pass and the peak traced memory of a single file read.
+    """
+    usbls = sorted(glob.glob(os.path.join(data_dir, 'USBLS', '*', '*.xlsx')))
+    eurostat = sorted(glob.glob(os.path.join(data_dir, 'Eurostat', '*', '*.xlsx')))
+    # The blank_row values the notebooks passed per BLS directory
+    blank_rows = {'Age': 11, 'Age(byRate)': 11, 'Education': 12, 'Race': 12}
+    readers = {
+        'pd.read_excel': [(pd.read_excel, path, {'skiprows': blank_rows[os.path.basename(os.path.dirname(path))]})
+                          for path in usbls] + [(pd.read_excel, path, {'skiprows': 10}) for path in eurostat],
+        'read_xlsx_table': [(utils.read_xlsx_table, path, {}) for path in usbls] +
+                           [(utils.read_xlsx_table, path, {'header_label': 'TIME'}) for path in eurostat],
+    }
+    results = []
+    for name, calls in readers.items():
+        reader, path, kwargs = calls[0]
+        reader(path, **kwargs)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for reader, path, kwargs in calls:
+                reader(path, **kwargs)
+        elapsed = (time.perf_counter() - start) / repeat
+        peak = 0
+        for reader, path, kwargs in calls:
+            tracemalloc.start()
+            reader(path, **kwargs)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        results.append({'reader': name, 'files': len(calls), 'seconds': round(elapsed, 3), 'peak_bytes': peak})
+    return results
+
+
+def benchmark_growth(groups: int = 5000, years: int = 40, columns: int = 3, repeat: int = 3) -> list:
+    """
+    Compares growth.growth_rates with the per-group transform(lambda x: x.pct_change()) it replaced, on a synthetic
+    long panel of groups x years rows with several value columns, shuffled so both have to order the rows.
+
+    Parameters:
+    groups (int): The number of series (e.g. region or country/sex pairs).
+    years (int): The rows per series.
+    columns (int): The value columns whose growth is computed.
+    repeat (int): How many runs are timed.
+
+    Returns:
+    list: One dict per implementation with the rows and the seconds per run.
+    """
+    rng = np.random.default_rng(0)
+    names = [f'Value{i}' for i in range(columns)]
+    df = pd.DataFrame({'Group': np.repeat(np.arange(groups), years), 'Year': np.tile(np.arange(years), groups)})
+    for name in names:
+        df[name] = rng.uniform(1, 100, len(df))
+    df = df.sample(frac=1, random_state=0)
+
+    def transform():
+        ordered = df.sort_values('Year')
+        return ordered.groupby('Group')[names].transform(lambda x: x.pct_change()).reindex(df.index)
+
+    implementations = {'groupby.transform': transform,
+                       'growth_rates': lambda: growth.growth_rates(df, names, by='Group', order='Year')}
+    results = []
+    for name, implementation in implementations.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            implementation()
+        results.append({'implementation': name, 'rows': len(df),
+                        'seconds': round((time.perf_counter() - start) / repeat, 3)})
+    return results
+
+
+def benchmark_deflate(copies: int = 50, repeat: int = 3) -> list:
+    """
+    Compares deflator.deflate with a row-wise apply that looks the CPI up per row and month, on the
+    Average_Weekly_Earnings summary table repeated `copies` times, against a synthetic monthly CPI.
+
+    Parameters:
+    copies (int): How many times the ~190 series-year rows are repeated.
+    repeat (int): How many runs are timed.
+
+    Returns:
+    list: One dict per implementation with the rows and the seconds per run.
+    """
+    wages = pd.read_csv(os.path.join(deflator.DATA_DIR, 'Average_Weekly_Earnings_summary.csv'))
+    wages = pd.concat([wages] * copies, ignore_index=True)
+    months = pd.period_range(f"{wages['Year'].min()}-01", f"{wages['Year'].max()}-12", freq='M')
+    cpi = pd.Series(np.linspace(233.0, 310.0, len(months)), index=months)
+    level = deflator.base_level(cpi)
+    lookup = {(period.year, period.month): value for period, value in cpi.items()}
+
+    def row_wise():
+        return wages.apply(lambda row: pd.Series([row[month] * level / lookup[(row['Year'], i + 1)]
+                                                  for i, month in enumerate(deflator.MONTHS)]), axis=1)
+
+    implementations = {'apply': row_wise, 'deflate': lambda: deflator.deflate(wages, cpi)}
+    results = []
+    for name, implementation in implementations.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            implementation()
+        results.append({'implementation': name, 'rows': len(wages),
+                        'seconds': round((time.perf_counter() - start) / repeat, 4)})
+    return results
+
+
+def benchmark_series_store(repeat: int = 3) -> list:
+    """
+    Compares the per-file DataFrames of utils.read_usbls_data, read from a warm Excel cache, with opening a saved
+    SeriesStore and querying every series from it, for the directories of series_store.SOURCES.
+
+    Parameters:
+    repeat (int): How many runs are timed.
+
+    Returns:
+    list: One dict per implementation with the series, the seconds per run and the bytes held.
+    """
+    paths = [(os.path.join(series_store.DATA_DIR, source), name) for source in series_store.SOURCES
+             for name in sorted(os.listdir(os.path.join(series_store.DATA_DIR, source))) if name.endswith('.xlsx')]
+    folder = tempfile.mkdtemp()
+    try:
+        series_store.SeriesStore.from_directories().save(folder)
+
+        def per_file():
+            frames = [utils.read_usbls_data(dir_path, name) for dir_path, name in paths]
+            return sum(int(frame.memory_usage(deep=True).sum() + frame.index.memory_usage(deep=True))
+                       for frame in frames)
+
+        def store():
+            opened = series_store.SeriesStore.open(folder)
+            table = opened.query()
+            return int(opened.metadata.memory_usage(deep=True).sum() + table.memory_usage(deep=True).sum())
+
+        results = []
+        for name, implementation in {'read_usbls_data': per_file, 'SeriesStore': store}.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                held = implementation()
+            results.append({'implementation': name, 'series': len(paths),
+                            'seconds': round((time.perf_counter() - start) / repeat, 4), 'bytes': held})
+        return results
+    finally:
+        shutil.rmtree(folder)
+
+
+def benchmark_pyramid(groups: int = 50, columns: int = 4, start: str = '1990-01-01', end: str = '2024-12-31',
+                      requests: int = 12) -> list:
+    """
+    Simulates a dashboard switching between monthly, quarterly, annual and fiscal-year views of a daily panel:
+    resampling the whole frame on every request against building an aggregation.FrequencyPyramid once and
+    reading its levels.
+
+    Parameters:
+    groups (int): The number of series (e.g. states) in the panel.
+    columns (int): The number of value columns.
+    start, end (str): The daily date range of every series.
+    requests (int): The number of view switches, cycling through the four levels.
+
+    Returns:
+    list: One dict per implementation with the rows and the total seconds, including the pyramid's build.
+    """
+    dates = pd.date_range(start, end, freq='D')
+    rng = np.random.default_rng(0)
+    panel = pd.DataFrame(rng.normal(size=(groups * len(dates), columns)), columns=[f'c{i}' for i in range(columns)])
+    panel.insert(0, 'Date', np.tile(dates, groups))
+    panel.insert(1, 'State', np.repeat(np.arange(groups), len(dates)))
+    rules = [('M', 'M'), ('Q', 'Q'), ('Y', 'A'), ('FY', 'A-SEP')]
+
+    def resample():
+        for request in range(requests):
+            panel.set_index('Date').groupby('State').resample(rules[request % 4][1]).mean()
+
+    def pyramid():
+        built = aggregation.FrequencyPyramid(panel, by='State')
+        for request in range(requests):
+            built.get(rules[request % 4][0])
+
+    results = []
+    for name, implementation in {'resample': resample, 'FrequencyPyramid': pyramid}.items():
+        start_time = time.perf_counter()
+        implementation()
+        results.append({'implementation': name, 'rows': len(panel), 'requests': requests,
+                        'seconds': round(time.perf_counter() - start_time, 4)})
+    return results
+
+
+def benchmark_periods(rows: int = 2_000_000, repeat: int = 3) -> list:
+    """
+    Compares the per-row parsing of ONS 'Jan2020-Mar2020' labels in process_onsgovuk_data (split, then
+    pd.to_datetime with a format) with periods.parse_dates, which parses each distinct label once.
+
+    Parameters:
+    rows (int): The number of labels, cycling through the rolling quarters of 2001-2024.
+    repeat (int): How many runs are timed.
+
+    Returns:
+    list: One dict per implementation with the rows and the seconds per run.
+    """
+    abbreviations = [calendar.month_abbr[month] for month in range(1, 13)]
+    ranges = [f'{abbreviations[month]}{year}-{abbreviations[(month + 2) % 12]}{year + (month + 2) // 12}'
+              for year in range(2001, 2025) for month in range(12)]
+    labels = pd.Series(np.resize(np.array(ranges, dtype=object), rows))
+    implementations = {
+        'split + to_datetime': lambda: pd.to_datetime(labels.str.split('-').str[0], format='%b%Y'),
+        'parse_dates': lambda: periods.parse_dates(labels, 'M'),
+    }
+    results = []
+    for name, implementation in implementations.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            implementation()
+        results.append({'implementation': name, 'rows': rows,
+                        'seconds': round((time.perf_counter() - start) / repeat, 4)})
+    return results
+
+
+def benchmark_panel(countries: int = 200, columns: int = 4) -> list:
+    """
+    Aligns `countries` sources, half monthly with a (Year, Month) index like concatenate_usbls_files and half
+    annual with a Year index like merge_eurostat_data, onto an annual calendar: by averaging the monthly sources
+    and merging one source at a time, as the notebooks do, against panel.PanelBuilder.
+
+    Parameters:
+    countries (int): The number of sources.
+    columns (int): The number of series per source.
+
+    Returns:
+    list: One dict per implementation with the sources, the seconds and the peak traced bytes.
+    """
+    rng = np.random.default_rng(0)
+    months = pd.MultiIndex.from_product([range(1980, 2025), range(1, 13)], names=['Year', 'Month'])
+    years = pd.Index(range(1990, 2023), name='Year')
+    sources = {f'country{i}': pd.DataFrame(rng.normal(size=(len(index), columns)), index=index,
+                                           columns=[f'c{j}' for j in range(columns)])
+               for i, index in enumerate([months, years] * (countries // 2))}
+
+    def cascade():
+        merged = None
+        for name, frame in sources.items():
+            if isinstance(frame.index, pd.MultiIndex):
+                frame = frame.groupby(level='Year').mean()
+            frame = frame.add_prefix(f'{name}_')
+            merged = frame if merged is None else merged.merge(frame, how='outer', left_index=True, right_index=True)
+        return merged
+
+    def builder():
+        built = panel.PanelBuilder()
+        for name, frame in sources.items():
+            built.add(name, frame)
+        return built.build('A')
+
+    results = []
+    for name, implementation in {'merge cascade': cascade, 'PanelBuilder': builder}.items():
+        tracemalloc.start()
+        start = time.perf_counter()
+        implementation()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results.append({'implementation': name, 'sources': len(sources), 'seconds': round(elapsed, 4),
+                        'peak_bytes': peak})
+    return results
+
+
+def processor_peak_rss(function: str, rows: int, extra_columns: int, defensive: bool, copy_on_write: bool) -> int:
+    """
+    Calls one main.py processor on a synthetic frame in the current process and reports how far the call raised
+    the peak resident set size. Meant to run in a fresh process per measurement (see benchmark_copy_on_write).
+
+    Parameters:
+    function (str): 'calculate_GDP_Growth', 'calculate_Population_Growth' or 'calculate_EU_population_growth'.
+    rows (int): The rows of the frame.
+    extra_columns (int): Float columns the processor does not touch, as carried by the merged notebook frames.
+    defensive (bool): Whether the caller passes df.copy(), as callers of the old mutating functions had to.
+    copy_on_write (bool): The pandas mode.copy_on_write option during the call.
+
+    Returns:
+    int: The increase of peak RSS over the call, in bytes.
+    """
+    rng = np.random.default_rng(0)
+    # One float block wrapped without a copy, so building the frame does not set the peak itself
+    columns = ['GDP', 'Population'] + [f'Extra{i}' for i in range(extra_columns)]
+    df = pd.DataFrame(rng.uniform(1, 100, (rows // 4 * 4, len(columns))), columns=columns)
+    df['Region'] = pd.Categorical.from_codes(np.repeat(np.arange(4), rows // 4), dtype=main.US_REGION.dtype)
+    df['Year'] = np.tile(np.arange(rows // 4), 4)
+    pd.set_option('mode.copy_on_write', copy_on_write)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    getattr(main, function)(df.copy() if defensive else df)
+    # ru_maxrss is in kilobytes on Linux
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * 1024
+
+
+def benchmark_copy_on_write(rows: int = 2_000_000, extra_columns: int = 16,
+                            functions: tuple = ('calculate_GDP_Growth', 'calculate_Population_Growth',
+                                                'calculate_EU_population_growth')) -> list:
+    """
+    Compares the peak RSS of calling the non-mutating processors directly with calling them on a defensive
+    df.copy(), with pandas copy-on-write off and on. Every measurement runs in its own spawned process, so the
+    peaks do not carry over.
+
+    Parameters:
+    rows (int): The rows of the synthetic frame.
+    extra_columns (int): Float columns the processors do not touch.
+    functions (tuple): The main.py processors to measure.
+
+    Returns:
+    list: One dict per function, mode and calling style with the peak RSS increase in MB.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for function in functions:
+        for copy_on_write in (False, True):
+            for defensive in (True, False):
+                with context.Pool(1) as pool:
+                    peak = pool.apply(processor_peak_rss, (function, rows, extra_columns, defensive, copy_on_write))
+                results.append({'function': function, 'copy_on_write': copy_on_write,
+                                'caller': 'df.copy()' if defensive else 'df', 'peak_mb': round(peak / 2**20, 1)})
+    return results
+
+
+if __name__ == '__main__':
+    for batch_size in (1, 20):
+        for row in benchmark_bulk_download(batch_size=batch_size):
+            print(dict(row, batch_size=batch_size))
+    for row in load_test():
+        print(row)
+    for row in benchmark_xlsx_readers():
+        print(row)
+    for row in benchmark_growth():
+        print(row)
+    for row in benchmark_deflate():
+        print(row)
+    for row in benchmark_copy_on_write():
+        print(row)
+    for row in benchmark_series_store():
+        print(row)
+    for row in benchmark_pyramid():
+        print(row)
+    for row in benchmark_periods():
+        print(row)
+    for row in benchmark_panel():
+        print(row)
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_faults_show_up_as_retries(self):
+        clean, = load_test((4,), latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, series=12)
+        self.assertEqual((clean['downloaded'], clean['requests'], clean['mean_attempts']), (12, 12, 1.0))
+        faulty, = load_test((4,), latency=0.0, jitter=0.0, error_rate=0.2, throttle_rate=0.2, retry_after=0.01,
+                            series=12, base_delay=0.01)
+        self.assertEqual(faulty['requests'], 12 + faulty['errors'] + faulty['throttled'])
+        self.assertGreater(faulty['mean_attempts'], 1.0)
+        self.assertLessEqual(faulty['p50'], faulty['p99'])
@@ -0,0 +1,128 @@
+import datetime
+import math
+import os
+import unittest
+
+import pandas as pd
+import requests
+
+API_URL = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
+
+# Per-request limits of the public API; registered keys get the larger ones
+MAX_SERIES = {True: 50, False: 25}
+MAX_YEARS = {True: 20, False: 10}
+
+RECORD_DTYPES = {'series_id': 'category', 'year': 'int16', 'period': 'category', 'value': 'float64'}
+
+
+# Client for the BLS public JSON time-series API. One request carries many series and a multi-year span,
+# so a full refresh of the CES supersectors is a handful of POSTs instead of one xlsx per series
+class BLSApiClient:
+    def __init__(self, registrationKey = None, url = API_URL, session = None, timeout = 30):
+        self.registrationKey = registrationKey if registrationKey is not None else os.environ.get('BLS_API_KEY')
+        self.url = url
+        self.session = session if session is not None else requests.Session()
+        self.timeout = timeout
+
+    # Split the series list and year span into the requests the API limits allow
+    def Requests(self, seriesIds, startYear, endYear):
+        registered = bool(self.registrationKey)
+        seriesStep, yearStep = MAX_SERIES[registered], MAX_YEARS[registered]
+        for i in range(0, len(seriesIds), seriesStep):
+            for first in range(startYear, endYear + 1, yearStep):
+                body = {'seriesid': list(seriesIds[i:i + seriesStep]), 'startyear': str(first),
+                        'endyear': str(min(first + yearStep - 1, endYear))}
+                if registered:
+                    body['registrationkey'] = self.registrationKey
+                yield body
+
+    # Yield one typed (series_id, year, period, value) tuple per monthly observation
+    def Records(self, seriesIds, startYear, endYear = None):
+        endYear = endYear or datetime.date.today().year
+        for body in self.Requests(seriesIds, startYear, endYear):
+            response = self.session.post(self.url, json=body, timeout=self.timeout)
+            response.raise_for_status()
+            reply = response.json()
+            if reply.get('status') != 'REQUEST_SUCCEEDED':
+                raise RuntimeError(f"BLS API {reply.get('status')}: {'; '.join(reply.get('message', []))}")
+            for series in reply['Results']['series']:
+                for observation in series['data']:
+                    # M13 is the annual average, which the xlsx tables leave out too
+                    if not observation['period'].startswith('M') or observation['period'] == 'M13':
+                        continue
+                    yield (series['seriesID'], int(observation['year']), observation['period'],
+                           ParseValue(observation['value']))
+
+    def Frame(self, seriesIds, startYear, endYear = None):
+        return RecordsFrame(self.Records(seriesIds, startYear, endYear))
+
+
+# API values are strings such as '1,019.43'; '-' marks a missing observation
+def ParseValue(value):
+    try:
+        return float(value.replace(',', ''))
+    except (AttributeError, ValueError):
+        return math.nan
+
+
+# Long frame with compact dtypes, sorted by series and period
+def RecordsFrame(records):
+    frame = pd.DataFrame.from_records(list(records), columns=list(RECORD_DTYPES))
+    frame = frame.astype(RECORD_DTYPES)
+    return frame.sort_values(['series_id', 'year', 'period'], ignore_index=True)
+
+
+# Unit tests replay a recorded API reply through the local stand-in server
+
+RECORDED_REPLY = {
+    "status": "REQUEST_SUCCEEDED", "responseTime": 31, "message": [],
+    "Results": {"series": [
+        {"seriesID": "CES2000000011", "data": [
+            {"year": "2024", "period": "M02", "periodName": "February", "latest": "true", "value": "1,462.64", "footnotes": [{}]},
+            {"year": "2024", "period": "M01", "periodName": "January", "value": "1,447.60", "footnotes": [{}]},
+            {"year": "2023", "period": "M13", "periodName": "Annual", "value": "1,425.91", "footnotes": [{}]},
+            {"year": "2023", "period": "M12", "periodName": "December", "value": "-", "footnotes": [{"code": "P"}]}]},
+        {"seriesID": "CES4422000011", "data": [
+            {"year": "2024", "period": "M01", "periodName": "January", "value": "2,142.88", "footnotes": [{}]}]}]}
+}
+
+
+class TestBLSApiClient(unittest.TestCase):
+    def setUp(self):
+        # Imported here so that importing the client does not load the test server
+        from bls_standin_server import start_standin_server, stop_standin_server
+        self.server, url = start_standin_server()
+        self.addCleanup(stop_standin_server, self.server)
+        self.apiUrl = url.replace('/pdq/SurveyOutputServlet', '/publicAPI/v2/timeseries/data/')
+
+    def test_recorded_reply_becomes_typed_frame(self):
+        self.server.RequestHandlerClass.apiReplies = [RECORDED_REPLY]
+        frame = BLSApiClient(registrationKey='', url=self.apiUrl).Frame(['CES2000000011', 'CES4422000011'], 2023, 2024)
+        self.assertEqual(dict(frame.dtypes.astype(str)), RECORD_DTYPES)
+        self.assertEqual(frame['period'].tolist(), ['M12', 'M01', 'M02', 'M01'])
+        self.assertTrue(math.isnan(frame['value'][0]))
+        self.assertEqual(frame['value'][1:].tolist(), [1447.60, 1462.64, 2142.88])
+
+    def test_requests_respect_series_and_year_limits(self):
+        client = BLSApiClient(registrationKey='', url=self.apiUrl)
+        bodies = list(client.Requests([f'S{i}' for i in range(30)], 2001, 2024))
+        self.assertEqual(len(bodies), 2 * 3)
+        self.assertEqual((bodies[0]['startyear'], bodies[0]['endyear'], len(bodies[0]['seriesid'])), ('2001', '2010', 25))
+        self.assertEqual((bodies[-1]['startyear'], bodies[-1]['endyear'], len(bodies[-1]['seriesid'])), ('2021', '2024', 5))
+        registered = list(BLSApiClient(registrationKey='key', url=self.apiUrl).Requests(['S'], 2001, 2024))
+        self.assertEqual([body['endyear'] for body in registered], ['2020', '2024'])
+
+    def test_synthesised_reply_matches_canned_tables(self):
+        frame = BLSApiClient(registrationKey='key', url=self.apiUrl).Frame(['CES2000000011'], 2014, 2024)
+        self.assertEqual(len(frame), 10 * 12 + 3)
+        self.assertEqual(frame['value'].iloc[0], 1019.43)
+
+    def test_failed_request_raises(self):
+        self.server.RequestHandlerClass.apiReplies = [{'status': 'REQUEST_NOT_PROCESSED', 'message': ['Daily threshold'],
+                                                       'Results': {}}]
+        with self.assertRaises(RuntimeError):
+            BLSApiClient(registrationKey='', url=self.apiUrl).Frame(['CES2000000011'], 2024, 2024)
+
+
+if __name__ == '__main__':
+    unittest.main()
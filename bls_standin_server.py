@@ -0,0 +1,309 @@
+import argparse
+import calendar
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import openpyxl
+
+from series_table import ReadSeriesTable, WriteSeriesTable
+
+# Local stand-in for data.bls.gov/pdq/SurveyOutputServlet and the api.bls.gov JSON timeseries endpoint,
+# serving the xlsx tables already under Data/data-bls-gov
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data', 'data-bls-gov')
+SERIES_FILE_PATTERN = re.compile(r'[_+](?P<series_id>[A-Z]{2,3}[0-9A-Z]+)\.xlsx$')
+
+
+def index_canned_tables(data_dir: str = DATA_DIR) -> dict:
+    """
+    Walks data_dir and maps every series id found in a '{Industry}_{SeriesId}.xlsx' or
+    '{Industry}+{SeriesId}.xlsx' file name to the path of that file.
+
+    Parameters:
+    data_dir (str): The directory holding previously downloaded BLS tables.
+
+    Returns:
+    dict: A mapping of series id to xlsx file path.
+    """
+    tables = {}
+    for root, _, files in os.walk(data_dir):
+        for file_name in sorted(files):
+            match = SERIES_FILE_PATTERN.search(file_name)
+            if match:
+                tables.setdefault(match.group('series_id'), os.path.join(root, file_name))
+    return tables
+
+
+def write_series_report(tables: dict) -> bytes:
+    """
+    Stacks several series on one sheet the way the servlet's multi-series report does: a 'Series Id:' line,
+    then the 'Year' header and the year rows, then a blank line before the next series.
+
+    Parameters:
+    tables (dict): A mapping of series id to the (header, rows) pair returned by ReadSeriesTable.
+
+    Returns:
+    bytes: The xlsx workbook.
+    """
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'BLS Data Series'
+    for series_id, (header, rows) in tables.items():
+        sheet.append(['Series Id:', series_id])
+        sheet.append(header)
+        for year in sorted(rows):
+            sheet.append([year] + rows[year])
+        sheet.append([])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def api_reply(tables: dict, body: dict) -> dict:
+    """
+    Builds the reply the BLS public API v2 would give for a timeseries request, from the canned tables.
+    Observations are listed newest first with comma-formatted string values, as the real API sends them.
+
+    Parameters:
+    tables (dict): A mapping of series id to xlsx path, as returned by index_canned_tables.
+    body (dict): The decoded JSON request with 'seriesid', 'startyear' and 'endyear'.
+
+    Returns:
+    dict: The JSON-ready reply.
+    """
+    first, last = int(body['startyear']), int(body['endyear'])
+    series = []
+    for series_id in body['seriesid']:
+        if series_id not in tables:
+            continue
+        header, rows = ReadSeriesTable(tables[series_id])
+        data = []
+        for year in sorted((year for year in rows if first <= year <= last), reverse=True):
+            for name, value in reversed(list(zip(header[1:], rows[year]))):
+                if value is not None:
+                    month = list(calendar.month_abbr).index(name)
+                    data.append({'year': str(year), 'period': f'M{month:02d}', 'periodName': calendar.month_name[month],
+                                 'value': f'{value:,}', 'footnotes': [{}]})
+        series.append({'seriesID': series_id, 'data': data})
+    return {'status': 'REQUEST_SUCCEEDED', 'responseTime': 0, 'message': [], 'Results': {'series': series}}
+
+
+def catalog_html(tables: dict, series_ids: list) -> str:
+    """
+    Renders the servlet's catalog page for series_ids: one <table class="catalog"> per known series, labelled
+    with the metadata lines of report-style exports, or the industry in the file name for plain tables.
+
+    Parameters:
+    tables (dict): A mapping of series id to xlsx path, as returned by index_canned_tables.
+    series_ids (list): The series ids that were asked for.
+
+    Returns:
+    str: The HTML page.
+    """
+    parts = ['<html><body><h1>Databases, Tables &amp; Calculators by Subject</h1>']
+    for series_id in series_ids:
+        if series_id not in tables:
+            continue
+        metadata = {'Series Id:': series_id,
+                    'Industry:': re.split(r'[_+]', os.path.basename(tables[series_id]))[0]}
+        workbook = openpyxl.load_workbook(tables[series_id], read_only=True)
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+        for values in sheet.iter_rows(max_row=15, values_only=True):
+            if values and isinstance(values[0], str) and values[0].endswith(':') and len(values) > 1:
+                metadata[values[0]] = values[1]
+        workbook.close()
+        rows = ''.join(f'<tr><th>{key}</th><td>{value}</td></tr>' for key, value in metadata.items())
+        parts.append(f'<table class="catalog">{rows}</table>')
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Filled in per server by start_standin_server
+    tables = {}
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    throttle_rate = 0.0
+    retry_after = None
+    random = None
+    requests = 0
+    errors = 0
+    throttled = 0
+    # Requests being answered right now, and the most there have been at once
+    in_flight = 0
+    peak_in_flight = 0
+    lock = threading.Lock()
+    # Recorded API replies to hand out, oldest first, before falling back to api_reply
+    apiReplies = []
+
+    def do_POST(self):
+        with self.lock:
+            type(self).in_flight += 1
+            type(self).peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            self.answer_post()
+        finally:
+            with self.lock:
+                type(self).in_flight -= 1
+
+    def answer_post(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.inject_fault():
+            return
+        if self.path.startswith('/publicAPI/'):
+            self.answer_api(json.loads(body))
+            return
+        form = parse_qs(body.decode(), keep_blank_values=True)
+        series_ids = [series_id for series_id in form.get('series_id', []) if series_id in self.tables]
+        if 'htmlpage' in form:
+            self.send_content(catalog_html(self.tables, form.get('series_id', [])).encode(), 'text/html')
+            return
+        if not series_ids:
+            self.send_error(404, 'Unknown series')
+            return
+        first, last = int(form.get('from_year', ['0'])[0]), int(form.get('to_year', ['9999'])[0])
+        if len(form['series_id']) == 1:
+            with open(self.tables[series_ids[0]], 'rb') as f:
+                content = f.read()
+            if 'from_year' in form:
+                # Answer a specific-years request with only those rows, like the real servlet
+                header, rows = ReadSeriesTable(content)
+                content = WriteSeriesTable(header, {year: values for year, values in rows.items() if first <= year <= last})
+        else:
+            tables = {}
+            for series_id in series_ids:
+                header, rows = ReadSeriesTable(self.tables[series_id])
+                tables[series_id] = (header, {year: values for year, values in rows.items() if first <= year <= last})
+            content = write_series_report(tables)
+        self.send_content(content, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+    def inject_fault(self) -> bool:
+        """
+        Counts the request, sleeps the configured latency and, at the configured rates, answers with a
+        500 or with a 429 carrying Retry-After instead of the real response.
+
+        Returns:
+        bool: True if a fault was sent and the request is finished.
+        """
+        with self.lock:
+            type(self).requests += 1
+            draw = self.random.random()
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            if draw < self.throttle_rate:
+                type(self).throttled += 1
+            elif draw < self.throttle_rate + self.error_rate:
+                type(self).errors += 1
+        if delay:
+            time.sleep(delay)
+        if draw < self.throttle_rate:
+            self.send_response(429)
+            if self.retry_after is not None:
+                self.send_header('Retry-After', str(self.retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return True
+        if draw < self.throttle_rate + self.error_rate:
+            self.send_error(500, 'Injected failure')
+            return True
+        return False
+
+    def answer_api(self, body):
+        with self.lock:
+            reply = self.apiReplies.pop(0) if self.apiReplies else None
+        content = json.dumps(reply if reply is not None else api_reply(self.tables, body)).encode()
+        self.send_content(content, 'application/json')
+
+    def send_content(self, content: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_standin_server(latency: float = 0.0, port: int = 0, data_dir: str = DATA_DIR, jitter: float = 0.0,
+                         error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: float = None,
+                         seed: int = 0):
+    """
+    Starts the stand-in server on a background thread.
+
+    Parameters:
+    latency (float): Seconds each request sleeps before answering, to mimic the round trip to data.bls.gov.
+    port (int): The port to listen on; 0 picks a free one.
+    data_dir (str): The directory the canned xlsx tables are served from.
+    jitter (float): Up to this many extra seconds of uniformly random latency per request.
+    error_rate (float): Fraction of requests answered with HTTP 500.
+    throttle_rate (float): Fraction of requests answered with HTTP 429.
+    retry_after (float): Retry-After seconds sent with each 429, or None to send no header.
+    seed (int): Seed for the fault and jitter draws, so load tests are repeatable.
+
+    Returns:
+    tuple: The running server (call shutdown() when done) and the URL to pass to DownloadTable.
+           The handler class, server.RequestHandlerClass, counts requests, errors and throttled responses, and
+           records peak_in_flight, the most requests it was answering at once.
+    """
+    handler = type('Handler', (StandInHandler,), {
+        'tables': index_canned_tables(data_dir), 'latency': latency, 'jitter': jitter, 'error_rate': error_rate,
+        'throttle_rate': throttle_rate, 'retry_after': retry_after, 'random': random.Random(seed),
+        'requests': 0, 'errors': 0, 'throttled': 0, 'in_flight': 0, 'peak_in_flight': 0, 'lock': threading.Lock(),
+        'apiReplies': []})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/pdq/SurveyOutputServlet'
+    return server, url
+
+
+def stop_standin_server(server):
+    """Stops a server started by start_standin_server and closes its socket."""
+    server.shutdown()
+    server.server_close()
+
+
+class StandInServerMixin:
+    """
+    setUp for unittest.TestCase subclasses that talk to the stand-in server: starts one with server_options as
+    self.server, serving at self.url, and stops it when the test ends. server_options = None starts none, for
+    tests that call start_server themselves. Subclasses with their own setUp call super().setUp() first.
+    """
+    server_options = {}
+
+    def setUp(self):
+        super().setUp()
+        if self.server_options is not None:
+            self.server, self.url = self.start_server(**self.server_options)
+
+    def start_server(self, **options):
+        """Starts another stand-in server with start_standin_server's options, stopped when the test ends."""
+        server, url = start_standin_server(**options)
+        self.addCleanup(stop_standin_server, server)
+        return server, url
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline stand-in for data.bls.gov and api.bls.gov')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=None)
+    args = parser.parse_args()
+    server, url = start_standin_server(args.latency, args.port, jitter=args.jitter, error_rate=args.error_rate,
+                                       throttle_rate=args.throttle_rate, retry_after=args.retry_after)
+    print('Serving', len(server.RequestHandlerClass.tables), 'series at', url)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
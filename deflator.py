@@ -0,0 +1,232 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import periods
+from periods import MONTHS
+
+# CPI for All Urban Consumers (CPI-U), U.S. city average, all items, not seasonally adjusted, 1982-84=100
+CPI_SERIES = 'CUUR0000SA0'
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data', 'data-bls-gov')
+# Where the notebooks keep their copy of the CPI table; the repository does not ship one, so load_cpi(CPI_FILE)
+# downloads it on first use
+CPI_FILE = os.path.join(DATA_DIR, f'CPI-U_{CPI_SERIES}.csv')
+
+
+def cpi_from_frame(df: pd.DataFrame) -> pd.Series:
+    """
+    Turns a CPI table into a monthly Series. Accepts the Year x Jan..Dec layout of the BLS xlsx tables and of the
+    *_summary.csv files, or the long (year, period, value) frame of bls_api.BLSApiClient.Frame with 'M01'..'M12'
+    periods.
+
+    Parameters:
+    df (pd.DataFrame): The CPI table in either layout.
+
+    Returns:
+    pd.Series: The index levels on a monthly PeriodIndex, sorted, without missing months.
+
+    DocTest:
+    >>> wide = pd.DataFrame({'Year': [2023], 'Jan': [300.0], 'Feb': [301.5], 'Mar': [None]})
+    >>> cpi_from_frame(wide)
+    2023-01    300.0
+    2023-02    301.5
+    Freq: M, Name: CPI, dtype: float64
+    """
+    if 'period' in df.columns:
+        months = periods.parse_month(df['period'])
+        # 'M13' annual averages are not months and are left out
+        df, months = df[months > 0], months[months > 0]
+        years, values = df['year'].astype(int).to_numpy(), df['value'].to_numpy(dtype=np.float64)
+        # Period ordinals of monthly frequency count months since 1970-01
+        ordinals = ((years - 1970) * 12 + months - 1).astype(np.int64)
+    else:
+        _, ordinals, values = periods.unpack_monthly_table(df)
+        ordinals, values = ordinals.ravel(), values.ravel()
+    index = pd.PeriodIndex(pd.arrays.PeriodArray(ordinals, dtype=pd.PeriodDtype('M')))
+    cpi = pd.Series(values, index=index, name='CPI').dropna()
+    return cpi[~cpi.index.duplicated(keep='last')].sort_index()
+
+
+def load_cpi(path: str, series_id: str = CPI_SERIES, start_year: int = 2000, end_year: int = None,
+             client=None) -> pd.Series:
+    """
+    Loads the monthly CPI from a local .csv or .xlsx table, or, when path does not exist, downloads it with the BLS
+    API client and saves it to path as a long csv for the next run.
+
+    Parameters:
+    path (str): The local CPI table, e.g. CPI_FILE. There is no default, so that reaching the live API and writing
+                the file is always the caller's choice.
+    series_id (str): The BLS series to download when path is missing.
+    start_year (int): The first year to download.
+    end_year (int): The last year to download; None means the current year.
+    client (bls_api.BLSApiClient): The client used for the download; None creates one.
+
+    Returns:
+    pd.Series: The CPI on a monthly PeriodIndex.
+    """
+    if os.path.exists(path):
+        if path.endswith('.xlsx'):
+            from utils import read_xlsx_table
+            return cpi_from_frame(read_xlsx_table(path))
+        return cpi_from_frame(pd.read_csv(path))
+    if client is None:
+        from bls_api import BLSApiClient
+        client = BLSApiClient()
+    frame = client.Frame([series_id], start_year, end_year)
+    cpi = cpi_from_frame(frame)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    frame[['year', 'period', 'value']].to_csv(path, index=False)
+    return cpi
+
+
+def base_level(cpi: pd.Series, base=None) -> float:
+    """
+    The CPI level real values are expressed in.
+
+    Parameters:
+    cpi (pd.Series): The monthly CPI.
+    base: None for the latest month, a year (int) for its average, a month ('2020-01' or a Period), or a
+          (first, last) pair of months for the average over that range.
+
+    Returns:
+    float: The base level.
+
+    DocTest:
+    >>> cpi = pd.Series([100.0, 102.0, 104.0, 110.0], index=pd.period_range('2019-11', periods=4, freq='M'))
+    >>> base_level(cpi), base_level(cpi, 2019), base_level(cpi, '2020-01'), base_level(cpi, ('2019-12', '2020-02'))
+    (110.0, 101.0, 104.0, 105.33333333333333)
+    """
+    if base is None:
+        return float(cpi.iloc[-1])
+    if isinstance(base, (int, np.integer)):
+        window = cpi[cpi.index.year == base]
+    elif isinstance(base, tuple):
+        first, last = base
+        window = cpi[pd.Period(first, 'M'):pd.Period(last, 'M')]
+    else:
+        window = cpi[[pd.Period(base, 'M')]] if pd.Period(base, 'M') in cpi.index else cpi.iloc[:0]
+    if window.empty:
+        raise ValueError(f'The CPI has no observations for base period {base!r}')
+    return float(window.mean())
+
+
+def deflate(df: pd.DataFrame, cpi: pd.Series, base=None, columns=None, year: str = 'Year', period: str = None,
+            suffix: str = '') -> pd.DataFrame:
+    """
+    Converts nominal values to real values at base-period prices, value * base / CPI of the value's month, for
+    every series and month of df in one array operation. The CPI is laid out as a year x month matrix once and
+    indexed by each row's year, so no Python code runs per row.
+
+    Two layouts are accepted: the wide BLS table with a Year column and Jan..Dec columns (the default), or a long
+    frame with a year column and a period column holding BLS 'M01'..'M12' codes, monthly Periods or dates.
+
+    Parameters:
+    df (pd.DataFrame): The nominal series; any other columns (industry, series id, ...) are kept.
+    cpi (pd.Series): The monthly CPI, as returned by load_cpi.
+    base: The base period, as for base_level; None means the latest CPI month.
+    columns (list): The columns to deflate; defaults to the month columns present (wide) or 'value' (long).
+    year (str): The year column.
+    period (str): The period column of a long frame; None means df is wide.
+    suffix (str): Appended to the names of the deflated columns; '' replaces the nominal values.
+
+    Returns:
+    pd.DataFrame: A copy of df with the deflated columns; months without a CPI observation are NaN.
+
+    DocTest:
+    >>> cpi = pd.Series([100.0, 110.0, 121.0], index=pd.period_range('2022-12', periods=3, freq='M'))
+    >>> wages = pd.DataFrame({'industry': ['Mining', 'Retail'], 'Year': [2023, 2023], 'Jan': [1100.0, 550.0],
+    ...                       'Feb': [1210.0, 605.0]})
+    >>> deflate(wages, cpi, base='2022-12')
+      industry  Year     Jan     Feb
+    0   Mining  2023  1000.0  1000.0
+    1   Retail  2023   500.0   500.0
+    >>> long = pd.DataFrame({'year': [2022, 2023], 'period': ['M12', 'M02'], 'value': [50.0, 60.5]})
+    >>> deflate(long, cpi, base=2023, year='year', period='period', suffix='_real')['value_real'].tolist()
+    [57.75, 57.75]
+    """
+    level = base_level(cpi, base)
+    first = int(cpi.index.year.min())
+    # Year x month CPI matrix from January of the first CPI year; absent months are NaN
+    months = pd.period_range(f'{first}-01', f'{int(cpi.index.year.max())}-12', freq='M')
+    matrix = cpi.reindex(months).to_numpy().reshape(-1, 12)
+    matrix = np.vstack([matrix, np.full((1, 12), np.nan)])
+    years = df[year].to_numpy(dtype=np.int64) - first
+    # Rows outside the CPI's years read the trailing all-NaN row
+    years = np.where((years >= 0) & (years < len(matrix) - 1), years, len(matrix) - 1)
+
+    if period is None:
+        columns = periods.month_columns(df.columns) if columns is None else list(columns)
+        divisor = matrix[years[:, None], [MONTHS.index(column) for column in columns]]
+    else:
+        columns = ['value'] if columns is None else list(columns)
+        values = df[period]
+        if isinstance(values.dtype, pd.PeriodDtype) or pd.api.types.is_datetime64_any_dtype(values):
+            month = values.dt.month.to_numpy()
+        else:
+            month = periods.parse_month(values)
+            # Labels that are not months read the trailing all-NaN row
+            years = np.where(month > 0, years, len(matrix) - 1)
+        divisor = matrix[years, month - 1][:, None]
+
+    real = df[columns].to_numpy(dtype=np.float64) * level / divisor
+    result = df.copy()
+    result[[f'{column}{suffix}' for column in columns]] = real
+    return result
+
+
+# Unit tests compare with the row-wise apply the industry notebook used and load the CPI through the API stand-in
+
+class TestDeflate(unittest.TestCase):
+    def setUp(self):
+        months = pd.period_range('2014-01', '2023-12', freq='M')
+        self.cpi = pd.Series(np.linspace(233.0, 307.0, len(months)), index=months, name='CPI')
+        self.wages = pd.read_csv(os.path.join(DATA_DIR, 'Average_Weekly_Earnings_summary.csv'))
+        self.wages = self.wages[self.wages['Year'] <= 2023]
+
+    def test_matches_row_wise_deflation(self):
+        real = deflate(self.wages, self.cpi, base=2023)
+        level = self.cpi[self.cpi.index.year == 2023].mean()
+        expected = self.wages.apply(lambda row: pd.Series(
+            [row[month] * level / self.cpi[pd.Period(f"{row['Year']}-{i + 1:02d}", 'M')] if row[month] == row[month]
+             else np.nan for i, month in enumerate(MONTHS)], index=MONTHS), axis=1)
+        pd.testing.assert_frame_equal(real[MONTHS], expected)
+        self.assertTrue(real['industry'].equals(self.wages['industry']))
+
+    def test_long_layout_agrees_with_wide(self):
+        long = self.wages.melt(id_vars=['Year', 'CES'], value_vars=MONTHS, var_name='month')
+        long['period'] = 'M' + (long['month'].map(MONTHS.index) + 1).astype(str).str.zfill(2)
+        real = deflate(long, self.cpi, base='2020-01', period='period', suffix='_real')
+        wide = deflate(self.wages, self.cpi, base='2020-01').melt(id_vars=['Year', 'CES'], value_vars=MONTHS)
+        np.testing.assert_allclose(real['value_real'], wide['value'])
+
+    def test_missing_cpi_months_and_base(self):
+        real = deflate(pd.DataFrame({'Year': [2013, 2023], 'Jan': [1.0, 1.0]}), self.cpi)
+        self.assertTrue(np.isnan(real['Jan'][0]))
+        self.assertAlmostEqual(real['Jan'][1], 307.0 / self.cpi['2023-01'])
+        with self.assertRaises(ValueError):
+            deflate(self.wages, self.cpi, base=1990)
+
+    def test_load_cpi_downloads_once_and_reads_the_saved_file(self):
+        from bls_api import BLSApiClient
+        from bls_standin_server import start_standin_server, stop_standin_server
+        server, url = start_standin_server()
+        self.addCleanup(stop_standin_server, server)
+        folder = tempfile.mkdtemp()
+        try:
+            data = [{'year': '2024', 'period': f'M{month:02d}', 'value': f'{300 + month:.3f}', 'footnotes': [{}]}
+                    for month in (2, 1)] + [{'year': '2023', 'period': 'M13', 'value': '299.0', 'footnotes': [{}]}]
+            server.RequestHandlerClass.apiReplies = [{'status': 'REQUEST_SUCCEEDED', 'message': [], 'Results': {
+                'series': [{'seriesID': CPI_SERIES, 'data': data}]}}]
+            client = BLSApiClient(registrationKey='', url=url.replace('/pdq/SurveyOutputServlet',
+                                                                      '/publicAPI/v2/timeseries/data/'))
+            path = os.path.join(folder, 'cpi.csv')
+            downloaded = load_cpi(path, start_year=2024, end_year=2024, client=client)
+            self.assertEqual(downloaded.tolist(), [301.0, 302.0])
+            pd.testing.assert_series_equal(load_cpi(path, client=client), downloaded)
+            self.assertEqual(server.RequestHandlerClass.requests, 1)
+        finally:
+            shutil.rmtree(folder)
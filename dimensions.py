@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+# Every vocabulary registered by the loaders, by name
+REGISTRY = {}
+
+
+class Dimension:
+    """
+    A named vocabulary (countries, education levels, regions, ...) with stable integer codes and the pandas
+    CategoricalDtype that carries them. Encoding parses and normalises each distinct string once and broadcasts
+    the result, so loaders can hand out small integer-coded categoricals instead of object columns.
+
+    Registered values keep their code for the life of the process. An open dimension appends values it has not
+    seen at the end, so earlier codes never move; a closed one turns them into NaN. The codes an open dimension
+    appends depend on the order values were encoded in each process, so they are not stable across worker
+    processes: exchange labels (or categoricals, which carry theirs), not raw codes.
+    """
+
+    def __init__(self, name: str, values, ordered: bool = False, open: bool = False):
+        self.name = name
+        self.values = list(dict.fromkeys(values))
+        self.ordered = ordered
+        self.open = open
+        self.codes = {value: code for code, value in enumerate(self.values)}
+        self.dtype = pd.CategoricalDtype(self.values, ordered=ordered)
+
+    def __repr__(self):
+        return f"Dimension({self.name!r}, {len(self.values)} values{', open' if self.open else ''})"
+
+    def extend(self, values) -> 'Dimension':
+        """
+        Appends the values not yet known, keeping every existing code. The dtype is rebuilt, so series encoded
+        before the extension keep their older, shorter dtype.
+
+        Parameters:
+        values (iterable): Candidate values.
+
+        Returns:
+        Dimension: self, for chaining.
+        """
+        new = [value for value in dict.fromkeys(values) if value not in self.codes]
+        if new:
+            for value in new:
+                self.codes[value] = len(self.values)
+                self.values.append(value)
+            self.dtype = pd.CategoricalDtype(self.values, ordered=self.ordered)
+        return self
+
+    def encode(self, values, strict: bool = False) -> pd.Series:
+        """
+        Converts values to this dimension's categorical dtype. Strings are stripped of surrounding whitespace,
+        once per distinct value, before lookup.
+
+        Parameters:
+        values (array-like or pd.Series): The labels to encode; a Series keeps its index and name.
+        strict (bool): Whether a label this closed dimension does not know is rejected instead of becoming NaN.
+
+        Returns:
+        pd.Series: A categorical Series; unknown labels are NaN unless the dimension is open (or raise a
+                   ValueError when strict).
+
+        DocTest:
+        >>> level = Dimension('level', ['Low', 'High'], ordered=True)
+        >>> encoded = level.encode(['High ', 'Low', 'Medium', None])
+        >>> encoded.cat.codes.tolist(), encoded.isna().tolist()
+        ([1, 0, -1, -1], [False, False, True, True])
+        >>> level.encode(['High', 'Medium'], strict=True)
+        Traceback (most recent call last):
+        ...
+        ValueError: Unknown level labels ['Medium']
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(values)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        labels = [value.strip() if isinstance(value, str) else value for value in uniques]
+        if self.open:
+            self.extend(label for label in labels if not pd.isna(label))
+        if strict:
+            unknown = [label for label in labels if not pd.isna(label) and label not in self.codes]
+            if unknown:
+                raise ValueError(f'Unknown {self.name} labels {unknown}')
+        lookup = np.array([self.codes.get(label, -1) for label in labels] + [-1], dtype=np.int64)
+        # codes of -1 (missing values) index the trailing -1 of lookup
+        categorical = pd.Categorical.from_codes(lookup[codes], dtype=self.dtype)
+        return pd.Series(categorical, index=series.index, name=series.name)
+
+    def recode(self, values: pd.Series, mapping: dict, target: 'Dimension') -> pd.Series:
+        """
+        Maps a Series encoded in this dimension onto another dimension through a label mapping, by translating
+        the integer codes with one array lookup instead of mapping every string.
+
+        Parameters:
+        values (pd.Series): A Series encoded with this dimension.
+        mapping (dict): Maps labels of this dimension to labels of target; unmapped labels become NaN.
+        target (Dimension): The dimension of the result.
+
+        Returns:
+        pd.Series: A categorical Series in target's dtype.
+        """
+        values = self.encode(values)
+        if target.open:
+            target.extend(mapping.values())
+        lookup = np.array([target.codes.get(mapping.get(label), -1) for label in values.cat.categories] + [-1],
+                          dtype=np.int64)
+        categorical = pd.Categorical.from_codes(lookup[values.cat.codes.to_numpy()], dtype=target.dtype)
+        return pd.Series(categorical, index=values.index, name=values.name)
+
+
+def register(name: str, values, ordered: bool = False, open: bool = False) -> Dimension:
+    """
+    Registers a vocabulary under name, or returns the registered one extended with any new values, so that a
+    module imported twice (e.g. by worker processes or doctest collection) shares one set of codes.
+
+    Parameters:
+    name (str): The dimension name, e.g. 'country'.
+    values (iterable): The known labels, in code order.
+    ordered (bool): Whether the categorical dtype is ordered.
+    open (bool): Whether labels not registered are appended at encode time instead of becoming NaN.
+
+    Returns:
+    Dimension: The registered dimension.
+    """
+    if name in REGISTRY:
+        return REGISTRY[name].extend(values)
+    REGISTRY[name] = Dimension(name, values, ordered=ordered, open=open)
+    return REGISTRY[name]
+
+
+def get(name: str) -> Dimension:
+    """
+    Looks a registered dimension up by name.
+
+    Parameters:
+    name (str): The dimension name.
+
+    Returns:
+    Dimension: The registered dimension.
+    """
+    return REGISTRY[name]
@@ -0,0 +1,258 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import tempfile
+import time
+import unittest
+
+import BLS_scraper_with_tests as scraper
+from bls_standin_server import StandInServerMixin
+
+# A claimed job whose worker has not reported back within this many seconds is handed to another worker
+LEASE_SECONDS = 600
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    series_id   TEXT PRIMARY KEY,
+    industry    TEXT NOT NULL,
+    folder      TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    worker      TEXT,
+    claimed_at  REAL,
+    lease_until REAL,
+    finished_at REAL,
+    bytes       INTEGER,
+    latency     REAL,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_until);
+CREATE TABLE IF NOT EXISTS runs (
+    id         INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL
+);
+'''
+
+
+# Durable queue of series downloads in one SQLite file. Every state change is its own transaction, so a crashed
+# run keeps what it finished and any number of worker processes, on one machine or several sharing the file,
+# can claim jobs without fetching a series twice
+class DownloadQueue:
+    def __init__(self, path = 'download_queue.sqlite'):
+        self.path = path
+        with self.Connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def Connect(self):
+        # isolation_level=None leaves transactions to the explicit BEGIN IMMEDIATE below
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None)
+
+    # A connection closed on exit; `with sqlite3.connect()` alone only ends the transaction and leaks the handle
+    def Connection(self):
+        return contextlib.closing(self.Connect())
+
+    # Add (Industry, SeriesId) jobs. While a run has pending or running jobs, queued series keep their state, so
+    # re-running main() after a crash resumes it; once a run is over, enqueueing starts the next one and puts
+    # every finished job back in line
+    def Enqueue(self, folder, index):
+        with self.Connection() as connection:
+            try:
+                connection.execute('BEGIN IMMEDIATE')
+                unfinished = connection.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')").fetchone()[0]
+                if not unfinished:
+                    connection.execute('INSERT INTO runs (started_at) VALUES (?)', (time.time(),))
+                    connection.execute("UPDATE jobs SET status = 'pending', error = NULL, worker = NULL, "
+                                       "lease_until = NULL WHERE status IN ('done', 'failed')")
+                connection.executemany('INSERT OR IGNORE INTO jobs (series_id, industry, folder) VALUES (?, ?, ?)',
+                                       [(SeriesId, Industry, folder) for Industry, SeriesId in index])
+                connection.execute('COMMIT')
+            except BaseException:
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                raise
+
+    # Put failed jobs back in line
+    def Retry(self):
+        with self.Connection() as connection:
+            connection.execute("UPDATE jobs SET status = 'pending', error = NULL WHERE status = 'failed'")
+
+    # Atomically take up to n pending jobs, or running jobs whose lease expired because their worker died
+    def Claim(self, worker, n = 1, lease = LEASE_SECONDS):
+        with self.Connection() as connection:
+            try:
+                connection.execute('BEGIN IMMEDIATE')
+                now = time.time()
+                jobs = connection.execute(
+                    "SELECT series_id, industry, folder FROM jobs WHERE status = 'pending' "
+                    "OR (status = 'running' AND lease_until < ?) ORDER BY rowid LIMIT ?", (now, n)).fetchall()
+                connection.executemany(
+                    "UPDATE jobs SET status = 'running', worker = ?, claimed_at = ?, lease_until = ?, "
+                    "attempts = attempts + 1 WHERE series_id = ?", [(worker, now, now + lease, job[0]) for job in jobs])
+                connection.execute('COMMIT')
+            except BaseException:
+                # BEGIN IMMEDIATE itself may have failed (database is locked), leaving nothing to roll back
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                raise
+        return jobs
+
+    # Record the metrics dict DownloadTable returned for a claimed job
+    def Complete(self, result, worker):
+        status = 'failed' if result['status'] == 'failed' else 'done'
+        with self.Connection() as connection:
+            connection.execute(
+                'UPDATE jobs SET status = ?, finished_at = ?, bytes = ?, latency = ?, error = ?, lease_until = NULL '
+                'WHERE series_id = ? AND worker = ?',
+                (status, time.time(), result['bytes'], result['latency'], result['error'], result['SeriesId'], worker))
+
+    # Job counts by state plus throughput of the jobs the current run finished
+    def Status(self):
+        with self.Connection() as connection:
+            counts = dict(connection.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+            started = connection.execute('SELECT MAX(started_at) FROM runs').fetchone()[0] or 0.0
+            first, last, finished, transferred = connection.execute(
+                "SELECT MIN(claimed_at), MAX(finished_at), COUNT(*), SUM(bytes) FROM jobs "
+                "WHERE status = 'done' AND claimed_at >= ?", (started,)).fetchone()
+            workers = connection.execute("SELECT COUNT(DISTINCT worker) FROM jobs WHERE status = 'running'").fetchone()[0]
+        elapsed = (last - first) if finished else 0.0
+        status = {state: counts.get(state, 0) for state in ('pending', 'running', 'done', 'failed')}
+        status.update(total=sum(counts.values()), active_workers=workers, bytes=transferred or 0,
+                      series_per_second=round(finished / elapsed, 2) if elapsed > 0 else None)
+        return status
+
+
+# Claim, download and complete jobs one at a time until the queue has nothing left to hand out
+# With incremental=True jobs go through RefreshTable against {folder}/manifest.json, so a series whose file is
+# already there is brought up to date instead of skipped
+def RunWorker(path, worker = None, maxRequestsPerSecond = None, maxRetryNum = 5, url = scraper.BLS_URL,
+              lease = LEASE_SECONDS, baseDelay = 1.0, incremental = False, maxAge = 86400):
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+    queue = DownloadQueue(path)
+    rateLimiter = scraper.HostRateLimiter(maxRequestsPerSecond)
+    manifests = {}
+    done = 0
+    with scraper.CreateSession(1) as session:
+        while True:
+            jobs = queue.Claim(worker, 1, lease)
+            if not jobs:
+                return done
+            for SeriesId, Industry, folder in jobs:
+                os.makedirs(folder, exist_ok=True)
+                if incremental:
+                    if folder not in manifests:
+                        manifests[folder] = scraper.Manifest(os.path.join(folder, 'manifest.json'))
+                    result = scraper.RefreshTable(folder, Industry, SeriesId, manifests[folder], maxRetryNum,
+                                                  session=session, url=url, rateLimiter=rateLimiter,
+                                                  baseDelay=baseDelay, maxAge=maxAge)
+                else:
+                    result = scraper.DownloadTable(folder, Industry, SeriesId, maxRetryNum, session=session, url=url,
+                                                   rateLimiter=rateLimiter, baseDelay=baseDelay)
+                queue.Complete(result, worker)
+                done += 1
+
+
+# Run RunWorker in `processes` worker processes; the request budget is split evenly between them
+def RunWorkers(path, processes = 4, maxRequestsPerSecond = None, **options):
+    perProcess = maxRequestsPerSecond / processes if maxRequestsPerSecond else None
+    with multiprocessing.Pool(processes) as pool:
+        handles = [pool.apply_async(RunWorker, (path,), dict(options, maxRequestsPerSecond=perProcess))
+                   for _ in range(processes)]
+        return sum(handle.get() for handle in handles)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description='Resumable BLS download queue')
+    parser.add_argument('command', choices=['status', 'work', 'retry'])
+    parser.add_argument('--queue', default='download_queue.sqlite')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=4, help='requests per second shared by all processes')
+    args = parser.parse_args()
+    queue = DownloadQueue(args.queue)
+    if args.command == 'retry':
+        queue.Retry()
+    elif args.command == 'work':
+        RunWorkers(args.queue, args.processes, args.rate)
+    print(queue.Status())
+
+
+if __name__ == '__main__':
+    cli()
+
+
+# Unit tests run real worker processes against the local stand-in server
+
+class TestDownloadQueue(StandInServerMixin, unittest.TestCase):
+    server_options = {'latency': 0.02}
+
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.mkdtemp()
+        self.queue = DownloadQueue(os.path.join(self.folder, 'queue.sqlite'))
+        self.index = [('Industry', SeriesId) for SeriesId in sorted(self.server.RequestHandlerClass.tables)[:24]]
+        self.output = os.path.join(self.folder, 'tables')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_workers_share_the_queue_without_double_fetching(self):
+        self.queue.Enqueue(self.output, self.index)
+        self.queue.Enqueue(self.output, self.index)
+        self.assertEqual(RunWorkers(self.queue.path, processes=3, url=self.url), 24)
+        self.assertEqual(self.server.RequestHandlerClass.requests, 24)
+        self.assertEqual(len(os.listdir(self.output)), 24)
+        status = self.queue.Status()
+        self.assertEqual((status['done'], status['pending'], status['running']), (24, 0, 0))
+        self.assertGreater(status['series_per_second'], 0)
+
+    def test_expired_leases_are_resumed(self):
+        self.queue.Enqueue(self.output, self.index[:4])
+        alive = self.queue.Claim('slow-worker', n=1, lease=3600)
+        crashed = self.queue.Claim('crashed-worker', n=2, lease=0)
+        self.assertEqual(self.queue.Status()['running'], 3)
+        self.assertEqual(RunWorker(self.queue.path, 'survivor', url=self.url), 3)
+        resumed = [job[0] for job in crashed] + [self.index[3][1]]
+        self.assertEqual(sorted(os.listdir(self.output)), sorted(f'Industry_{SeriesId}.xlsx' for SeriesId in resumed))
+        self.assertEqual(self.queue.Status()['running'], 1)
+        self.assertEqual(alive[0][0], self.index[0][1])
+
+    def test_lock_timeouts_surface_unmasked(self):
+        self.queue.Enqueue(self.output, self.index[:1])
+        holder = sqlite3.connect(self.queue.path, isolation_level=None)
+        holder.execute('BEGIN IMMEDIATE')
+        try:
+            self.queue.Connect = lambda: sqlite3.connect(self.queue.path, timeout=0.05, isolation_level=None)
+            with self.assertRaisesRegex(sqlite3.OperationalError, 'locked'):
+                self.queue.Claim('worker')
+        finally:
+            holder.execute('ROLLBACK')
+            holder.close()
+        self.assertEqual(len(self.queue.Claim('worker')), 1)
+
+    def test_next_run_refreshes_finished_jobs(self):
+        self.queue.Enqueue(self.output, self.index[:4])
+        self.assertEqual(RunWorkers(self.queue.path, processes=2, url=self.url, incremental=True), 4)
+        with open(os.path.join(self.output, 'manifest.json')) as f:
+            self.assertEqual(len(json.load(f)), 4)
+        first = self.queue.Status()
+        self.queue.Enqueue(self.output, self.index[:5])
+        self.assertEqual((self.queue.Status()['pending'], self.queue.Status()['series_per_second']), (5, None))
+        requests = self.server.RequestHandlerClass.requests
+        self.assertEqual(RunWorker(self.queue.path, url=self.url, incremental=True, maxAge=0), 5)
+        self.assertEqual(self.server.RequestHandlerClass.requests - requests, 5)
+        second = self.queue.Status()
+        self.assertEqual((second['done'], second['pending']), (5, 0))
+        # The four stored series only requested their latest years
+        self.assertLess(second['bytes'], first['bytes'] * 5 / 4)
+
+    def test_failed_jobs_are_reported_and_retried(self):
+        self.queue.Enqueue(self.output, [('Nowhere', 'CES9999999999')])
+        RunWorker(self.queue.path, url=self.url, maxRetryNum=1)
+        self.assertEqual(self.queue.Status()['failed'], 1)
+        self.queue.Retry()
+        self.assertEqual(self.queue.Status()['pending'], 1)
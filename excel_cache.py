@@ -0,0 +1,376 @@
+import argparse
+import hashlib
+import functools
+import importlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sys
+import sysconfig
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import openpyxl
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+# Parsed Excel sheets are kept here as Arrow IPC (feather) files when pyarrow is installed, pickles otherwise
+CACHE_DIR = os.environ.get('EXCEL_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.excel_cache'))
+# Least recently read entries are evicted once the cache holds more than this many bytes
+MAX_CACHE_BYTES = int(os.environ.get('EXCEL_CACHE_MAX_BYTES', 512 * 1024 ** 2))
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+# Readers installed here are versioned by their packages rather than by their code
+LIBRARY_DIRS = tuple(os.path.realpath(sysconfig.get_paths()[name]) for name in ('stdlib', 'platstdlib', 'purelib',
+                                                                                  'platlib'))
+
+# The readers and arguments the loaders and notebooks use for the files under Data/, so prewarming fills the exact
+# entries they will look up. Keys are file or directory paths relative to the Data/ root and the closest one applies;
+# files not covered are cached as plain pd.read_excel reads
+PREWARM_READS = {
+    'USBLS': [('utils.read_xlsx_table', {'header_label': 'Year'})],
+    'Eurostat': [('utils.read_xlsx_table', {'header_label': 'TIME'})],
+    'StatsGovCN/unemployment_rate.xlsx': [('pandas.read_excel', {})],
+    'Political Party and Unemployment/College-labor-data.xlsx': [('pandas.read_excel', {'sheet_name': 'unemployed',
+                                                                                         'skiprows': 10})],
+    'european data/min wage hourly.xlsx': [('pandas.read_excel', {'skiprows': 5})],
+}
+
+
+def cache_key(path: str, reader: str = 'pandas.read_excel', **kwargs) -> str:
+    """
+    Builds the cache key of one read: the absolute path, modification time and size of the file, the reader's
+    name and code, and its arguments. Editing or replacing the file, or editing the reader, changes the key, so a
+    stale entry is never served.
+
+    Parameters:
+    path (str): The Excel file.
+    reader (str): The dotted name of the function that parses the file.
+    **kwargs: The arguments passed on to the reader.
+
+    Returns:
+    str: A '{path hash}-{version hash}-{reader hash}-{arguments hash}' name, so the entries of one version of a
+         file share a prefix. The reader hash is 8 digits of its name followed by 8 of its code.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    parts = [path, [stat.st_mtime_ns, stat.st_size]]
+    hashes = [hashlib.sha1(json.dumps(part, default=repr).encode()).hexdigest()[:16] for part in parts]
+    hashes.append(hashlib.sha1(reader.encode()).hexdigest()[:8] + reader_version(reader))
+    hashes.append(hashlib.sha1(json.dumps(sorted(kwargs.items()), default=repr).encode()).hexdigest()[:16])
+    return '-'.join(hashes)
+
+
+@functools.lru_cache(maxsize=None)
+def reader_version(reader: str) -> str:
+    """
+    8 hex digits of the source code of a project reader such as utils.read_xlsx_table. Library readers
+    (pandas.read_excel) are versioned by their package and hashed by name only, as are readers without retrievable
+    source.
+    """
+    path = getattr(importlib.import_module(reader.rsplit('.', 1)[0]), '__file__', None)
+    source = ''
+    if path is not None and not os.path.realpath(path).startswith(LIBRARY_DIRS):
+        try:
+            source = inspect.getsource(resolve_reader(reader))
+        except (OSError, TypeError):
+            pass
+    return hashlib.sha1(source.encode()).hexdigest()[:8]
+
+
+def read_excel(path: str, cache_dir: str = None, max_bytes: int = None, **kwargs) -> pd.DataFrame:
+    """
+    Drop-in replacement for pd.read_excel that parses each (file, arguments) pair once and serves later reads
+    from a columnar copy in the cache directory. Feather entries are memory-mapped on read.
+
+    Parameters:
+    path (str): The Excel file.
+    cache_dir (str): Where entries are stored; defaults to CACHE_DIR.
+    max_bytes (int): The cache size cap enforced after each new entry; defaults to MAX_CACHE_BYTES.
+    **kwargs: Arguments passed on to pd.read_excel. They are part of the cache key.
+
+    Returns:
+    pd.DataFrame: The same frame pd.read_excel(path, **kwargs) returns.
+    """
+    return cached_read('pandas.read_excel', path, cache_dir, max_bytes, **kwargs)
+
+
+def resolve_reader(reader: str):
+    module, name = reader.rsplit('.', 1)
+    return getattr(importlib.import_module(module), name)
+
+
+def cached_read(reader: str, path: str, cache_dir: str = None, max_bytes: int = None, **kwargs) -> pd.DataFrame:
+    """
+    Calls reader(path, **kwargs) once per version of the file and arguments, and serves later calls from the cache.
+    read_excel is this with pd.read_excel; loaders with their own Excel parsing cache through it the same way.
+
+    Parameters:
+    reader (str): The dotted name of a function taking the file path and keyword arguments, e.g. 'pandas.read_excel'.
+    path (str): The Excel file.
+    cache_dir (str): Where entries are stored; defaults to CACHE_DIR.
+    max_bytes (int): The cache size cap enforced after each new entry; defaults to MAX_CACHE_BYTES.
+    **kwargs: Arguments passed on to the reader. They are part of the cache key.
+
+    Returns:
+    pd.DataFrame: What the reader returns.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    key = cache_key(path, reader, **kwargs)
+    for extension in ('.feather', '.pkl'):
+        entry = os.path.join(cache_dir, key + extension)
+        if os.path.exists(entry):
+            try:
+                df = load_entry(entry)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                # A truncated or unreadable entry is discarded and rebuilt below
+                os.remove(entry)
+                break
+            # Reads bump the modification time, which is what eviction orders on
+            os.utime(entry)
+            return df
+    df = resolve_reader(reader)(path, **kwargs)
+    if isinstance(df, pd.DataFrame):
+        store_entry(cache_dir, key, df)
+        evict(cache_dir, max_bytes if max_bytes is not None else MAX_CACHE_BYTES)
+    return df
+
+
+def load_entry(entry: str) -> pd.DataFrame:
+    if entry.endswith('.feather'):
+        # The pandas metadata stored with the table restores the index and dtypes
+        return feather.read_table(entry, memory_map=True).to_pandas()
+    with open(entry, 'rb') as f:
+        return pickle.load(f)
+
+
+def store_entry(cache_dir: str, key: str, df: pd.DataFrame) -> str:
+    """
+    Writes df as the cache entry for key, atomically, and removes the entries of older versions of the same file
+    and those the same reader made before its code changed.
+    Frames feather cannot hold as-is (non-string column labels such as year numbers, or no pyarrow) are pickled.
+
+    Parameters:
+    cache_dir (str): The cache directory.
+    key (str): The cache_key of the read.
+    df (pd.DataFrame): The parsed sheet.
+
+    Returns:
+    str: The path of the new entry.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path_hash, version_hash, reader_hash, _ = key.split('-')
+    for name in os.listdir(cache_dir):
+        if name.startswith(f'{path_hash}-') and not name.endswith('.tmp'):
+            parts = name.split('.')[0].split('-')
+            if len(parts) != 4 or parts[1] != version_hash or \
+                    (parts[2][:8] == reader_hash[:8] and parts[2] != reader_hash):
+                os.remove(os.path.join(cache_dir, name))
+    fd, temp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    os.close(fd)
+    extension = '.pkl'
+    try:
+        if feather is not None and all(isinstance(column, str) for column in df.columns):
+            try:
+                # Uncompressed, so reads can memory-map the columns instead of decoding them
+                feather.write_feather(pa.Table.from_pandas(df), temp, compression='uncompressed')
+                extension = '.feather'
+            except (pa.ArrowException, ValueError, TypeError):
+                pass
+        if extension == '.pkl':
+            with open(temp, 'wb') as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        entry = os.path.join(cache_dir, key + extension)
+        os.replace(temp, entry)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return entry
+
+
+def evict(cache_dir: str, max_bytes: int) -> list:
+    """
+    Removes the least recently read entries until the cache holds at most max_bytes.
+
+    Parameters:
+    cache_dir (str): The cache directory.
+    max_bytes (int): The size cap.
+
+    Returns:
+    list: The file names that were evicted, oldest first.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(('.feather', '.pkl')):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime_ns, stat.st_size, name))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    evicted = []
+    for _, size, name in entries:
+        if total <= max_bytes:
+            break
+        os.remove(os.path.join(cache_dir, name))
+        total -= size
+        evicted.append(name)
+    return evicted
+
+
+def clear_cache(cache_dir: str = None):
+    """
+    Deletes every cache entry.
+
+    Parameters:
+    cache_dir (str): The cache directory; defaults to CACHE_DIR.
+    """
+    shutil.rmtree(cache_dir or CACHE_DIR, ignore_errors=True)
+
+
+def cache_stats(cache_dir: str = None) -> dict:
+    """
+    Summarises the cache directory.
+
+    Parameters:
+    cache_dir (str): The cache directory; defaults to CACHE_DIR.
+
+    Returns:
+    dict: Entry counts by format and the total size in bytes.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    names = os.listdir(cache_dir) if os.path.isdir(cache_dir) else []
+    return {'feather': sum(name.endswith('.feather') for name in names),
+            'pickle': sum(name.endswith('.pkl') for name in names),
+            'bytes': sum(os.path.getsize(os.path.join(cache_dir, name)) for name in names)}
+
+
+def prewarm(data_dir: str, cache_dir: str = None, max_bytes: int = None, reads: dict = None) -> int:
+    """
+    Parses every Excel file under data_dir into the cache, once per reader configuration in reads
+    (PREWARM_READS by default), so later loader runs never touch the xlsx parser.
+
+    Parameters:
+    data_dir (str): The root of the data tree, e.g. 'Data'.
+    cache_dir (str): The cache directory; defaults to CACHE_DIR.
+    max_bytes (int): The cache size cap; defaults to MAX_CACHE_BYTES.
+    reads (dict): Maps a file or directory path relative to data_dir to the list of (reader, arguments) pairs
+                  used for the files it covers; see cached_read.
+
+    Returns:
+    int: The number of (file, arguments) entries now cached.
+    """
+    reads = PREWARM_READS if reads is None else reads
+    cached = 0
+    for root, _, files in os.walk(data_dir):
+        for file_name in sorted(files):
+            if not file_name.lower().endswith(EXCEL_EXTENSIONS) or file_name.startswith('~$'):
+                continue
+            path = os.path.join(root, file_name)
+            relative = os.path.relpath(path, data_dir).replace(os.sep, '/')
+            while relative and relative not in reads:
+                relative = os.path.dirname(relative)
+            for reader, kwargs in reads.get(relative, [('pandas.read_excel', {})]):
+                cached_read(reader, path, cache_dir, max_bytes, **kwargs)
+                cached += 1
+    return cached
+
+
+def cli():
+    parser = argparse.ArgumentParser(description='Columnar cache of the Excel inputs under Data/')
+    parser.add_argument('command', choices=['prewarm', 'stats', 'clear'])
+    parser.add_argument('data_dir', nargs='?', default='Data')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--max-bytes', type=int, default=MAX_CACHE_BYTES)
+    args = parser.parse_args()
+    if args.command == 'prewarm':
+        print('Cached', prewarm(args.data_dir, args.cache_dir, args.max_bytes), 'reads')
+    elif args.command == 'clear':
+        clear_cache(args.cache_dir)
+    print(cache_stats(args.cache_dir))
+
+
+if __name__ == '__main__':
+    cli()
+
+
+# Unit tests for the cache
+
+class TestExcelCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.folder, 'cache')
+        self.path = os.path.join(self.folder, 'table.xlsx')
+        self.write_table(2.5)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_table(self, value):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['Notes'])
+        sheet.append(['Year', 'Jan', 'Feb'])
+        sheet.append([2023, value, 3.0])
+        workbook.save(self.path)
+
+    def test_second_read_is_served_from_cache(self):
+        first = read_excel(self.path, cache_dir=self.cache_dir, skiprows=1)
+        with patch('pandas.read_excel', side_effect=AssertionError('parsed twice')):
+            second = read_excel(self.path, cache_dir=self.cache_dir, skiprows=1)
+        pd.testing.assert_frame_equal(first, second)
+        pd.testing.assert_frame_equal(first, pd.read_excel(self.path, skiprows=1))
+        self.assertEqual(sum(cache_stats(self.cache_dir)[kind] for kind in ('feather', 'pickle')), 1)
+
+    def test_reader_arguments_are_part_of_the_key(self):
+        read_excel(self.path, cache_dir=self.cache_dir, skiprows=1)
+        raw = read_excel(self.path, cache_dir=self.cache_dir)
+        self.assertEqual(raw.columns[0], 'Notes')
+        self.assertEqual(sum(cache_stats(self.cache_dir)[kind] for kind in ('feather', 'pickle')), 2)
+
+    def test_changed_file_invalidates_its_entries(self):
+        read_excel(self.path, cache_dir=self.cache_dir, skiprows=1)
+        stat = os.stat(self.path)
+        self.write_table(9.5)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(read_excel(self.path, cache_dir=self.cache_dir, skiprows=1)['Jan'][0], 9.5)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_edited_readers_invalidate_their_entries(self):
+        sys.path.insert(0, self.folder)
+        try:
+            for version, skiprows in enumerate((1, 0)):
+                with open(os.path.join(self.folder, 'excel_cache_reader.py'), 'w') as f:
+                    f.write(f'import pandas as pd\n\n\ndef read(path):\n    return pd.read_excel(path, skiprows={skiprows})\n')
+                sys.modules.pop('excel_cache_reader', None)
+                reader_version.cache_clear()
+                df = cached_read('excel_cache_reader.read', self.path, self.cache_dir)
+                self.assertEqual(df.columns[0], ['Year', 'Notes'][version])
+                read_excel(self.path, cache_dir=self.cache_dir)
+            # The new reader's entry replaced the old one; the pandas.read_excel entry is kept
+            self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        finally:
+            sys.path.remove(self.folder)
+            sys.modules.pop('excel_cache_reader', None)
+            reader_version.cache_clear()
+
+    def test_least_recently_read_entries_are_evicted(self):
+        read_excel(self.path, cache_dir=self.cache_dir, skiprows=1)
+        entry, = os.listdir(self.cache_dir)
+        os.utime(os.path.join(self.cache_dir, entry), ns=(0, 0))
+        read_excel(self.path, cache_dir=self.cache_dir)
+        newest = os.path.getsize(os.path.join(self.cache_dir, sorted(set(os.listdir(self.cache_dir)) - {entry})[0]))
+        self.assertEqual(evict(self.cache_dir, newest), [entry])
+
+    def test_prewarm_uses_the_configured_reads(self):
+        self.assertEqual(prewarm(self.folder, self.cache_dir, reads={'table.xlsx': [('pandas.read_excel', {'skiprows': 1}),
+                                                                             ('pandas.read_excel', {})]}), 2)
+        with patch('pandas.read_excel', side_effect=AssertionError('not prewarmed')):
+            self.assertEqual(list(read_excel(self.path, cache_dir=self.cache_dir, skiprows=1).columns),
+                             ['Year', 'Jan', 'Feb'])
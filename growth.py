@@ -0,0 +1,389 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('pct', 'log', 'cagr')
+
+
+def sort_groups(df: pd.DataFrame, by=None, order=None) -> tuple:
+    """
+    Finds the permutation that lays the rows of df out group by group, each group in order, and the group number
+    of every row in that layout. Rows keep their original relative order within a group when order is None, as
+    groupby().transform does.
+
+    Parameters:
+    df (pd.DataFrame): The frame to lay out.
+    by (str or list): The grouping column(s), or None for a single group.
+    order (str): The column that orders the rows of a group, e.g. 'Year', or None to keep row order.
+
+    Returns:
+    tuple: The permutation (np.ndarray of row positions) and the group number of each sorted row.
+    """
+    if by is None:
+        groups = np.zeros(len(df), dtype=np.int64)
+    else:
+        groups = df.groupby(by, sort=False, observed=True, dropna=False).ngroup().to_numpy()
+    if order is None:
+        permutation = np.argsort(groups, kind='stable')
+    else:
+        permutation = np.lexsort((df[order].to_numpy(), groups))
+    return permutation, groups[permutation]
+
+
+def growth_rates(df: pd.DataFrame, columns, method: str = 'pct', periods: int = 1, by=None, order=None,
+                 periods_per_year: float = None, scale: float = 1.0, fill_method: str = None) -> pd.DataFrame:
+    """
+    Computes period-over-period growth of several columns for every group at once. The rows are sorted into
+    contiguous groups once, the values are compared with the row `periods` places earlier as one 2-D NumPy
+    operation, and positions whose earlier row belongs to another group are masked, so there is no Python-level
+    loop over groups or columns.
+
+    With ratio = x[t] / x[t - periods]:
+    'pct' is ratio - 1, 'log' is ln(ratio) and 'cagr' is ratio ** (periods_per_year / periods) - 1, the compound
+    rate per year over the window (periods_per_year defaults to 1, i.e. one row per year). Passing
+    periods_per_year with 'pct' or 'log' annualises them too, e.g. periods_per_year=12 on monthly rows.
+
+    Parameters:
+    df (pd.DataFrame): The input data, in any row order.
+    columns (str or list): The numeric column(s) to compute growth for.
+    method (str): One of 'pct', 'log' or 'cagr'.
+    periods (int): The window, in rows of the same group.
+    by (str or list): The grouping column(s), or None to treat df as one series.
+    order (str): The column ordering the rows within a group, or None to keep row order.
+    periods_per_year (float): The rows per year used to annualise the rates.
+    scale (float): A factor applied to the result, e.g. 100 for percentages.
+    fill_method (str): 'pad' (or 'ffill') carries the last value of a group forward over missing ones before
+                       comparing, as pct_change does by default in pandas 2.0, so a gap gives 0 and the row after
+                       it grows from the last known value. None leaves missing values missing.
+
+    Returns:
+    pd.DataFrame: The rates, with df's index and the given column names; the first `periods` rows of every
+                  group, and rows where either value is missing, are NaN.
+
+    DocTest:
+    >>> df = pd.DataFrame({'Region': ['West', 'East', 'West', 'East', 'West'], 'Year': [2019, 2018, 2018, 2019, 2020],
+    ...                    'GDP': [110.0, 50.0, 100.0, 55.0, 121.0]})
+    >>> growth_rates(df, 'GDP', by='Region', order='Year', scale=100).round(6)
+        GDP
+    0  10.0
+    1   NaN
+    2   NaN
+    3  10.0
+    4  10.0
+    >>> growth_rates(df, 'GDP', method='cagr', periods=2, by='Region', order='Year').round(6)['GDP'].tolist()
+    [nan, nan, nan, nan, 0.1]
+    >>> gap = pd.DataFrame({'GDP': [100.0, np.nan, 121.0]})
+    >>> growth_rates(gap, 'GDP')['GDP'].tolist(), growth_rates(gap, 'GDP', fill_method='pad')['GDP'].round(6).tolist()
+    ([nan, nan, nan], [nan, 0.0, 0.21])
+    """
+    if method not in METHODS:
+        raise ValueError(f'Unknown growth method {method!r}; expected one of {METHODS}')
+    if periods < 1:
+        raise ValueError('periods must be a positive number of rows')
+    if fill_method not in (None, 'pad', 'ffill'):
+        raise ValueError(f"Unknown fill method {fill_method!r}; expected 'pad', 'ffill' or None")
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    permutation, groups = sort_groups(df, by, order)
+    values = df[columns].to_numpy(dtype=np.float64)[permutation]
+    if fill_method is not None and len(values):
+        # Each row takes the value of the last non-missing row at or before it; a group's first row always points
+        # at itself, so values are never carried into the next group
+        source = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        source[starts] = starts[:, None]
+        values = np.take_along_axis(values, np.maximum.accumulate(source, axis=0), axis=0)
+
+    ratio = np.full(values.shape, np.nan)
+    same_group = groups[periods:] == groups[:-periods]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio[periods:] = np.where(same_group[:, None], values[periods:] / values[:-periods], np.nan)
+        exponent = 1.0 if periods_per_year is None else periods_per_year / periods
+        if method == 'log':
+            rates = np.log(ratio) * exponent
+        else:
+            if method == 'cagr' and periods_per_year is None:
+                exponent = 1.0 / periods
+            rates = (ratio if exponent == 1.0 else ratio ** exponent) - 1.0
+
+    result = np.empty_like(rates)
+    result[permutation] = rates * scale
+    return pd.DataFrame(result, index=df.index, columns=columns)
+
+
+def window_growth(start, end, periods: float, method: str = 'cagr', scale: float = 1.0):
+    """
+    Growth between two aligned sets of values, e.g. two year columns of a wide table, for CAGR over a fixed window
+    without reshaping. Accepts scalars, arrays, Series or DataFrames and keeps their shape and labels.
+
+    Parameters:
+    start (array-like): The values at the start of the window.
+    end (array-like): The values at the end of the window.
+    periods (float): The years (or other unit) between start and end.
+    method (str): One of 'pct', 'log' or 'cagr'.
+    scale (float): A factor applied to the result, e.g. 100 for percentages.
+
+    Returns:
+    array-like: The rates, shaped like end.
+
+    DocTest:
+    >>> wide = pd.DataFrame({2014: [100.0, 80.0], 2023: [200.0, 80.0]}, index=['Mining', 'Retail'])
+    >>> window_growth(wide[2014], wide[2023], 2023 - 2014, scale=100).round(3)
+    Mining    8.006
+    Retail    0.000
+    dtype: float64
+    """
+    if method not in METHODS:
+        raise ValueError(f'Unknown growth method {method!r}; expected one of {METHODS}')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = end / start
+        if method == 'pct':
+            return (ratio - 1) * scale
+        if method == 'log':
+            return np.log(ratio) * scale
+        return (ratio ** (1.0 / periods) - 1) * scale
+
+
+def growth_names(columns, names: dict = None) -> dict:
+    """Maps each value column to its growth column, 'GDP' -> 'GDP_Growth' unless names says otherwise."""
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    return {column: (names or {}).get(column, f'{column}_Growth') for column in columns}
+
+
+def append_growth(table: pd.DataFrame, new_rows: pd.DataFrame, columns, by=None, order: str = 'Year',
+                  names: dict = None, **options) -> pd.DataFrame:
+    """
+    Adds observations to a derived table that already carries growth columns, recomputing only the rows they can
+    change. For each group with incoming rows, the rates are recomputed from the earliest incoming order value on,
+    using the `periods` existing rows before it as context; rows of other groups and earlier rows are left as they
+    are. Incoming rows whose group and order value already exist are revisions and replace the stored rows.
+
+    Parameters:
+    table (pd.DataFrame): The derived table, as returned by an earlier full computation or append.
+    new_rows (pd.DataFrame): The observations to add, with the group, order and value columns.
+    columns (str or list): The value column(s) the growth columns are derived from.
+    by (str or list): The grouping column(s), or None for a single series.
+    order (str): The column ordering the rows within a group.
+    names (dict): Growth column name per value column; defaults to '<column>_Growth'.
+    **options: method, periods, periods_per_year and scale, as for growth_rates.
+
+    Returns:
+    pd.DataFrame: The updated table: stored rows in their order (revised rows dropped) followed by the incoming
+                  rows, on a fresh RangeIndex.
+
+    DocTest:
+    >>> table = pd.DataFrame({'Region': ['West', 'East', 'West', 'East'], 'Year': [2018, 2018, 2019, 2019],
+    ...                       'GDP': [100.0, 50.0, 110.0, 55.0]})
+    >>> table['GDP_Growth'] = growth_rates(table, 'GDP', by='Region', order='Year', scale=100)['GDP']
+    >>> new_rows = pd.DataFrame({'Region': ['West'], 'Year': [2020], 'GDP': [99.0]})
+    >>> append_growth(table, new_rows, 'GDP', by='Region', scale=100).round(6)
+      Region  Year    GDP  GDP_Growth
+    0   West  2018  100.0         NaN
+    1   East  2018   50.0         NaN
+    2   West  2019  110.0        10.0
+    3   East  2019   55.0        10.0
+    4   West  2020   99.0       -10.0
+    """
+    names = growth_names(columns, names)
+    keys = [] if by is None else [by] if isinstance(by, str) else list(by)
+    periods = options.get('periods', 1)
+    incoming = new_rows.drop(columns=[name for name in names.values() if name in new_rows])
+
+    # Group numbers shared by stored and incoming rows, and the earliest incoming order value of each group: a
+    # group's rates can only change from there on
+    if keys:
+        codes = pd.concat([table[keys], incoming[keys]]).groupby(keys, sort=False, observed=True,
+                                                                 dropna=False).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(table) + len(incoming), dtype=np.int64)
+    stored_codes, incoming_codes = codes[:len(table)], codes[len(table):]
+    incoming_order = incoming[order].to_numpy()
+    start = pd.Series(incoming_order).groupby(incoming_codes).min().reindex(stored_codes).to_numpy()
+    touched = ~pd.isna(start)
+    positions = table[order].to_numpy()
+    tail = touched & (positions >= np.where(touched, start, positions))
+
+    # Stored rows of the tail with the same group and order value as an incoming row are revised by it
+    tail_rows = np.flatnonzero(tail)
+    revised = pd.MultiIndex.from_arrays([stored_codes[tail_rows], positions[tail_rows]]).isin(
+        pd.MultiIndex.from_arrays([incoming_codes, incoming_order]))
+    affected, dropped = tail_rows[~revised], tail_rows[revised]
+
+    # The last `periods` stored rows before the tail of each group are the context the first new rates need
+    before = np.flatnonzero(touched & ~tail)
+    before = before[np.lexsort((positions[before], stored_codes[before]))]
+    last = np.ones(len(before), dtype=bool)
+    last[:-periods] = stored_codes[before][periods:] != stored_codes[before][:-periods]
+    context = before[last]
+
+    frame = pd.concat([table.iloc[context], table.iloc[affected], incoming], ignore_index=True)
+    rates = growth_rates(frame, list(names), by=by, order=order, **options)
+    updated = table.copy()
+    added = incoming.copy()
+    for column, name in names.items():
+        values = rates[column].to_numpy()
+        updated.iloc[affected, updated.columns.get_loc(name)] = values[len(context):len(context) + len(affected)]
+        added[name] = values[len(context) + len(affected):]
+    updated = updated.drop(updated.index[dropped])
+    return pd.concat([updated, added[updated.columns]], ignore_index=True)
+
+
+def check_growth(table: pd.DataFrame, columns, by=None, order: str = 'Year', names: dict = None,
+                 **options) -> pd.DataFrame:
+    """
+    Recomputes the growth columns of a derived table from scratch and returns the rows where the stored rates
+    disagree, so an incrementally maintained table can be audited against a full recomputation.
+
+    Parameters:
+    table (pd.DataFrame): The derived table.
+    columns (str or list): The value column(s) the growth columns are derived from.
+    by (str or list): The grouping column(s), or None for a single series.
+    order (str): The column ordering the rows within a group.
+    names (dict): Growth column name per value column; defaults to '<column>_Growth'.
+    **options: method, periods, periods_per_year and scale, as for growth_rates.
+
+    Returns:
+    pd.DataFrame: The disagreeing rows of table; empty when the table is consistent.
+    """
+    names = growth_names(columns, names)
+    expected = growth_rates(table, list(names), by=by, order=order, **options)
+    stored = table[list(names.values())].to_numpy(dtype=np.float64)
+    close = np.isclose(stored, expected.to_numpy(), rtol=1e-9, atol=1e-12, equal_nan=True)
+    return table[~close.all(axis=1)]
+
+
+def update_growth_table(path: str, new_rows: pd.DataFrame, columns, **options) -> pd.DataFrame:
+    """
+    Appends new_rows to the derived table pickled at path with append_growth and writes it back atomically.
+    A missing file starts an empty table, so the first call computes the rates in full.
+
+    Parameters:
+    path (str): The pickle file holding the derived table.
+    new_rows (pd.DataFrame): The observations to add.
+    columns (str or list): The value column(s) the growth columns are derived from.
+    **options: by, order, names, method, periods, periods_per_year and scale, as for append_growth.
+
+    Returns:
+    pd.DataFrame: The updated table.
+    """
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            table = pickle.load(f)
+    else:
+        names = growth_names(columns, options.get('names'))
+        table = new_rows.iloc[:0].assign(**{name: pd.Series(dtype=np.float64) for name in names.values()})
+    table = append_growth(table, new_rows, columns, **options)
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(table, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return table
+
+
+# Unit tests compare the engine with the pandas groupby code it replaced
+
+class TestGrowthRates(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'Country': rng.choice(['DE', 'FR', 'IT', 'ES'], 200),
+                                'Sex': rng.choice(['F', 'M'], 200),
+                                'Year': rng.permutation(200),
+                                'GDP': rng.uniform(1, 10, 200), 'Population': rng.uniform(1, 10, 200)})
+        self.df.loc[7, 'GDP'] = np.nan
+
+    def expected(self, periods, fill_method=None):
+        ordered = self.df.sort_values('Year')
+        change = ordered.groupby(['Country', 'Sex'])[['GDP', 'Population']].pct_change(periods,
+                                                                                       fill_method=fill_method)
+        return change.reindex(self.df.index)
+
+    def test_matches_grouped_pct_change(self):
+        for periods in (1, 3):
+            rates = growth_rates(self.df, ['GDP', 'Population'], periods=periods, by=['Country', 'Sex'],
+                                 order='Year')
+            pd.testing.assert_frame_equal(rates, self.expected(periods))
+
+    def test_pad_matches_pandas_default(self):
+        self.df.loc[self.df.sample(40, random_state=1).index, 'Population'] = np.nan
+        for periods in (1, 3):
+            rates = growth_rates(self.df, ['GDP', 'Population'], periods=periods, by=['Country', 'Sex'],
+                                 order='Year', fill_method='pad')
+            pd.testing.assert_frame_equal(rates, self.expected(periods, fill_method='ffill'))
+
+    def test_log_and_cagr_agree_with_pct(self):
+        pct = growth_rates(self.df, 'GDP', periods=4, by=['Country', 'Sex'], order='Year')
+        log = growth_rates(self.df, 'GDP', method='log', periods=4, by=['Country', 'Sex'], order='Year')
+        cagr = growth_rates(self.df, 'GDP', method='cagr', periods=4, by=['Country', 'Sex'], order='Year')
+        np.testing.assert_allclose(np.exp(log), pct + 1)
+        np.testing.assert_allclose((cagr + 1) ** 4, pct + 1)
+        monthly = growth_rates(self.df, 'GDP', by=['Country', 'Sex'], order='Year', periods_per_year=12)
+        one = growth_rates(self.df, 'GDP', by=['Country', 'Sex'], order='Year')
+        np.testing.assert_allclose(monthly, (one + 1) ** 12 - 1)
+
+    def test_rejects_unknown_method(self):
+        with self.assertRaises(ValueError):
+            growth_rates(self.df, 'GDP', method='diff')
+
+
+class TestAppendGrowth(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        regions = ['Northeast Region', 'Midwest Region', 'South Region', 'West Region']
+        self.panel = pd.DataFrame({'Region': np.repeat(regions, 30), 'Year': np.tile(np.arange(1990, 2020), 4),
+                                   'GDP': rng.uniform(1, 10, 120), 'Population': rng.uniform(1, 10, 120)})
+        self.options = dict(by='Region', order='Year', periods=2, scale=100)
+
+    def full(self, df):
+        rates = growth_rates(df, ['GDP', 'Population'], **self.options)
+        return df.assign(GDP_Growth=rates['GDP'], Population_Growth=rates['Population'])
+
+    def test_appending_years_matches_full_recomputation(self):
+        table = self.full(self.panel[self.panel['Year'] < 2010].reset_index(drop=True))
+        for year in range(2010, 2020):
+            # Regions report at different times: West is a year behind until the end
+            batch = self.panel[(self.panel['Year'] == year) & (self.panel['Region'] != 'West')]
+            if year == 2019:
+                batch = self.panel[(self.panel['Year'] >= 2010) & (self.panel['Region'] == 'West') |
+                                   (self.panel['Year'] == year)]
+            table = append_growth(table, batch, ['GDP', 'Population'], **self.options)
+            self.assertTrue(check_growth(table, ['GDP', 'Population'], **self.options).empty)
+        self.assertEqual(len(table), len(self.panel))
+
+    def test_revisions_update_the_following_rows(self):
+        table = self.full(self.panel)
+        revision = self.panel[(self.panel['Region'] == 'South Region') & (self.panel['Year'] == 2000)].copy()
+        revision['GDP'] *= 2
+        table = append_growth(table, revision, ['GDP', 'Population'], **self.options)
+        self.assertEqual(len(table), len(self.panel))
+        self.assertTrue(check_growth(table, ['GDP', 'Population'], **self.options).empty)
+        stale = self.full(self.panel)
+        changed = ~np.isclose(table.sort_values(['Region', 'Year'])['GDP_Growth'],
+                              stale.sort_values(['Region', 'Year'])['GDP_Growth'], equal_nan=True)
+        # The revised year and the one `periods` years later
+        self.assertEqual(changed.sum(), 2)
+
+    def test_check_flags_stale_rows(self):
+        table = self.full(self.panel)
+        table.loc[5, 'GDP_Growth'] += 1
+        self.assertEqual(check_growth(table, ['GDP', 'Population'], **self.options).index.tolist(), [5])
+
+    def test_update_growth_table_persists(self):
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'growth.pkl')
+            update_growth_table(path, self.panel[self.panel['Year'] < 2015], ['GDP', 'Population'], **self.options)
+            table = update_growth_table(path, self.panel[self.panel['Year'] >= 2015], ['GDP', 'Population'],
+                                        **self.options)
+            pd.testing.assert_frame_equal(pd.read_pickle(path), table)
+            self.assertTrue(check_growth(table, ['GDP', 'Population'], **self.options).empty)
+        finally:
+            shutil.rmtree(folder)
@@ -1,11 +1,39 @@
 import main
 import pandas as pd
 import numpy as np
+import functools
+import os
+
+import aggregation
+import dimensions
+import growth
+import periods
+import wide_table
+
+# The four census regions, in census region code order
+US_REGION = dimensions.register('us_region', ['Northeast Region', 'Midwest Region', 'South Region', 'West Region'])
+# The nine census divisions, in census division code order
+US_DIVISION = dimensions.register('us_division', [
+    'New England', 'Middle Atlantic', 'East North Central', 'West North Central', 'South Atlantic',
+    'East South Central', 'West South Central', 'Mountain', 'Pacific'])
+
+STATE_REGION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data', 'state population',
+                                 'state_region_division.csv')
+
+# FIPS state codes by postal code, so panels keyed by FIPS can be looked up too
+STATE_FIPS = {
+    'AL': 1, 'AK': 2, 'AZ': 4, 'AR': 5, 'CA': 6, 'CO': 8, 'CT': 9, 'DE': 10, 'DC': 11, 'FL': 12, 'GA': 13, 'HI': 15,
+    'ID': 16, 'IL': 17, 'IN': 18, 'IA': 19, 'KS': 20, 'KY': 21, 'LA': 22, 'ME': 23, 'MD': 24, 'MA': 25, 'MI': 26,
+    'MN': 27, 'MS': 28, 'MO': 29, 'MT': 30, 'NE': 31, 'NV': 32, 'NH': 33, 'NJ': 34, 'NM': 35, 'NY': 36, 'NC': 37,
+    'ND': 38, 'OH': 39, 'OK': 40, 'OR': 41, 'PA': 42, 'RI': 44, 'SC': 45, 'SD': 46, 'TN': 47, 'TX': 48, 'UT': 49,
+    'VT': 50, 'VA': 51, 'WA': 53, 'WV': 54, 'WI': 55, 'WY': 56,
+}
 
 
 def df_transit(gdp_df)-> pd.DataFrame:
     """
     Transposes a DataFrame and sets the first row as new column headers after removing columns containing any NaN values.
+    Year headers, such as those of World Bank exports, become an int64 index of years.
 
     This function is specifically designed for GDP data where it is assumed that the first row after dropping NaN columns
     contains meaningful header information. The resulting DataFrame will have these headers with the corresponding transposed data.
@@ -15,6 +43,7 @@ def df_transit(gdp_df)-> pd.DataFrame:
 
     Returns:
     pd.DataFrame: A transposed DataFrame with NaN-containing columns removed and the first row set as headers.
+                  Columns holding only numbers are int64 or float64 rather than object.
 
     unit test:
     >>> data = {'Year': [2020, 2021], 'GDP_US': [21000, None], 'GDP_UK': [2700, 2750]}
@@ -25,14 +54,19 @@ def df_transit(gdp_df)-> pd.DataFrame:
     """
     gdp_df_tp = gdp_df.dropna(axis=1).transpose()
     gdp_df_tp.columns = gdp_df_tp.iloc[0]
-    gdp_df_tp = gdp_df_tp[1:]
+    # The transpose leaves every column object; give the values back their numeric dtype
+    gdp_df_tp = gdp_df_tp[1:].infer_objects()
+    years = periods.parse_years(gdp_df_tp.index)
+    if len(years) and (years > 0).all():
+        gdp_df_tp.index = years
     return gdp_df_tp
 
 
 
 def process_unemployment_rate_df(unemployment_df)-> pd.DataFrame:
     """
-    Processes a DataFrame containing unemployment rates. It renames a column, transposes the DataFrame,
+    Processes a DataFrame containing unemployment rates. It parses the year columns into a float matrix with
+    wide_table.YearMatrix, lays it out as years x indicators, keeps the years every indicator reports,
     renames specified columns to standardized names, and resets the index.
 
     Parameters:
@@ -41,22 +75,21 @@ def process_unemployment_rate_df(unemployment_df)-> pd.DataFrame:
 
     Returns:
     pd.DataFrame: A processed DataFrame with the index reset and the data restructured, having 'Year' as
-                  one of the columns and renamed columns for male, female, and total unemployment rates.
+                  one of the columns and renamed columns for male, female, and total unemployment rates. The
+                  years ('index') are int64 and the rates float64, not object.
 
     unit test:
     >>> data = {'Indicator Name': ['Unemployment, male (% of male labor force) (modeled ILO estimate)', 'Unemployment, female (% of female labor force) (modeled ILO estimate)', 'Unemployment, total (% of total labor force) (modeled ILO estimate)'], '2000': [None, None, 1.2] , '2001': [1.1, 1.2, 1.3], '2002': [5.5, 5.6,5.7],'2003': [5.2, 5.3,5.4]}
     >>> unemployment_df = pd.DataFrame(data)
     >>> process_unemployment_rate_df(unemployment_df)
-    Year index male_rate female_rate total_rate
-    0     2001       1.1         1.2        1.3
-    1     2002       5.5         5.6        5.7
-    2     2003       5.2         5.3        5.4
+    Year  index  male_rate  female_rate  total_rate
+    0      2001        1.1          1.2         1.3
+    1      2002        5.5          5.6         5.7
+    2      2003        5.2          5.3         5.4
     """
-    unemployment_df = unemployment_df.rename(columns={'Indicator Name': 'Year'})
-    # transpose unemployment_df
-    unemployment_df_tp = unemployment_df.dropna(axis=1).transpose()
-    unemployment_df_tp.columns = unemployment_df_tp.iloc[0]
-    unemployment_df_tp = unemployment_df_tp[1:]
+    matrix = wide_table.YearMatrix.from_wide(unemployment_df, id_columns=['Indicator Name'])
+    # Years x indicators, keeping only the years every indicator reports
+    unemployment_df_tp = matrix.frame('Indicator Name').dropna().rename_axis(index=None, columns='Year')
     # rename the columns
     unemployment_df_tp = unemployment_df_tp.rename(columns={'Unemployment, male (% of male labor force) (modeled ILO estimate)':'male_rate',
                                            'Unemployment, female (% of female labor force) (modeled ILO estimate)':'female_rate',
@@ -71,9 +104,9 @@ def read_and_process_yearly_unemp(df_unemp)-> pd.DataFrame:
     """
     Processes a DataFrame containing unemployment data by calculating the yearly average of unemployment.
 
-    The function converts the 'Date' column to datetime, sets it as the index, and then resamples the data
-    to calculate the annual mean. The result is a DataFrame with the 'Year' column and the annual average
-    of the 'All workers' column.
+    The function aggregates the 'All workers' column to annual means with aggregation.FrequencyPyramid, which
+    parses the 'Date' column itself; df_unemp is left unchanged. The result is a DataFrame with the 'Year' column
+    and the annual average of the 'All workers' column.
 
     Parameters:
     df_unemp (pd.DataFrame): A DataFrame with a 'Date' column and an 'All workers' column containing
@@ -91,15 +124,11 @@ def read_and_process_yearly_unemp(df_unemp)-> pd.DataFrame:
        Year  All workers
     0  2020         5.05
     1  2021         5.55
+    >>> df_unemp['Date'].tolist()[:2]
+    ['2020-01-01', '2020-12-31']
     """
-    df_unemp['Date'] = pd.to_datetime(df_unemp['Date'])
-    df_unemp.set_index('Date', inplace=True)
-    df_yearly_avg = df_unemp.resample('Y').mean()
-    df_yearly_avg.reset_index(inplace=True)
-    df_yearly_avg = df_yearly_avg.rename(columns={'Date': 'Year'})
-    df_yearly_avg['Year'] = df_yearly_avg['Year'].dt.year
-    df_yearly_avg = df_yearly_avg[['Year', 'All workers']]
-    df_yearly_avg.set_index('Year')
+    yearly = aggregation.FrequencyPyramid(df_unemp, 'Date', ['All workers']).get('Y')
+    df_yearly_avg = pd.DataFrame({'Year': yearly.index.year, 'All workers': yearly['All workers'].to_numpy()})
     return df_yearly_avg
 
 
@@ -117,7 +146,7 @@ def process_state_population(df_state_population)-> pd.DataFrame:
 
     Returns:
     pd.DataFrame: A processed DataFrame containing only population data for the four major regions of the
-                  United States and with years as column headers.
+                  United States, with 'Region' coded as a US_REGION categorical and years as column headers.
 
     unit test:
     >>> data = {'SUMLEV': [40, 40], 'DIVISION': [1, 2], 'REGION': [3, 4], 'STATE': [5, 6], 'NAME': ['Northeast Region', 'West Region'], 'POPESTIMATE2010': [1000, 2000], 'POPESTIMATE2011': [500, 1500]}
@@ -127,21 +156,86 @@ def process_state_population(df_state_population)-> pd.DataFrame:
     0  Northeast Region  1000   500
     1       West Region  2000  1500
     """
-    df_state_population.drop(['SUMLEV','DIVISION','REGION','STATE'], axis=1, inplace=True)
+    # Region codes for the region rows, NaN for states and the national total; only those few rows are copied
+    region = US_REGION.encode(df_state_population['NAME'])
+    df_state_population = df_state_population[region.notna()].drop(['SUMLEV','DIVISION','REGION','STATE'], axis=1)
     df_state_population.columns = [col[-4:] if len(col) > 4 else col for col in df_state_population.columns]
-    df_state_population = df_state_population[(df_state_population['NAME'] == 'Northeast Region') | (df_state_population['NAME'] == 'Midwest Region') | (df_state_population['NAME'] == 'West Region') | (df_state_population['NAME'] == 'South Region')]
+    df_state_population['NAME'] = region[region.notna()]
     df_state_population = df_state_population.rename(columns={'0POP' : '2009','NAME':'Region'})
     return df_state_population
 
 
 
 
+@functools.lru_cache(maxsize=None)
+def load_state_regions(path: str = STATE_REGION_FILE) -> tuple:
+    """
+    Loads the state to region/division table once per path and builds the hashed index lookup_region uses.
+    State names, postal codes and FIPS codes all point at the same table row. The District of Columbia, which the
+    file leaves out, is added to the South Atlantic division as the census places it.
+
+    Parameters:
+    path (str): The CSV with 'State', 'State Code', 'Region' and 'Division' columns.
+
+    Returns:
+    tuple: The key index (pd.Index of names, postal codes and FIPS codes), the table row of each key, and the
+           US_REGION and US_DIVISION codes of each table row.
+    """
+    table = pd.read_csv(path, dtype=str)
+    if 'DC' not in set(table['State Code']):
+        table.loc[len(table)] = ['District of Columbia', 'DC', 'South', 'South Atlantic']
+    rows = np.arange(len(table))
+    fips = table['State Code'].map(STATE_FIPS)
+    keys = pd.Index(list(table['State']) + list(table['State Code']) + list(fips[fips.notna()].astype(int)))
+    positions = np.concatenate([rows, rows, rows[fips.notna().to_numpy()]])
+    regions = US_REGION.encode(table['Region'] + ' Region').cat.codes.to_numpy()
+    divisions = US_DIVISION.encode(table['Division']).cat.codes.to_numpy()
+    return keys, positions, regions, divisions
+
+
+def lookup_region(states, path: str = STATE_REGION_FILE) -> pd.DataFrame:
+    """
+    Maps a whole column of US states, given as names, postal codes or FIPS codes, to their census region and
+    division in one vectorized lookup. Each distinct key is resolved once against a hashed index and the result
+    is broadcast, so million-row county or metro panels cost one pass of integer indexing.
+
+    Parameters:
+    states (array-like or pd.Series): State names ('Illinois'), postal codes ('IL') or FIPS codes (17).
+    path (str): The state to region/division CSV; loaded once per path.
+
+    Returns:
+    pd.DataFrame: 'Region' and 'Division' columns as US_REGION and US_DIVISION categoricals, aligned with the
+                  input's index; unknown states are NaN.
+
+    unit test:
+    >>> lookup_region(pd.Series(['Illinois', 'TX ', 11, 'Guam']))
+               Region            Division
+    0  Midwest Region  East North Central
+    1    South Region  West South Central
+    2    South Region      South Atlantic
+    3             NaN                 NaN
+    """
+    series = states if isinstance(states, pd.Series) else pd.Series(states)
+    keys, positions, regions, divisions = load_state_regions(path)
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = [value.strip() if isinstance(value, str) else value for value in uniques]
+    found = keys.get_indexer(pd.Index(uniques, dtype=object))
+    # A trailing -1 serves both unknown keys and missing values (factorize code -1)
+    rows = np.append(np.where(found >= 0, positions[found], -1), -1)[codes]
+    region_codes = np.append(regions, -1)[rows]
+    division_codes = np.append(divisions, -1)[rows]
+    return pd.DataFrame({'Region': pd.Categorical.from_codes(region_codes, dtype=US_REGION.dtype),
+                         'Division': pd.Categorical.from_codes(division_codes, dtype=US_DIVISION.dtype)},
+                        index=series.index)
+
+
 def assign_division(state) -> str:
     """
     Assigns a US region division to a given state.
 
     This function categorizes each state into one of four regions: Midwest, Northeast, South, or West,
-    based on predefined lists of states belonging to each region.
+    using the state_region_division.csv mapping through lookup_region. To categorize a whole column, call
+    lookup_region on it directly instead of applying this function row by row.
 
     Parameters:
     state (str): The name of the state to be categorized.
@@ -155,66 +249,53 @@ def assign_division(state) -> str:
     >>> assign_division('New York')
     'Northeast Region'
     """
-    midwest = ['Iowa', 'Illinois', 'Indiana', 'Kansas', 'Michigan', 'Minnesota', 'Missouri', 'North Dakota', 'Nebraska', 'Ohio', 'South Dakota', 'Wisconsin']
-    northeast = ['Connecticut', 'Massachusetts', 'Maine', 'New Hampshire', 'New Jersey', 'New York', 'Pennsylvania', 'Rhode Island', 'Vermont']
-    south = ['Alabama', 'Arkansas', 'District of Columbia', 'Delaware', 'Florida', 'Georgia', 'Kentucky', 'Louisiana', 'Maryland', 'Mississippi', 'North Carolina', 'Oklahoma', 'South Carolina', 'Tennessee', 'Texas', 'Virginia', 'West Virginia']
-    west = ['Alaska', 'Arizona', 'California', 'Colorado', 'Hawaii', 'Idaho', 'Montana', 'New Mexico', 'Nevada', 'Oregon', 'Utah', 'Washington', 'Wyoming']
-
-    if state in midwest:
-        return 'Midwest Region'
-    elif state in northeast:
-        return 'Northeast Region'
-    elif state in south:
-        return 'South Region'
-    elif state in west:
-        return 'West Region'
+    region = lookup_region([state])['Region'].iloc[0]
+    if not pd.isna(region):
+        return region
 
 
 def process_eur_gdp(eur_gdp_df)-> pd.DataFrame:
     """
-    Processes a DataFrame containing European GDP data. It removes unwanted columns, transposes the DataFrame,
-    and then resets the index for the resulting DataFrame.
-
-    The 'df_transit' function used in this process is assumed to be a pre-defined function which transposes a DataFrame
-    and sets the first row as the new header. After transposing, it sets the columns to 'Year' and 'GDP'.
+    Processes a DataFrame containing European GDP data. wide_table.YearMatrix finds the header row, parses the years
+    and the values ('..' placeholders become NaN), and the single series is returned as 'Year' and 'GDP' columns
+    without the years that have no value.
 
     Parameters:
     eur_gdp_df (pd.DataFrame): The input DataFrame containing GDP data with multiple columns,
                                where the necessary data is in the first and fifth columns.
 
     Returns:
-    pd.DataFrame: A processed DataFrame with two columns: 'Year' and 'GDP', and the index reset.
+    pd.DataFrame: A processed DataFrame with two columns: 'Year' (int64) and 'GDP' (float64), and the index
+                  reset.
 
     unit test:
     >>> data = {'Unnamed1': ['Country Name','European Union'], 'Unnamed2': ['Country Code', 'EU'], 'Unnamed3': ['Indicator Name', 'GDP (current US$)'],
     ...         'Unnamed4': ['Indicator Code', 'NY.GDP.MKTP.CD'], 'Unnamed5': ['1960', None], 'Unnamed6': ['1961', 15000000], 'Unnamed7': ['1962', 16000000]}
     >>> eur_gdp_df = pd.DataFrame(data)
     >>> process_eur_gdp(eur_gdp_df)
-       Year       GDP
-    0  1961  15000000
-    1  1962  16000000
+       Year         GDP
+    0  1961  15000000.0
+    1  1962  16000000.0
+    >>> process_eur_gdp(eur_gdp_df).dtypes.astype(str).tolist()
+    ['int64', 'float64']
     """
-    eur_gdp_df = eur_gdp_df.drop(eur_gdp_df.columns[[1, 2, 3]], axis=1)
-    eur_gdp_df_tp = main.df_transit(eur_gdp_df)
-    eur_gdp_df_tp.columns = ['Year', 'GDP']
-    eur_gdp_df_tp = eur_gdp_df_tp.reset_index(drop=True)
+    gdp = wide_table.YearMatrix.from_wide(eur_gdp_df).series().dropna()
+    eur_gdp_df_tp = pd.DataFrame({'Year': gdp.index, 'GDP': gdp.to_numpy()})
     return eur_gdp_df_tp
 
 
 def process_eur_unemp(eur_unemp_df)-> pd.DataFrame:
     """
-    Processes a DataFrame containing European unemployment data. The function drops specific
-    columns, transposes the DataFrame, assigns new headers, and resets the index.
-
-    It uses a custom 'df_transit' function, assumed to be defined in the 'main' module, which
-    transposes the DataFrame and sets the first row as new headers.
+    Processes a DataFrame containing European unemployment data. The function parses the export with
+    wide_table.YearMatrix and returns its single series as 'Year' and 'Unemployment Rate' columns,
+    without the years that have no value.
 
     Parameters:
     eur_unemp_df (pd.DataFrame): A DataFrame containing unemployment data with multiple columns,
                                     where the first column is country names and subsequent columns are years.
 
     Returns:
-    pd.DataFrame: A processed DataFrame with two columns: 'Year' and 'Unemployment Rate',
+    pd.DataFrame: A processed DataFrame with two columns: 'Year' (int64) and 'Unemployment Rate' (float64),
                      with the index reset for easy access to the data.
 
     unit test:
@@ -226,39 +307,35 @@ def process_eur_unemp(eur_unemp_df)-> pd.DataFrame:
     0  1961  8.92
     1  1962  9.01
     """
-    eur_unemp_df = eur_unemp_df.drop(eur_unemp_df.columns[[1, 2, 3]], axis=1)
-    eur_unemp_df_tp = main.df_transit(eur_unemp_df)
-    eur_unemp_df_tp.columns = ['Year', 'Unemployment Rate']
-    eur_unemp_df_tp = eur_unemp_df_tp.reset_index(drop=True)
+    rate = wide_table.YearMatrix.from_wide(eur_unemp_df).series().dropna()
+    eur_unemp_df_tp = pd.DataFrame({'Year': rate.index, 'Unemployment Rate': rate.to_numpy()})
     return eur_unemp_df_tp
 
 def get_USA_wage_data(min_wage_df)-> pd.DataFrame:
     """
     Extracts and transforms minimum wage data specifically for the United States from a given DataFrame.
 
-    The function filters the data for the United States, transposes the DataFrame, and renames the columns
-    to 'Year' and 'USA_wage'. The 'df_transit' function is assumed to be a previously defined function in the
-    'main' module that transposes a DataFrame and sets the first row as the new header.
+    The function parses the year columns of all countries into a float matrix with wide_table.YearMatrix, takes
+    the United States row, and returns it as 'Year' and 'USA_wage' columns without the years that have no value.
 
     Parameters:
     min_wage_df (pd.DataFrame): The input DataFrame containing minimum wage data with a 'Country' column.
 
     Returns:
-    pd.DataFrame: A DataFrame with the 'Year' and 'USA_wage' columns representing the minimum wage data for
-                  the United States over different years.
+    pd.DataFrame: A DataFrame with the 'Year' (int64) and 'USA_wage' (float64) columns representing the minimum
+                  wage data for the United States over different years.
 
     unit test:
     >>> data = {'Country': ['United States', 'Belgium'], '1980': [3.18, 3.10], '1981': [3.35, 3.35]}
     >>> min_wage_df = pd.DataFrame(data)
     >>> get_USA_wage_data(min_wage_df)
-       Year USA_wage
-    0  1980     3.18
-    1  1981     3.35
+       Year  USA_wage
+    0  1980      3.18
+    1  1981      3.35
     """
-    USA_min_wage_df = min_wage_df[min_wage_df['Country'] == 'United States']
-    USA_min_wage_df = main.df_transit(USA_min_wage_df)
-    USA_min_wage_df = pd.DataFrame(USA_min_wage_df).reset_index()
-    USA_min_wage_df.columns = ['Year', 'USA_wage']
+    wage = wide_table.YearMatrix.from_wide(min_wage_df, id_columns=['Country']).series(Country='United States')
+    wage = wage.dropna()
+    USA_min_wage_df = pd.DataFrame({'Year': wage.index, 'USA_wage': wage.to_numpy()})
     return USA_min_wage_df
 
 
@@ -268,7 +345,7 @@ def calculate_eur_wage_avg(min_wage_df)-> pd.DataFrame:
     """
     Calculates the average minimum wage across European countries from a given DataFrame.
 
-    This function copies the input DataFrame, replaces placeholders for missing data ('..') with NA values,
+    This function replaces placeholders for missing data ('..') with NA values,
     drops all rows with missing values, then calculates the mean for each year and returns a new DataFrame
     with these average values.
 
@@ -288,9 +365,7 @@ def calculate_eur_wage_avg(min_wage_df)-> pd.DataFrame:
     0  2010     8.75
     1  2011     8.85
     """
-    eur_min_wage_df = min_wage_df.copy()
-    eur_min_wage_df.replace('..', pd.NA, inplace=True)
-    eur_min_wage_df.dropna(inplace=True)
+    eur_min_wage_df = min_wage_df.replace('..', pd.NA).dropna()
     average_values = eur_min_wage_df.loc[:, eur_min_wage_df.columns != 'Country'].mean()
     averages_df = pd.DataFrame(average_values).reset_index()
     averages_df.columns = ['Year', 'eur_wage'] 
@@ -310,8 +385,8 @@ def calculate_GDP_Growth(gdp_df_tp_reset)-> pd.DataFrame:
                                     for consecutive years.
 
     Returns:
-    pd.DataFrame: The input DataFrame is returned with an additional 'GDP_Growth' column representing
-                  the annual GDP growth rate.
+    pd.DataFrame: A new DataFrame with the input's columns, sharing their data, and an additional 'GDP_Growth'
+                  column representing the annual GDP growth rate. The input is not modified.
 
     unit test:
     >>> data = {'Year': [2018, 2019, 2020], 'GDP': [2000, 2100, 2200]}
@@ -321,8 +396,11 @@ def calculate_GDP_Growth(gdp_df_tp_reset)-> pd.DataFrame:
     0  2018  2000         NaN
     1  2019  2100    5.000000
     2  2020  2200    4.761905
+    >>> list(gdp_df_tp_reset.columns)
+    ['Year', 'GDP']
     """
-    gdp_df_tp_reset['GDP_Growth'] = ((gdp_df_tp_reset['GDP'] - gdp_df_tp_reset['GDP'].shift(1)) / gdp_df_tp_reset['GDP'].shift(1)) * 100
+    gdp_df_tp_reset = gdp_df_tp_reset.copy(deep=False)
+    gdp_df_tp_reset['GDP_Growth'] = growth.growth_rates(gdp_df_tp_reset, 'GDP', scale=100, fill_method='pad')['GDP']
     return gdp_df_tp_reset
 
 
@@ -341,8 +419,8 @@ def calculate_Population_Growth(df_state_unemp_pop_reg)-> pd.DataFrame:
                                            indicates the region each row of data belongs to.
 
     Returns:
-    pd.DataFrame: The original DataFrame with an additional 'Population_Growth' column representing the
-                  annual population growth rate for each region.
+    pd.DataFrame: A new DataFrame with the scaled 'Population' and an additional 'Population_Growth' column
+                  representing the annual population growth rate for each region. The input is not modified.
 
     unit test:
     >>> data = {'Region': ['Midwest Region', 'Midwest Region', 'West Region', 'West Region'], 'Year': [2018, 2019, 2018, 2019], 'Population': [0.683, 0.686, 0.780, 0.784]}
@@ -354,8 +432,10 @@ def calculate_Population_Growth(df_state_unemp_pop_reg)-> pd.DataFrame:
     2     West Region  2018   7800000.0                NaN
     3     West Region  2019   7840000.0           0.512821
     """
+    df_state_unemp_pop_reg = df_state_unemp_pop_reg.copy(deep=False)
     df_state_unemp_pop_reg['Population'] = df_state_unemp_pop_reg['Population'] * 10**7
-    df_state_unemp_pop_reg['Population_Growth'] = df_state_unemp_pop_reg.groupby('Region')['Population'].transform(lambda x: x.pct_change()) * 100
+    df_state_unemp_pop_reg['Population_Growth'] = growth.growth_rates(df_state_unemp_pop_reg, 'Population', by='Region',
+                                                                      scale=100, fill_method='pad')['Population']
     return df_state_unemp_pop_reg
 
 
@@ -372,8 +452,8 @@ def calculate_EU_population_growth(euro_merged_df) -> pd.DataFrame:
                                    representing the population for consecutive years.
 
     Returns:
-    pd.DataFrame: The same DataFrame with an additional 'Population_Growth' column representing the annual
-                  population growth percentage.
+    pd.DataFrame: A new DataFrame sharing the input's columns, with an additional 'Population_Growth' column
+                  representing the annual population growth percentage. The input is not modified.
 
     unit test:
     >>> data = {'Year': [2018, 2019, 2020], 'Population': [50000000, 50500000, 51000000]}
@@ -384,7 +464,9 @@ def calculate_EU_population_growth(euro_merged_df) -> pd.DataFrame:
     1  2019    50500000           1.000000
     2  2020    51000000           0.990099
     """
-    euro_merged_df['Population_Growth'] = euro_merged_df['Population'].pct_change() * 100
+    euro_merged_df = euro_merged_df.copy(deep=False)
+    euro_merged_df['Population_Growth'] = growth.growth_rates(euro_merged_df, 'Population', scale=100,
+                                                              fill_method='pad')['Population']
     return euro_merged_df
 
 
@@ -401,8 +483,8 @@ def calculate_EU_GDP_Growth(euro_merged_df)-> pd.DataFrame:
                                    the GDP for consecutive years.
 
     Returns:
-    pd.DataFrame: The same DataFrame with an additional 'GDP_Growth' column representing the annual GDP growth
-                  percentage.
+    pd.DataFrame: A new DataFrame sharing the input's columns, with an additional 'GDP_Growth' column representing
+                  the annual GDP growth percentage. The input is not modified.
 
     unit test:
     >>> data = {'Year': [2018, 2019, 2020], 'GDP': [1.8e12, 1.85e12, 1.9e12]}
@@ -413,5 +495,6 @@ def calculate_EU_GDP_Growth(euro_merged_df)-> pd.DataFrame:
     1  2019  1.850000e+12    2.777778
     2  2020  1.900000e+12    2.702703
     """
-    euro_merged_df['GDP_Growth'] = euro_merged_df['GDP'].pct_change() * 100
+    euro_merged_df = euro_merged_df.copy(deep=False)
+    euro_merged_df['GDP_Growth'] = growth.growth_rates(euro_merged_df, 'GDP', scale=100, fill_method='pad')['GDP']
     return euro_merged_df
\ No newline at end of file
@@ -0,0 +1,223 @@
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import aggregation
+import periods
+
+ALIGNMENTS = ('interval', 'asof')
+
+
+def source_periods(frame: pd.DataFrame) -> pd.PeriodIndex:
+    """
+    The periods of a loader's result, from its index: a (Year, Month) MultiIndex (concatenate_usbls_files, with
+    month numbers or abbreviations), an int year index (merge_eurostat_data, process_StatsGovCN_data), datetimes
+    (process_onsgovuk_data) or any labels periods.parse_periods reads.
+
+    Parameters:
+    frame (pd.DataFrame): The loader's result.
+
+    Returns:
+    pd.PeriodIndex: One Period per row, NaT where the index is not a period.
+
+    DocTest:
+    >>> index = pd.MultiIndex.from_tuples([(1980, 1), (1980, 'Feb')], names=['Year', 'Month'])
+    >>> source_periods(pd.DataFrame({'Asian': [1.0, 2.0]}, index=index)).astype(str).tolist()
+    ['1980-01', '1980-02']
+    """
+    index = frame.index
+    if isinstance(index, pd.MultiIndex):
+        # Parse the distinct years and months of the levels and take them by the level codes; code -1 (missing)
+        # reads the trailing -1
+        years = np.append(periods.parse_years(index.levels[0]), -1)[index.codes[0]]
+        months = np.append(periods.parse_month(index.levels[1]), -1)[index.codes[1]]
+        ordinals = np.where((years > 0) & (months > 0), (years - 1970) * 12 + months - 1, np.iinfo(np.int64).min)
+        return pd.PeriodIndex(pd.arrays.PeriodArray(ordinals, dtype=pd.PeriodDtype('M')))
+    return periods.parse_periods(index)
+
+
+def month_bounds(ordinals: np.ndarray, freq: str) -> tuple:
+    """The first and last month ordinal of every period of a frequency in periods.FREQUENCIES."""
+    months = 12 // periods.FREQUENCIES[freq]
+    return ordinals * months, ordinals * months + months - 1
+
+
+class PanelBuilder:
+    """
+    Aligns the results of the source loaders, each at its own frequency, onto one calendar as a single float64
+    wide frame. Every source is sorted by period once when it is registered; building then places each source on
+    the calendar with a binary search of its sorted periods instead of a merge per source, so adding a country
+    adds one sorted array and one block of output columns.
+    """
+
+    def __init__(self):
+        self.sources = {}
+
+    def __repr__(self):
+        return f"PanelBuilder({', '.join(f'{name} [{source[0]}]' for name, source in self.sources.items())})"
+
+    def add(self, name: str, frame: pd.DataFrame, columns=None) -> 'PanelBuilder':
+        """
+        Registers a source at its native frequency, which is that of its index (see source_periods).
+
+        Parameters:
+        name (str): The source name, the first level of its columns in the panel, e.g. 'US'.
+        frame (pd.DataFrame): The loader's result, in any row order.
+        columns (list): The columns to take; defaults to every numeric column.
+
+        Returns:
+        PanelBuilder: self, for chaining.
+        """
+        if name in self.sources:
+            raise ValueError(f'The panel already has a source named {name!r}')
+        columns = list(frame.select_dtypes('number').columns if columns is None else columns)
+        index = source_periods(frame)
+        ordinals = index.asi8
+        values = (frame if list(frame.columns) == columns else frame[columns]).to_numpy(dtype=np.float64)
+        # Loaders return sorted, complete indexes, whose values are kept as they are rather than copied
+        if index.hasnans or (np.diff(ordinals) <= 0).any():
+            present = ~index.isna()
+            order = np.argsort(ordinals[present], kind='stable')
+            ordinals, values = ordinals[present][order], values[present][order]
+            if (np.diff(ordinals) == 0).any():
+                raise ValueError(f'Source {name!r} has several rows for one period; aggregate it first')
+        self.sources[name] = (index.freqstr[0], ordinals, values, columns)
+        return self
+
+    def calendar(self, freq: str, start=None, end=None) -> pd.PeriodIndex:
+        """
+        The common calendar: every period of freq from start to end, by default from the period holding the first
+        observation of any source to the one holding the last.
+
+        Parameters:
+        freq (str): 'A', 'Q' or 'M'.
+        start, end: The first and last periods ('2000', '2000Q1', '2000-01', Periods); None spans the sources.
+
+        Returns:
+        pd.PeriodIndex: The calendar, named 'Period'.
+        """
+        months = 12 // periods.FREQUENCIES[freq]
+        firsts, lasts = [], []
+        for source_freq, ordinals, _, _ in self.sources.values():
+            if len(ordinals):
+                first, last = month_bounds(ordinals[[0, -1]], source_freq)
+                firsts.append(first[0])
+                lasts.append(last[1])
+        if start is None:
+            start = pd.Period(ordinal=min(firsts) // months, freq=freq)
+        if end is None:
+            end = pd.Period(ordinal=max(lasts) // months, freq=freq)
+        return pd.period_range(pd.Period(start, freq), pd.Period(end, freq), freq=freq, name='Period')
+
+    def build(self, freq: str = 'A', align: str = 'interval', start=None, end=None) -> pd.DataFrame:
+        """
+        Builds the wide panel.
+
+        With align='interval', a source finer than the calendar is averaged over each calendar period (ignoring
+        missing values), and a coarser one is repeated over the calendar periods its periods contain; periods a
+        source does not cover are NaN. With align='asof', every calendar period takes the source's latest row
+        starting no later than the calendar period ends, so the last known value of a lower-frequency or lagging
+        source is carried forward.
+
+        Parameters:
+        freq (str): The calendar frequency, 'A', 'Q' or 'M'.
+        align (str): 'interval' or 'asof'.
+        start, end: As for calendar.
+
+        Returns:
+        pd.DataFrame: float64 values on the calendar, with (source, series) column levels.
+
+        DocTest:
+        >>> annual = pd.DataFrame({'rate': [5.0, 6.0]}, index=pd.Index([2020, 2021], name='Year'))
+        >>> monthly = pd.DataFrame({'rate': [1.0, 3.0, 8.0]},
+        ...                        index=pd.MultiIndex.from_tuples([(2020, 1), (2020, 2), (2021, 12)]))
+        >>> builder = PanelBuilder().add('EU', annual).add('US', monthly)
+        >>> panel = builder.build('A')
+        >>> panel.columns.tolist(), panel.index.astype(str).tolist(), panel.to_numpy().tolist()
+        ([('EU', 'rate'), ('US', 'rate')], ['2020', '2021'], [[5.0, 2.0], [6.0, 8.0]])
+        >>> builder.build('Q', align='asof', start='2021Q3').to_numpy().tolist()
+        [[6.0, 3.0], [6.0, 8.0]]
+        """
+        if align not in ALIGNMENTS:
+            raise ValueError(f'Unknown alignment {align!r}; expected one of {ALIGNMENTS}')
+        calendar = self.calendar(freq, start, end)
+        calendar_first, calendar_last = month_bounds(calendar.asi8, freq)
+        width = sum(len(source[3]) for source in self.sources.values())
+        values = np.full((len(calendar), width), np.nan)
+        labels, column = [], 0
+        for name, (source_freq, ordinals, source_values, columns) in self.sources.items():
+            if align == 'interval' and periods.FREQUENCIES[source_freq] > periods.FREQUENCIES[freq]:
+                # Average a finer source over the calendar periods; its rows are sorted, so each is one run
+                buckets = ordinals // (periods.FREQUENCIES[source_freq] // periods.FREQUENCIES[freq])
+                starts = aggregation.run_starts(np.zeros(len(buckets), dtype=np.int64), buckets)
+                runs = aggregation.reduce_runs(aggregation.raw_partials(source_values), starts)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    source_values = runs['sum'] / runs['count']
+                ordinals, source_freq = buckets[starts], freq
+            first, last = month_bounds(ordinals, source_freq)
+            if align == 'interval':
+                # The source period starting last at or before each calendar period's start, if it still covers it
+                position = np.searchsorted(first, calendar_first, side='right') - 1
+                found = (position >= 0) & (calendar_first <= last[np.maximum(position, 0)])
+            else:
+                position = np.searchsorted(first, calendar_last, side='right') - 1
+                found = position >= 0
+            block = values[:, column:column + len(columns)]
+            block[found] = source_values[position[found]]
+            labels += [(name, series) for series in columns]
+            column += len(columns)
+        return pd.DataFrame(values, index=calendar,
+                            columns=pd.MultiIndex.from_tuples(labels, names=['source', 'series']))
+
+
+# Unit tests align the loaders' results and compare with the merges the notebooks do by hand
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data')
+
+
+class TestPanelBuilder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import utils
+        cls.us = utils.concatenate_usbls_files(os.path.join(DATA_DIR, 'USBLS', 'Race'), max_workers=1)
+        cls.eu = utils.merge_eurostat_data(os.path.join(DATA_DIR, 'Eurostat', 'Age'), max_workers=1)
+        cls.china = utils.process_StatsGovCN_data(pd.read_excel(os.path.join(DATA_DIR, 'StatsGovCN', 'educated_year.xlsx')),
+                                                  os.path.join(DATA_DIR, 'StatsGovCN', 'unemployment_rate.xlsx'))
+        uk = pd.DataFrame({'time': ['Jan2020-Mar2020', 'Feb2020-Apr2020', 'Jan2021-Mar2021'] * 2,
+                           'ethnicity': ['Asian'] * 3 + ['White'] * 3, 'value': ['5', '6', '4', '3', '2', '1']})
+        cls.uk = utils.process_onsgovuk_data(uk)
+        cls.builder = PanelBuilder().add('US', cls.us).add('EU', cls.eu).add('UK', cls.uk).add('CN', cls.china)
+
+    def test_annual_panel_matches_the_merge_cascade(self):
+        panel = self.builder.build('A')
+        us = self.us.groupby(level='Year').mean()
+        uk = self.uk.groupby(self.uk.index.year).mean()
+        expected = us.merge(self.eu, how='outer', left_index=True, right_index=True)
+        expected = expected.merge(uk, how='outer', left_index=True, right_index=True)
+        expected = expected.merge(self.china, how='outer', left_index=True, right_index=True)
+        expected = expected.reindex(panel.index.year)
+        np.testing.assert_allclose(panel.to_numpy(), expected.to_numpy(dtype=np.float64))
+        self.assertEqual(panel.columns.get_level_values('source').unique().tolist(), ['US', 'EU', 'UK', 'CN'])
+        self.assertEqual((panel.index.freqstr, str(panel.index.min()), str(panel.index.max())),
+                         ('A-DEC', '1980', '2024'))
+
+    def test_monthly_panel_repeats_and_carries_annual_values(self):
+        interval = self.builder.build('M', start='2021-01', end='2023-12')
+        self.assertTrue((interval.loc['2021-01':'2021-12', ('CN', 'Unemployment Rate')] == self.china.loc[2021,
+                        'Unemployment Rate']).all())
+        self.assertTrue(interval.loc['2022-01':, ('CN', 'Unemployment Rate')].isna().all())
+        self.assertEqual(interval[('UK', 'Asian')].notna().sum(), 1)
+        asof = self.builder.build('M', align='asof', start='2021-01', end='2023-12')
+        self.assertTrue((asof.loc['2023-12', 'CN'] == self.china.loc[2021]).all())
+        self.assertEqual(asof[('UK', 'Asian')].notna().sum(), 36)
+
+    def test_unsorted_sources_and_duplicates(self):
+        shuffled = self.eu.sample(frac=1.0, random_state=0)
+        pd.testing.assert_frame_equal(PanelBuilder().add('EU', shuffled).build(),
+                                      PanelBuilder().add('EU', self.eu).build())
+        with self.assertRaises(ValueError):
+            PanelBuilder().add('EU', pd.concat([self.eu, self.eu]))
+        with self.assertRaises(ValueError):
+            self.builder.build(align='nearest')
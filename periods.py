@@ -0,0 +1,281 @@
+import calendar
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# A year label: 1961, '1961', 1961.0, '1961 [YR1961]' (World Bank DataBank) or '1961 ' once stripped
+YEAR_PATTERN = r'^\s*((?:1[89]|20)\d\d)(?:\.0*)?(?:\s*\[YR\d{4}\])?\s*$'
+# Eurostat and ISO quarters: '2020Q1', '2020-Q1', '2020 Q1'
+QUARTER_PATTERN = r'^\s*((?:1[89]|20)\d\d)\s*-?\s*Q([1-4])\s*$'
+# Eurostat and ISO months: '2020M01', '2020-M01', '2020M1', '2020-01'
+MONTH_PATTERN = r'^\s*((?:1[89]|20)\d\d)(?:\s*-?\s*M|-)(0?[1-9]|1[0-2])\s*$'
+# Named months with a year: 'Jan2020', 'Jan 2020', 'January 2020', and ONS ranges 'Jan2020-Mar2020' (the first month)
+NAMED_MONTH_PATTERN = r'^\s*([A-Za-z]{3,9})\.?\s*((?:1[89]|20)\d\d)(?:\s*-\s*[A-Za-z]{3,9}\.?\s*\d{4})?\s*$'
+# BLS month columns and API period codes: 'Jan', 'January', 'M01', and month numbers; 'M13' is the annual average
+MONTH_LABEL_PATTERN = r'^\s*(?:M?(0?[1-9]|1[0-2])(?:\.0*)?|([A-Za-z]{3,9})\.?)\s*$'
+# Periods per year of the frequencies parse_periods returns
+FREQUENCIES = {'A': 1, 'Q': 4, 'M': 12}
+# The month columns of the BLS Year x Jan..Dec tables, in calendar order
+MONTHS = list(calendar.month_abbr)[1:]
+
+
+def parse_unique(values, parse, missing) -> np.ndarray:
+    """
+    Applies a parser to the distinct values only and broadcasts the results back to every position, so a column
+    of millions of rows repeating a few hundred labels is parsed a few hundred times.
+
+    Parameters:
+    values (array-like, pd.Series or pd.Index): The labels.
+    parse (callable): Takes the distinct labels as a Series of str and returns one result per label (np.ndarray).
+    missing: The result for missing values.
+
+    Returns:
+    np.ndarray: One result per value.
+    """
+    if not isinstance(values, (pd.Series, pd.Index, np.ndarray)):
+        values = np.asarray(list(values), dtype=object)
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    parsed = np.asarray(parse(pd.Series(np.asarray(uniques, dtype=object), dtype=object).astype(str)))
+    # codes of -1 (missing values) index the trailing missing result
+    return np.append(parsed, np.array([missing], dtype=parsed.dtype))[codes]
+
+
+def integers(values):
+    """values as an int64 array when they are integers already (an int year index, month numbers), else None."""
+    if isinstance(values, (pd.Series, pd.Index, np.ndarray)) and pd.api.types.is_integer_dtype(values.dtype):
+        return np.asarray(values, dtype=np.int64)
+    return None
+
+
+def month_numbers(names: pd.Series) -> np.ndarray:
+    """
+    The month numbers of month names, full or abbreviated to at least three letters ('Jan', 'Sept', 'March').
+
+    Parameters:
+    names (pd.Series): The names, str or NaN.
+
+    Returns:
+    np.ndarray: int64 month numbers, -1 where a name is not a month.
+    """
+    months = np.full(len(names), -1, dtype=np.int64)
+    lowered = names.fillna('').str.lower().to_numpy(dtype=object)
+    for number, name in enumerate(calendar.month_name):
+        if number:
+            matches = np.array([len(label) >= 3 and name.lower().startswith(label) for label in lowered], dtype=bool)
+            months[matches] = number
+    return months
+
+
+def parse_years(values) -> np.ndarray:
+    """
+    Parses year labels (1961, '1961', 1961.0, '1961 [YR1961]'), such as the year headers of World Bank and OECD
+    exports.
+
+    Parameters:
+    values (iterable): The labels.
+
+    Returns:
+    np.ndarray: The years as int64, -1 where a label is not a year.
+
+    DocTest:
+    >>> parse_years(['Country Name', 1961, '1962', 1963.0, '1964 [YR1964]', None]).tolist()
+    [-1, 1961, 1962, 1963, 1964, -1]
+    """
+    numbers = integers(values)
+    if numbers is not None:
+        return np.where((numbers >= 1800) & (numbers <= 2099), numbers, -1)
+
+    def parse(labels):
+        return pd.to_numeric(labels.str.extract(YEAR_PATTERN, expand=False)).fillna(-1).to_numpy(dtype=np.int64)
+    return parse_unique(values, parse, -1)
+
+
+def parse_month(values) -> np.ndarray:
+    """
+    Parses month-of-year labels: the month names and abbreviations of the BLS tables, the 'M01'..'M12' period
+    codes of the BLS API and month numbers (3, '03', 3.0).
+
+    Parameters:
+    values (iterable): The labels.
+
+    Returns:
+    np.ndarray: int64 month numbers, -1 where a label is not a month (including the 'M13' annual average).
+
+    DocTest:
+    >>> parse_month(['Jan', 'Feb', 'M03', 4, 'September', 'M13', 'Annual']).tolist()
+    [1, 2, 3, 4, 9, -1, -1]
+    """
+    numbers = integers(values)
+    if numbers is not None:
+        return np.where((numbers >= 1) & (numbers <= 12), numbers, -1)
+
+    def parse(labels):
+        parts = labels.str.extract(MONTH_LABEL_PATTERN)
+        codes = pd.to_numeric(parts[0]).fillna(-1).to_numpy(dtype=np.int64)
+        return np.where(codes > 0, codes, month_numbers(parts[1]))
+    return parse_unique(values, parse, -1)
+
+
+def month_columns(columns) -> list:
+    """The month columns ('Jan'..'Dec') among columns, in calendar order."""
+    return [month for month in MONTHS if month in columns]
+
+
+def unpack_monthly_table(table: pd.DataFrame, year: str = 'Year', columns=None) -> tuple:
+    """
+    Unpacks a Year x Jan..Dec table (the BLS xlsx tables and *_summary.csv files) into the monthly Period ordinal
+    and the value of every cell, without melting it.
+
+    Parameters:
+    table (pd.DataFrame): The table; month columns may be missing or in any order.
+    year (str): The year column.
+    columns (list): The month columns to unpack; defaults to every month column, in calendar order.
+
+    Returns:
+    tuple: The month columns unpacked, then the int64 ordinals (months since 1970-01) and float64 values of the
+           cells, both of shape (rows, month columns).
+
+    DocTest:
+    >>> table = pd.DataFrame({'Year': [1970, 2020.0], 'Feb': [1.0, 2.0], 'Jan': [3.0, None]})
+    >>> columns, ordinals, values = unpack_monthly_table(table)
+    >>> columns, ordinals.tolist(), values.tolist()
+    (['Jan', 'Feb'], [[0, 1], [600, 601]], [[3.0, 1.0], [nan, 2.0]])
+    """
+    columns = month_columns(table.columns) if columns is None else list(columns)
+    years = table[year].to_numpy(dtype=np.int64)
+    months = np.array([MONTHS.index(column) for column in columns], dtype=np.int64)
+    ordinals = (years[:, None] - 1970) * 12 + months
+    return columns, ordinals, table[columns].to_numpy(dtype=np.float64)
+
+
+def period_ordinals(labels: pd.Series) -> tuple:
+    """
+    Recognises every supported period format in distinct labels.
+
+    Parameters:
+    labels (pd.Series): The labels, as str.
+
+    Returns:
+    tuple: The periods per year of each label's frequency (0 where the label is not a period) and its ordinal at
+           that frequency (periods since 1970).
+    """
+    frequency = np.zeros(len(labels), dtype=np.int64)
+    ordinal = np.zeros(len(labels), dtype=np.int64)
+    named = labels.str.extract(NAMED_MONTH_PATTERN)
+    named_month = month_numbers(named[0])
+    candidates = [
+        (12, labels.str.extract(MONTH_PATTERN)),
+        (4, labels.str.extract(QUARTER_PATTERN)),
+        (12, pd.DataFrame({0: named[1].where(named_month > 0), 1: named_month})),
+        (1, labels.str.extract(YEAR_PATTERN).assign(sub=1)),
+    ]
+    for per_year, parts in candidates:
+        year = pd.to_numeric(parts.iloc[:, 0]).to_numpy()
+        found = (frequency == 0) & ~np.isnan(year)
+        sub = pd.to_numeric(parts.iloc[:, 1]).to_numpy()
+        ordinal[found] = (year[found].astype(np.int64) - 1970) * per_year + sub[found].astype(np.int64) - 1
+        frequency[found] = per_year
+    return frequency, ordinal
+
+
+def parse_periods(values, freq: str = None) -> pd.PeriodIndex:
+    """
+    Parses period labels of any source into typed Periods, parsing each distinct label once:
+    years ('2020', 2020.0, '2020 [YR2020]'), quarters ('2020Q1', '2020-Q1'), months ('2020M01', '2020-01',
+    'Jan2020', 'January 2020') and ONS three-month ranges ('Jan2020-Mar2020', labelled by their first month).
+    Datetime and Period values are converted directly.
+
+    Parameters:
+    values (array-like, pd.Series or pd.Index): The labels.
+    freq (str): 'A', 'Q' or 'M'. Coarser labels are converted to their first period at this frequency (2020 to
+                2020-01) and finer ones to the period holding them (2020-05 to 2020Q2). None infers the frequency,
+                which must then be the same for every label.
+
+    Returns:
+    pd.PeriodIndex: One Period per value, NaT where a value is missing or not a period, named after values.
+
+    DocTest:
+    >>> parse_periods(['Jan2020-Mar2020', '2020M02', '2020-03', 'March 2020', None]).astype(str).tolist()
+    ['2020-01', '2020-02', '2020-03', '2020-03', 'NaT']
+    >>> parse_periods(['2019', '2020Q3', '2021-11'], freq='Q').astype(str).tolist()
+    ['2019Q1', '2020Q3', '2021Q4']
+    """
+    name = getattr(values, 'name', None)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.PeriodIndex(pd.DatetimeIndex(values).to_period(freq or 'M'), name=name)
+    if isinstance(getattr(values, 'dtype', None), pd.PeriodDtype):
+        periods = pd.PeriodIndex(values, name=name)
+        return periods.asfreq(freq, how='start') if freq else periods
+
+    def parse(labels):
+        frequency, ordinal = period_ordinals(labels)
+        # Both packed in one int64 so they broadcast together; the frequency is at most 12
+        return ordinal * 16 + frequency
+
+    if integers(values) is not None:
+        # Integers can only be years
+        years = parse_years(values)
+        parsed = np.where(years > 0, (years - 1970) * 16 + 1, 0)
+    else:
+        parsed = parse_unique(values, parse, 0)
+    frequency, ordinal = parsed % 16, parsed // 16
+    found = frequency > 0
+    if freq is None:
+        inferred = np.unique(frequency[found])
+        if len(inferred) > 1:
+            raise ValueError(f'The labels mix frequencies {[f for f, n in FREQUENCIES.items() if n in inferred]}; '
+                             f'pass freq to convert them to one')
+        freq = next((f for f, n in FREQUENCIES.items() if len(inferred) and n == inferred[0]), 'A')
+    target = FREQUENCIES[freq]
+    # Coarser ordinals scale to their first period at the target frequency, finer ones divide down
+    converted = np.where(frequency <= target, ordinal * (target // np.maximum(frequency, 1)),
+                         ordinal // np.maximum(frequency // target, 1))
+    converted = np.where(found, converted, np.iinfo(np.int64).min)
+    return pd.PeriodIndex(pd.arrays.PeriodArray(converted, dtype=pd.PeriodDtype(freq)), name=name)
+
+
+def parse_dates(values, freq: str = None) -> pd.DatetimeIndex:
+    """
+    Parses period labels as parse_periods does and returns the first day of each period.
+
+    Parameters:
+    values (array-like, pd.Series or pd.Index): The labels.
+    freq (str): As for parse_periods.
+
+    Returns:
+    pd.DatetimeIndex: One timestamp per value, NaT where a value is missing or not a period.
+
+    DocTest:
+    >>> parse_dates(['2020Q2', '2020Q3']).strftime('%Y-%m-%d').tolist()
+    ['2020-04-01', '2020-07-01']
+    """
+    return parse_periods(values, freq).to_timestamp()
+
+
+# Unit tests compare with the per-row parsing of the loaders
+
+class TestParsePeriods(unittest.TestCase):
+    def test_ons_ranges_match_split_and_to_datetime(self):
+        labels = pd.Series([f'{month}{year}-{end}{year}' for year in range(2001, 2023)
+                            for month, end in zip(calendar.month_abbr[1:10], calendar.month_abbr[3:12])] * 3)
+        expected = pd.to_datetime(labels.str.split('-').str[0], format='%b%Y')
+        np.testing.assert_array_equal(parse_dates(labels).to_numpy(), expected.to_numpy())
+
+    def test_eurostat_and_world_bank_labels(self):
+        quarters = parse_periods(pd.Series(['2020Q1', '2020-Q4', '1999Q2'], name='time'))
+        self.assertEqual((quarters.freqstr, quarters.name), ('Q-DEC', 'time'))
+        self.assertEqual(quarters.astype(str).tolist(), ['2020Q1', '2020Q4', '1999Q2'])
+        years = parse_periods(pd.Index([1960, '1961', 1962.0, '1963 [YR1963]', 'Country Name']))
+        self.assertEqual(years.astype(str).tolist(), ['1960', '1961', '1962', '1963', 'NaT'])
+        with self.assertRaises(ValueError):
+            parse_periods(['2020Q1', '2020M01'])
+
+    def test_typed_inputs_and_month_labels(self):
+        dates = pd.Series(pd.to_datetime(['2020-05-17', None]))
+        self.assertEqual(parse_periods(dates, 'Q').astype(str).tolist(), ['2020Q2', 'NaT'])
+        self.assertEqual(parse_periods(pd.Series(pd.period_range('2020-01', periods=2, freq='M')), 'A').year.tolist(),
+                         [2020, 2020])
+        self.assertEqual(parse_month(pd.Index(calendar.month_abbr[1:])).tolist(), list(range(1, 13)))
+        self.assertEqual(parse_month(np.array(['M12', 'Dec.', 'Decembre', 'De', None], dtype=object)).tolist(),
+                         [12, 12, -1, -1, -1])
@@ -0,0 +1,562 @@
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sys
+import sysconfig
+import tempfile
+import types
+import unittest
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+# Node results are kept here as one pickle per node, named after the node and its key
+CACHE_DIR = os.environ.get('PIPELINE_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               '.pipeline_cache'))
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data')
+# Modules installed here are versioned by their packages rather than hashed
+LIBRARY_DIRS = tuple(os.path.realpath(sysconfig.get_paths()[name]) for name in ('stdlib', 'platstdlib', 'purelib',
+                                                                                  'platlib'))
+
+
+class Source(str):
+    """A file or directory argument. The node receives the path; its contents are part of the node's key."""
+
+
+class Ref(str):
+    """An argument naming another node. The node receives that node's result; its key is part of the node's key."""
+
+
+def references(value) -> list:
+    """The Refs an argument holds: itself, or the Refs in a list or tuple such as the objs of pandas.concat."""
+    if isinstance(value, Ref):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [item for item in value if isinstance(item, Ref)]
+    return []
+
+
+def hash_source(path: str) -> str:
+    """
+    Hashes the contents of a file, or the names and contents of every file under a directory.
+
+    Parameters:
+    path (str): The file or directory.
+
+    Returns:
+    str: A sha1 hex digest; touching a file without changing it keeps the digest.
+    """
+    digest = hashlib.sha1()
+    if os.path.isdir(path):
+        files = sorted(os.path.relpath(os.path.join(root, name), path) for root, _, names in os.walk(path)
+                       for name in names)
+    else:
+        files = ['']
+    for name in files:
+        digest.update(name.encode() + b'\0')
+        with open(os.path.join(path, name) if name else path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resolve(function: str):
+    """
+    Looks a function up by dotted name: a module-level function, as for excel_cache.resolve_reader, or an attribute
+    of a module-level class, such as 'pandas.DataFrame.reset_index', which is then called with self as an argument.
+
+    Parameters:
+    function (str): The dotted name.
+
+    Returns:
+    callable: The function.
+
+    DocTest:
+    >>> resolve('pandas.DataFrame.reset_index') is pd.DataFrame.reset_index
+    True
+    """
+    parts = function.split('.')
+    for split in range(len(parts) - 1, 0, -1):
+        try:
+            target = importlib.import_module('.'.join(parts[:split]))
+        except ImportError:
+            continue
+        for name in parts[split:]:
+            target = getattr(target, name)
+        return target
+    raise ImportError(f'No module found for {function!r}')
+
+
+def function_source(function: str) -> str:
+    """
+    The source code of a function given by dotted name, so that editing a step invalidates its results. Functions
+    without retrievable source (builtins, C extensions) are identified by name only.
+
+    Parameters:
+    function (str): The dotted name, e.g. 'main.process_eur_gdp'.
+
+    Returns:
+    str: The source, or '' when it cannot be retrieved.
+    """
+    try:
+        return inspect.getsource(resolve(function))
+    except (OSError, TypeError):
+        return ''
+
+
+def local_modules(function: str) -> list:
+    """
+    The project modules a function's code can reach: its own module and, transitively, every module outside the
+    standard library and site-packages that one of them imports or imports a name from. A node's key hashes their
+    files, so editing a helper such as growth.growth_rates or utils.read_xlsx_table invalidates the steps that
+    call it.
+
+    Parameters:
+    function (str): The dotted name.
+
+    Returns:
+    list: The modules' file paths, sorted; empty for library functions.
+    """
+    def local(module):
+        path = getattr(module, '__file__', None)
+        return path is not None and not os.path.realpath(path).startswith(LIBRARY_DIRS)
+
+    start = sys.modules.get(getattr(resolve(function), '__module__', None) or '')
+    found, queue = {}, [start] if start is not None and local(start) else []
+    while queue:
+        module = queue.pop()
+        if module.__file__ in found:
+            continue
+        found[module.__file__] = module
+        for value in list(vars(module).values()):
+            imported = value if isinstance(value, types.ModuleType) else \
+                sys.modules.get(getattr(value, '__module__', None) or '')
+            if imported is not None and local(imported) and imported.__file__ not in found:
+                queue.append(imported)
+    return sorted(found)
+
+
+def execute(function: str, kwargs: dict):
+    """
+    Calls a function given by dotted name; the unit of work sent to the worker processes.
+
+    Parameters:
+    function (str): The dotted name.
+    kwargs (dict): The resolved arguments.
+
+    Returns:
+    The function's result.
+    """
+    return resolve(function)(**kwargs)
+
+
+class Pipeline:
+    """
+    The loaders and calculate_* steps of the analysis as a graph of named nodes. Each node calls one function with
+    constant arguments, Source paths and Ref results of other nodes; its key hashes the function's code, the
+    files of the project modules it can reach, the constants, the contents of its sources and the keys of the nodes it reads, so a changed input file or step
+    changes the key of exactly the nodes downstream of it. Results are pickled under their key and reused by later
+    runs and other processes; nodes that must be computed run in parallel as soon as their inputs are available.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.nodes = {}
+        self.computed, self.loaded = [], []
+
+    def __repr__(self):
+        return f"Pipeline({len(self.nodes)} nodes, cache_dir={self.cache_dir!r})"
+
+    def add(self, name: str, function: str, /, **kwargs) -> Ref:
+        """
+        Adds a node.
+
+        Parameters:
+        name (str): The node name, unique in the pipeline.
+        function (str): The dotted name of the function, e.g. 'main.calculate_GDP_Growth'.
+        **kwargs: The function's arguments; Source and Ref values are resolved as described on the class. A method
+                  such as 'pandas.DataFrame.reset_index' takes its frame as self.
+
+        Returns:
+        Ref: A reference to the node, to pass to downstream nodes.
+        """
+        if name in self.nodes:
+            raise ValueError(f'The pipeline already has a node named {name!r}')
+        self.nodes[name] = (function, kwargs)
+        return Ref(name)
+
+    def dependencies(self, name: str) -> list:
+        """The names of the nodes a node reads."""
+        return [ref for value in self.nodes[name][1].values() for ref in references(value)]
+
+    def upstream(self, targets) -> list:
+        """
+        The nodes the targets need, targets included, in an order where each node follows its dependencies.
+
+        Parameters:
+        targets (iterable): Node names.
+
+        Returns:
+        list: The node names.
+        """
+        order, state = [], {}
+
+        def visit(name, path):
+            if name not in self.nodes:
+                raise KeyError(f'Unknown node {name!r}' + (f' read by {path[-1]!r}' if path else ''))
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Cycle in the pipeline: {' -> '.join(path + [name])}")
+            if name not in state:
+                state[name] = 'visiting'
+                for dependency in self.dependencies(name):
+                    visit(dependency, path + [name])
+                state[name] = 'done'
+                order.append(name)
+
+        for target in targets:
+            visit(target, [])
+        return order
+
+    def keys(self, targets=None) -> dict:
+        """
+        The content hash of every node the targets need.
+
+        Parameters:
+        targets (iterable): Node names; None means every node.
+
+        Returns:
+        dict: Node name to key.
+        """
+        keys, sources, modules = {}, {}, {}
+        for name in self.upstream(targets or list(self.nodes)):
+            function, kwargs = self.nodes[name]
+            if function not in modules:
+                modules[function] = local_modules(function)
+            for path in modules[function]:
+                if path not in sources:
+                    sources[path] = hash_source(path)
+            parts = [function, function_source(function), [sources[path] for path in modules[function]]]
+            for argument, value in sorted(kwargs.items()):
+                if isinstance(value, Source):
+                    if value not in sources:
+                        sources[value] = hash_source(value)
+                    parts.append([argument, 'source', sources[value]])
+                else:
+                    # Refs are replaced by their node's key and keep their position in a list argument
+                    parts.append([argument, repr(value), [keys[ref] for ref in references(value)]])
+            keys[name] = hashlib.sha1(json.dumps(parts).encode()).hexdigest()[:16]
+        return keys
+
+    def entry(self, name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{name}-{key}.pkl')
+
+    def stale(self, targets=None) -> list:
+        """
+        The nodes a run of the targets would compute, i.e. those without a result stored under their current key.
+
+        Parameters:
+        targets (iterable): Node names; None means every node.
+
+        Returns:
+        list: The node names, dependencies first.
+        """
+        return [name for name, key in self.keys(targets).items() if not os.path.exists(self.entry(name, key))]
+
+    def store(self, name: str, key: str, result):
+        """Pickles a result under its key, atomically, and removes the node's results under older keys."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.entry(name, key))
+        for entry in os.listdir(self.cache_dir):
+            if entry.startswith(f'{name}-') and entry.endswith('.pkl') and entry != f'{name}-{key}.pkl' \
+                    and entry[len(name) + 1:-4].isalnum():
+                os.remove(os.path.join(self.cache_dir, entry))
+
+    def load(self, name: str, key: str, default=None):
+        """The stored result of a node, or default when there is none or it cannot be read."""
+        try:
+            with open(self.entry(name, key), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return default
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # A truncated or unreadable entry is discarded, for the caller to recompute
+            os.remove(self.entry(name, key))
+            return default
+
+    def run(self, targets=None, max_workers: int = None) -> dict:
+        """
+        Computes the targets, reusing every stored result whose key is unchanged. Results of the nodes that are
+        needed are loaded only when a node to compute reads them or they are targets. The nodes computed and
+        loaded are recorded in self.computed and self.loaded.
+
+        Parameters:
+        targets (iterable): Node names; None means every node.
+        max_workers (int): The number of worker processes. Default is one per CPU; 1 computes in this process.
+
+        Returns:
+        dict: Target name to result.
+        """
+        targets = list(targets or self.nodes)
+        keys = self.keys(targets)
+        stale = set(self.stale(targets))
+        self.computed, self.loaded = [], []
+        results, missing = {}, object()
+
+        def result(name):
+            if name not in results:
+                value = self.load(name, keys[name], missing)
+                if value is missing:
+                    # The entry vanished or was unreadable since stale() saw it; compute it here instead
+                    finish(name, execute(self.nodes[name][0], arguments(name)))
+                else:
+                    results[name] = value
+                    self.loaded.append(name)
+            return results[name]
+
+        def resolve(value):
+            if isinstance(value, Ref):
+                return result(value)
+            if isinstance(value, Source):
+                return str(value)
+            if references(value):
+                return type(value)(resolve(item) for item in value)
+            return value
+
+        def arguments(name):
+            return {argument: resolve(value) for argument, value in self.nodes[name][1].items()}
+
+        def finish(name, value):
+            self.store(name, keys[name], value)
+            results[name] = value
+            self.computed.append(name)
+
+        pending = [name for name in keys if name in stale]
+        max_workers = min(max_workers or os.cpu_count() or 1, max(len(pending), 1))
+        if max_workers <= 1:
+            for name in pending:
+                finish(name, execute(self.nodes[name][0], arguments(name)))
+        else:
+            with ProcessPoolExecutor(max_workers) as pool:
+                running = {}
+                while pending or running:
+                    ready = [name for name in pending
+                             if not any(dependency in pending or dependency in running.values()
+                                        for dependency in self.dependencies(name))]
+                    for name in ready:
+                        pending.remove(name)
+                        running[pool.submit(execute, self.nodes[name][0], arguments(name))] = name
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(running.pop(future), future.result())
+        return {name: result(name) for name in targets}
+
+
+def analysis_pipeline(data_dir: str = DATA_DIR, cache_dir: str = None) -> Pipeline:
+    """
+    The loaders, steps and merges of the Final_Project notebooks, including the column drops and index resets the
+    notebooks do between them. The loaders read their directories with one worker, since the pipeline already runs
+    independent nodes in parallel.
+
+    Parameters:
+    data_dir (str): The data root.
+    cache_dir (str): Where results are stored; defaults to CACHE_DIR.
+
+    Returns:
+    Pipeline: The pipeline.
+    """
+    def source(*parts):
+        return Source(os.path.join(data_dir, *parts))
+
+    pipeline = Pipeline(cache_dir)
+    add = pipeline.add
+    # US GDP, unemployment by sex and GDP growth
+    gdp = add('gdp_raw', 'pandas.read_excel', io=source('unemploye rate by sex', 'GDP.xlsx'))
+    gdp = add('gdp', 'main.df_transit', gdp_df=gdp)
+    gdp = add('gdp_reset', 'pandas.DataFrame.reset_index', self=gdp, drop=False)
+    add('gdp_growth', 'main.calculate_GDP_Growth', gdp_df_tp_reset=gdp)
+    unemployment = add('unemployment_by_sex_raw', 'pandas.read_excel',
+                       io=source('unemploye rate by sex', 'unemployement rate by rate.xlsx'))
+    unemployment = add('unemployment_by_sex', 'main.process_unemployment_rate_df', unemployment_df=unemployment)
+    add('gdp_unemployment', 'pandas.merge', left=gdp, right=unemployment, on='index', how='outer')
+    # European Union GDP, population, unemployment and minimum wages
+    eur_gdp = add('eur_gdp_raw', 'pandas.read_excel', io=source('european data', 'European union GDP.xlsx'))
+    eur_gdp = add('eur_gdp', 'main.process_eur_gdp', eur_gdp_df=eur_gdp)
+    eur_unemp = add('eur_unemployment_raw', 'pandas.read_excel',
+                    io=source('european data', 'ueropean union unemployment rate.xlsx'))
+    eur_unemp = add('eur_unemployment', 'main.process_eur_unemp', eur_unemp_df=eur_unemp)
+    eur_merged = add('eur_gdp_unemployment', 'pandas.merge', left=eur_unemp, right=eur_gdp)
+    add('eur_gdp_growth', 'main.calculate_EU_GDP_Growth', euro_merged_df=eur_merged)
+    eur_population = add('eur_population_raw', 'pandas.read_excel',
+                         io=source('european data', 'European union population.xlsx'))
+    eur_population = add('eur_population_values', 'pandas.DataFrame.drop', self=eur_population,
+                         columns=['Unnamed: 1', 'Unnamed: 2', 'Unnamed: 3'])
+    eur_population = add('eur_population_tp', 'main.df_transit', gdp_df=eur_population)
+    eur_population = add('eur_population_named', 'pandas.DataFrame.set_axis', self=eur_population,
+                         labels=['Year', 'Population'], axis=1)
+    eur_population = add('eur_population', 'pandas.DataFrame.reset_index', self=eur_population, drop=True)
+    eur_merged = add('eur_population_unemployment', 'pandas.merge', left=eur_unemp, right=eur_population)
+    add('eur_population_growth', 'main.calculate_EU_population_growth', euro_merged_df=eur_merged)
+    min_wage = add('min_wage_raw', 'pandas.read_excel', io=source('european data', 'min wage hourly.xlsx'),
+                   skiprows=5)
+    min_wage = add('min_wage', 'pandas.DataFrame.drop', self=min_wage, columns=['Unnamed: 1'])
+    add('usa_min_wage', 'main.get_USA_wage_data', min_wage_df=min_wage)
+    add('eur_wage_avg', 'main.calculate_eur_wage_avg', min_wage_df=min_wage)
+    # Unemployment by presidency and state population
+    college = add('college_unemployment_raw', 'pandas.read_excel',
+                  io=source('Political Party and Unemployment', 'College-labor-data.xlsx'), sheet_name='unemployed',
+                  skiprows=10)
+    yearly = add('yearly_unemployment', 'main.read_and_process_yearly_unemp', df_unemp=college)
+    presidents = add('presidents', 'pandas.read_csv',
+                     filepath_or_buffer=source('Political Party and Unemployment', 'US presidents.csv'),
+                     dtype={'Years (after inauguration)': 'Int16'}, names=['Year', 'President', 'Party'], skiprows=1)
+    add('unemployment_by_president', 'pandas.merge', left=yearly, right=presidents, how='inner')
+    population = add('state_population_raw', 'pandas.read_csv',
+                     filepath_or_buffer=source('state population', 'statewise population.csv'))
+    add('state_population', 'main.process_state_population', df_state_population=population)
+    # Demographic and Eurostat unemployment tables
+    for name, directory, blank_row, year_range in (('age', 'Age', 11, (1980, 2024)),
+                                                    ('age_by_rate', 'Age(byRate)', 11, (1980, 2024)),
+                                                    ('race', 'Race', 12, (1980, 2024)),
+                                                    ('education', 'Education', 12, (2000, 2024))):
+        add(f'usbls_{name}', 'utils.concatenate_usbls_files', dir_path=source('USBLS', directory),
+            blank_row=blank_row, year_range=year_range, max_workers=1)
+    add('eurostat_age', 'utils.merge_eurostat_data', dir_path=source('Eurostat', 'Age'), max_workers=1)
+    china_education = add('china_educated_year_raw', 'pandas.read_excel',
+                          io=source('StatsGovCN', 'educated_year.xlsx'))
+    add('china_national', 'utils.process_StatsGovCN_data', china_educated_year=china_education,
+        unemployment_file_path=source('StatsGovCN', 'unemployment_rate.xlsx'))
+    return pipeline
+
+
+def cli():
+    parser = argparse.ArgumentParser(description='Builds the analysis tables, recomputing only what changed')
+    parser.add_argument('targets', nargs='*', help='Node names; all nodes by default')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--max-workers', type=int)
+    args = parser.parse_args()
+    pipeline = analysis_pipeline(args.data_dir, args.cache_dir)
+    pipeline.run(args.targets or None, args.max_workers)
+    print('Computed', pipeline.computed)
+    print('Loaded', pipeline.loaded)
+
+
+if __name__ == '__main__':
+    cli()
+
+
+# Unit tests build small pipelines over temporary files and count the nodes each run computes
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.pipeline = Pipeline(os.path.join(self.folder, 'cache'))
+        self.paths = {}
+        for name, values in (('a', [1, 2]), ('b', [10, 20])):
+            self.paths[name] = os.path.join(self.folder, f'{name}.csv')
+            pd.DataFrame({'value': values}).to_csv(self.paths[name], index=False)
+        add = self.pipeline.add
+        a = add('a', 'pandas.read_csv', filepath_or_buffer=Source(self.paths['a']))
+        b = add('b', 'pandas.read_csv', filepath_or_buffer=Source(self.paths['b']))
+        a_total = add('a_total', 'numpy.cumsum', a=a)
+        add('both', 'pandas.concat', objs=[a, b], ignore_index=True)
+        add('joined', 'pandas.merge', left=a, right=b, left_index=True, right_index=True)
+        add('capped', 'numpy.clip', a=a_total, a_min=0, a_max=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_reruns_reuse_results_and_a_changed_file_recomputes_its_dependents(self):
+        first = self.pipeline.run(['joined', 'capped'], max_workers=1)
+        self.assertEqual(first['joined'].values.tolist(), [[1, 10], [2, 20]])
+        self.assertEqual(first['capped']['value'].tolist(), [1, 2])
+        self.assertEqual(sorted(self.pipeline.computed), ['a', 'a_total', 'b', 'capped', 'joined'])
+        second = self.pipeline.run(['joined', 'capped'], max_workers=1)
+        self.assertEqual(self.pipeline.computed, [])
+        pd.testing.assert_frame_equal(second['joined'], first['joined'])
+        # A rewrite with the same contents keeps every key
+        pd.DataFrame({'value': [10, 20]}).to_csv(self.paths['b'], index=False)
+        self.assertEqual(self.pipeline.stale(), ['both'])
+        pd.DataFrame({'value': [10, 30]}).to_csv(self.paths['b'], index=False)
+        self.assertEqual(self.pipeline.stale(['joined', 'capped']), ['b', 'joined'])
+        third = self.pipeline.run(['joined', 'capped'], max_workers=1)
+        self.assertEqual(self.pipeline.computed, ['b', 'joined'])
+        self.assertEqual(third['joined']['value_y'].tolist(), [10, 30])
+        self.assertEqual(len(os.listdir(self.pipeline.cache_dir)), 5)
+
+    def test_changed_arguments_recompute_and_parallel_runs_agree(self):
+        parallel = self.pipeline.run(max_workers=3)
+        self.assertEqual(len(self.pipeline.computed), 6)
+        function, kwargs = self.pipeline.nodes['capped']
+        self.pipeline.nodes['capped'] = (function, dict(kwargs, a_max=1))
+        self.assertEqual(self.pipeline.stale(), ['capped'])
+        serial = Pipeline(os.path.join(self.folder, 'serial'))
+        serial.nodes = self.pipeline.nodes
+        for name, result in serial.run(max_workers=1).items():
+            if name != 'capped':
+                pd.testing.assert_frame_equal(result, parallel[name])
+        self.assertEqual(serial.run(['capped'])['capped']['value'].tolist(), [1, 1])
+
+    def test_corrupt_entries_are_recomputed(self):
+        self.pipeline.run(max_workers=1)
+        keys = self.pipeline.keys()
+        for name in ('a', 'a_total'):
+            with open(self.pipeline.entry(name, keys[name]), 'wb') as f:
+                f.write(b'not a pickle')
+        function, kwargs = self.pipeline.nodes['capped']
+        self.pipeline.nodes['capped'] = (function, dict(kwargs, a_max=1))
+        results = self.pipeline.run(['b', 'a', 'capped'], max_workers=1)
+        self.assertEqual(results['a']['value'].tolist(), [1, 2])
+        self.assertEqual(results['capped']['value'].tolist(), [1, 1])
+        self.assertEqual(sorted(self.pipeline.computed), ['a', 'a_total', 'capped'])
+        self.assertEqual(self.pipeline.stale(), [])
+
+    def test_edited_helper_modules_change_the_keys(self):
+        modules = os.path.join(self.folder, 'modules')
+        os.makedirs(modules)
+        with open(os.path.join(modules, 'pipeline_helper.py'), 'w') as f:
+            f.write('def scale(values):\n    return values * 2\n')
+        with open(os.path.join(modules, 'pipeline_step.py'), 'w') as f:
+            f.write('from pipeline_helper import scale\n\n\ndef double(frame):\n    return scale(frame)\n')
+        sys.path.insert(0, modules)
+        try:
+            self.pipeline.add('doubled', 'pipeline_step.double', frame=Ref('a'))
+            self.assertEqual(self.pipeline.run(['doubled'], max_workers=1)['doubled']['value'].tolist(), [2, 4])
+            self.assertEqual([os.path.basename(path) for path in local_modules('pipeline_step.double')],
+                             ['pipeline_helper.py', 'pipeline_step.py'])
+            self.assertEqual(local_modules('pandas.read_csv'), [])
+            with open(os.path.join(modules, 'pipeline_helper.py'), 'a') as f:
+                f.write('# scaled by two\n')
+            self.assertEqual(self.pipeline.stale(['doubled']), ['doubled'])
+        finally:
+            sys.path.remove(modules)
+            for name in ('pipeline_helper', 'pipeline_step'):
+                sys.modules.pop(name, None)
+
+    def test_unknown_nodes_and_cycles_are_rejected(self):
+        self.pipeline.add('loop', 'pandas.concat', objs=Ref('loop'))
+        with self.assertRaises(ValueError):
+            self.pipeline.keys(['loop'])
+        with self.assertRaises(KeyError):
+            self.pipeline.upstream(['missing'])
+        with self.assertRaises(ValueError):
+            self.pipeline.add('a', 'pandas.read_csv')
+
+    def test_analysis_pipeline_matches_the_notebook_steps(self):
+        import main
+        pipeline = analysis_pipeline(cache_dir=self.pipeline.cache_dir)
+        results = pipeline.run(['gdp_growth', 'eur_gdp_growth', 'usbls_race'], max_workers=1)
+        gdp = main.df_transit(pd.read_excel(os.path.join(DATA_DIR, 'unemploye rate by sex', 'GDP.xlsx')))
+        pd.testing.assert_frame_equal(results['gdp_growth'], main.calculate_GDP_Growth(gdp.reset_index(drop=False)))
+        self.assertIn('GDP_Growth', results['eur_gdp_growth'].columns)
+        self.assertEqual(list(results['usbls_race'].columns)[0], 'Asian')
+        pipeline.run(['gdp_growth', 'eur_gdp_growth', 'usbls_race'], max_workers=1)
+        self.assertEqual(pipeline.computed, [])
@@ -0,0 +1,193 @@
+import contextlib
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Catalog rows are refetched once they are older than this many seconds
+CATALOG_TTL = 7 * 24 * 3600
+
+# The servlet's catalog labels and the columns they are stored under
+CATALOG_FIELDS = {'Series Id:': 'series_id', 'Industry:': 'industry', 'Super Sector:': 'supersector',
+                  'Data Type:': 'data_type'}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS series (
+    series_id   TEXT PRIMARY KEY,
+    industry    TEXT,
+    supersector TEXT,
+    data_type   TEXT,
+    data_type_label TEXT,
+    fetched_at  REAL
+);
+CREATE INDEX IF NOT EXISTS series_industry ON series (industry);
+CREATE INDEX IF NOT EXISTS series_supersector ON series (supersector);
+CREATE INDEX IF NOT EXISTS series_data_type ON series (data_type);
+CREATE TABLE IF NOT EXISTS fetches (
+    query_key  TEXT PRIMARY KEY,
+    fetched_at REAL
+);
+'''
+
+
+# CES ids end in the two-digit data type code, e.g. 11 = average weekly earnings; None for other series
+def DataTypeCode(SeriesId):
+    if SeriesId and SeriesId.startswith('CE'):
+        return SeriesId[-2:]
+    return None
+
+
+# Parse only the <table class="catalog"> nodes of a catalog page; everything else is skipped by the strainer
+def ParseCatalog(html):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('table', class_='catalog'))
+    entries = []
+    for table in soup.find_all('table'):
+        entry = {column: None for column in CATALOG_FIELDS.values()}
+        for th in table.find_all('th'):
+            column = CATALOG_FIELDS.get(th.get_text(strip=True))
+            td = th.find_next_sibling('td')
+            if column and td is not None:
+                entry[column] = td.get_text(strip=True)
+        # The servlet's label is kept as given; data_type is always the code, so one vocabulary is indexed
+        entry['data_type_label'] = entry['data_type']
+        entry['data_type'] = DataTypeCode(entry['series_id'])
+        entries.append(entry)
+    return entries
+
+
+# Persistent, indexed index of known series so repeated runs look series up locally instead of re-fetching
+class SeriesCatalog:
+    def __init__(self, path = 'series_catalog.sqlite'):
+        self.path = path
+        with self.Connection() as connection:
+            connection.executescript(SCHEMA)
+            columns = [row[1] for row in connection.execute('PRAGMA table_info(series)')]
+            if 'data_type_label' not in columns:
+                # Catalogs written before the label had its own column stored it in data_type
+                connection.execute('ALTER TABLE series ADD COLUMN data_type_label TEXT')
+                connection.execute("UPDATE series SET data_type_label = data_type, data_type = substr(series_id, -2) "
+                                   "WHERE series_id LIKE 'CE%'")
+
+    def Connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # A connection that commits its statements, or rolls them back on error, and is closed on exit;
+    # `with sqlite3.connect()` alone only ends the transaction and leaks the handle
+    @contextlib.contextmanager
+    def Connection(self):
+        with contextlib.closing(self.Connect()) as connection, connection:
+            yield connection
+
+    @staticmethod
+    def QueryKey(seriesIds):
+        return hashlib.sha1('\n'.join(sorted(seriesIds)).encode()).hexdigest()
+
+    # True if the catalog for exactly these series ids was stored less than ttl seconds ago
+    def IsFresh(self, seriesIds, ttl = CATALOG_TTL):
+        with self.Connection() as connection:
+            row = connection.execute('SELECT fetched_at FROM fetches WHERE query_key = ?',
+                                     (self.QueryKey(seriesIds),)).fetchone()
+        return row is not None and time.time() - row[0] < ttl
+
+    def Store(self, seriesIds, entries):
+        now = time.time()
+        with self.Connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO series (series_id, industry, supersector, data_type, data_type_label, '
+                'fetched_at) VALUES (:series_id, :industry, :supersector, :data_type, :data_type_label, :fetched_at)',
+                [dict(entry, fetched_at=now) for entry in entries if entry['series_id']])
+            connection.execute('INSERT OR REPLACE INTO fetches (query_key, fetched_at) VALUES (?, ?)',
+                               (self.QueryKey(seriesIds), now))
+
+    # (Industry, SeriesId) pairs in the order DownloadTable takes them, filtered on any indexed column
+    # seriesIds go through a temporary table joined on the primary key, so any number of them fits in one query
+    def Lookup(self, seriesIds = None, industry = None, supersector = None, data_type = None):
+        clauses, parameters = [], []
+        for column, value in (('industry', industry), ('supersector', supersector), ('data_type', data_type)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                parameters.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self.Connection() as connection:
+            if seriesIds is None:
+                return connection.execute(f'SELECT industry, series_id FROM series{where}', parameters).fetchall()
+            connection.execute('CREATE TEMP TABLE wanted (series_id TEXT PRIMARY KEY, position INTEGER)')
+            connection.executemany('INSERT OR IGNORE INTO wanted VALUES (?, ?)',
+                                   [(SeriesId, i) for i, SeriesId in enumerate(seriesIds)])
+            return connection.execute(f'SELECT industry, series.series_id FROM series JOIN wanted USING (series_id)'
+                                      f'{where} ORDER BY wanted.position', parameters).fetchall()
+
+
+# Unit tests for the catalog parser and the SQLite index
+
+CATALOG_HTML = """
+<html><body><h2>Series Report</h2><table class="regular"><tr><th>Year</th><td>2024</td></tr></table>
+<table class="catalog"><tr><th>Series Id:</th><td>CES2000000011</td></tr>
+<tr><th>Super Sector:</th><td>Construction</td></tr><tr><th>Industry:</th><td>Construction</td></tr>
+<tr><th>Data Type:</th><td>AVERAGE WEEKLY EARNINGS OF ALL EMPLOYEES</td></tr></table>
+<table class="catalog"><tr><th>Series Id:</th><td>CES4422000011</td></tr>
+<tr><th>Super Sector:</th><td>Trade, transportation, and utilities</td></tr><tr><th>Industry:</th><td>Utilities</td></tr></table>
+</body></html>
+"""
+
+
+class TestSeriesCatalog(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.catalog = SeriesCatalog(os.path.join(self.folder, 'catalog.sqlite'))
+
+    def tearDown(self):
+        os.remove(self.catalog.path)
+        os.rmdir(self.folder)
+
+    def test_parse_only_catalog_tables(self):
+        entries = ParseCatalog(CATALOG_HTML)
+        self.assertEqual([(entry['industry'], entry['series_id']) for entry in entries],
+                         [('Construction', 'CES2000000011'), ('Utilities', 'CES4422000011')])
+        self.assertEqual(entries[1]['supersector'], 'Trade, transportation, and utilities')
+        self.assertEqual([(entry['data_type'], entry['data_type_label']) for entry in entries],
+                         [('11', 'AVERAGE WEEKLY EARNINGS OF ALL EMPLOYEES'), ('11', None)])
+
+    def test_lookup_by_indexed_columns(self):
+        seriesIds = ['CES4422000011', 'CES2000000011']
+        self.catalog.Store(seriesIds, ParseCatalog(CATALOG_HTML))
+        self.assertEqual(self.catalog.Lookup(seriesIds), [('Utilities', 'CES4422000011'), ('Construction', 'CES2000000011')])
+        self.assertEqual(self.catalog.Lookup(supersector='Construction'), [('Construction', 'CES2000000011')])
+        self.assertEqual(self.catalog.Lookup(industry='Utilities', data_type='11'), [('Utilities', 'CES4422000011')])
+        self.assertEqual(self.catalog.Lookup(data_type='11'), [('Construction', 'CES2000000011'),
+                                                               ('Utilities', 'CES4422000011')])
+
+    def test_labels_stored_in_data_type_are_migrated(self):
+        path = os.path.join(self.folder, 'old.sqlite')
+        with contextlib.closing(sqlite3.connect(path)) as connection, connection:
+            connection.executescript(SCHEMA.replace('    data_type_label TEXT,\n', ''))
+            connection.execute("INSERT INTO series VALUES ('CES2000000011', 'Construction', 'Construction', "
+                               "'AVERAGE WEEKLY EARNINGS OF ALL EMPLOYEES', 0)")
+        catalog = SeriesCatalog(path)
+        rows = catalog.Lookup(data_type='11')
+        with catalog.Connection() as connection:
+            label = connection.execute('SELECT data_type_label FROM series').fetchone()[0]
+        os.remove(path)
+        self.assertEqual((rows, label), ([('Construction', 'CES2000000011')], 'AVERAGE WEEKLY EARNINGS OF ALL EMPLOYEES'))
+
+    def test_lookup_of_more_ids_than_sqlite_variables(self):
+        seriesIds = [f'CES{i:010d}' for i in range(40000)]
+        self.catalog.Store(seriesIds, [{'series_id': SeriesId, 'industry': 'Industry', 'supersector': None,
+                                        'data_type': '11', 'data_type_label': None} for SeriesId in seriesIds])
+        rows = self.catalog.Lookup(seriesIds[::-1] + ['CES9999999999'], data_type='11')
+        self.assertEqual([row[1] for row in rows], seriesIds[::-1])
+
+    def test_ttl(self):
+        self.assertFalse(self.catalog.IsFresh(['CES2000000011']))
+        self.catalog.Store(['CES2000000011'], ParseCatalog(CATALOG_HTML)[:1])
+        self.assertTrue(self.catalog.IsFresh(['CES2000000011']))
+        self.assertFalse(self.catalog.IsFresh(['CES2000000011'], ttl=0))
+        self.assertFalse(self.catalog.IsFresh(['CES2000000011', 'CES4422000011']))
+
+
+if __name__ == '__main__':
+    unittest.main()
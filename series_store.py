@@ -0,0 +1,301 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import excel_cache
+import utils
+from periods import MONTHS, unpack_monthly_table
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data')
+# A built store is a directory holding values.npy and metadata.json
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.series_store')
+# The monthly Year x Jan..Dec directories the default store is built from, relative to Data/
+SOURCES = ['data-bls-gov/Average_Weekly_Earnings', 'data-bls-gov/Employees_Number', 'USBLS/Age', 'USBLS/Age(byRate)',
+           'USBLS/Education', 'USBLS/Race']
+FIELDS = ['source', 'industry', 'series_id', 'data_type']
+# '{Industry}_{CES id}' (Average_Weekly_Earnings) or '{Industry}+{CES id}' (Employees_Number) file names
+SERIES_NAME = re.compile(r'^(?P<industry>.+)[_+](?P<series_id>CE[SU]\d{8}\d{2})$')
+
+
+def describe_file(source: str, file_name: str) -> dict:
+    """
+    The metadata of the series held by one file, taken from its directory and name. The data type of a CES id is
+    its last two digits (01 all employees, 11 average weekly earnings, ...), as in series_catalog; files named by a
+    label only (the USBLS demographic tables) have the label as series id and no industry or data type.
+
+    Parameters:
+    source (str): The directory, relative to the data root.
+    file_name (str): The file name, including the extension.
+
+    Returns:
+    dict: source, industry, series_id and data_type.
+
+    DocTest:
+    >>> describe_file('data-bls-gov/Employees_Number', 'Construction+CES2000000001.xlsx')['data_type']
+    '01'
+    >>> describe_file('USBLS/Race', 'Asian.xlsx')
+    {'source': 'USBLS/Race', 'industry': None, 'series_id': 'Asian', 'data_type': None}
+    """
+    stem = os.path.splitext(file_name)[0]
+    match = SERIES_NAME.match(stem)
+    if match is None:
+        return {'source': source, 'industry': None, 'series_id': stem, 'data_type': None}
+    return {'source': source, 'industry': match['industry'], 'series_id': match['series_id'],
+            'data_type': match['series_id'][-2:]}
+
+
+def read_table(dir_path: str, file_name: str) -> pd.DataFrame:
+    """
+    Reads one Year x Jan..Dec table through the Excel cache, for use with utils.read_files_parallel.
+
+    Parameters:
+    dir_path (str): The directory path where the Excel file is located.
+    file_name (str): The name of the Excel file, including the extension.
+
+    Returns:
+    pd.DataFrame: The table as returned by utils.read_xlsx_table.
+    """
+    return excel_cache.cached_read('utils.read_xlsx_table', os.path.join(dir_path, file_name), header_label='Year')
+
+
+class SeriesStore:
+    """
+    Every monthly series of the data directories as one float64 matrix, series x month, on a common monthly axis,
+    with the series metadata as integer-coded categoricals alongside. Saved, the matrix is a plain .npy file that
+    open maps into memory, so opening is independent of the number of series and a query only reads the rows and
+    months it selects.
+    """
+
+    def __init__(self, values: np.ndarray, start, metadata: pd.DataFrame):
+        self.values = values
+        self.start = pd.Period(start, 'M')
+        self.metadata = metadata.reset_index(drop=True)
+
+    def __repr__(self):
+        return (f"SeriesStore({self.values.shape[0]} series x {self.values.shape[1]} months, "
+                f"{self.start}..{self.start + (self.values.shape[1] - 1)})")
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    @property
+    def periods(self) -> pd.PeriodIndex:
+        """The monthly axis of the matrix."""
+        return pd.period_range(self.start, periods=self.values.shape[1], freq='M')
+
+    @classmethod
+    def from_tables(cls, tables: list, metadata: list) -> 'SeriesStore':
+        """
+        Lays Year x Jan..Dec tables out on one monthly axis, from January of the earliest year to December of the
+        latest. Months a table does not cover are NaN.
+
+        Parameters:
+        tables (list): The tables, each with a Year column and month columns.
+        metadata (list): One dict of FIELDS per table.
+
+        Returns:
+        SeriesStore: The store, held in memory.
+
+        DocTest:
+        >>> store = SeriesStore.from_tables(
+        ...     [pd.DataFrame({'Year': [2020.0], 'Jan': [1.0], 'Feb': [2.0]}),
+        ...      pd.DataFrame({'Year': [2019, 2021], 'Dec': [3.0, 4.0]})],
+        ...     [{'source': 'a', 'series_id': 'x'}, {'source': 'b', 'series_id': 'y'}])
+        >>> store
+        SeriesStore(2 series x 36 months, 2019-01..2021-12)
+        >>> store.query('2019-12', '2020-02').droplevel(['source', 'industry', 'data_type'], axis=1)
+        series_id    x    y
+        2019-12    NaN  3.0
+        2020-01    1.0  NaN
+        2020-02    2.0  NaN
+        """
+        years = [table['Year'].to_numpy(dtype=np.int64) for table in tables]
+        first = min(int(year.min()) for year in years)
+        last = max(int(year.max()) for year in years)
+        values = np.full((len(tables), (last - first + 1) * 12), np.nan)
+        for row, table in enumerate(tables):
+            _, ordinals, cells = unpack_monthly_table(table)
+            # Column of each cell of the table's Year x month block on the store's monthly axis
+            values[row, (ordinals - (first - 1970) * 12).ravel()] = cells.ravel()
+        frame = pd.DataFrame(list(metadata)).reindex(columns=FIELDS)
+        frame = frame.astype(object).where(frame.notna(), None).astype('category')
+        return cls(values, pd.Period(f'{first}-01', 'M'), frame)
+
+    @classmethod
+    def from_directories(cls, sources: list = None, data_dir: str = DATA_DIR, max_workers: int = None) -> 'SeriesStore':
+        """
+        Reads every Excel file of the source directories, in parallel and through the Excel cache.
+
+        Parameters:
+        sources (list): Directories relative to data_dir; defaults to SOURCES.
+        data_dir (str): The data root.
+        max_workers (int): Passed to utils.read_files_parallel.
+
+        Returns:
+        SeriesStore: The store, held in memory.
+        """
+        tables, metadata = [], []
+        for source in sources or SOURCES:
+            dir_path = os.path.join(data_dir, source)
+            file_names = sorted(name for name in os.listdir(dir_path) if name.endswith(excel_cache.EXCEL_EXTENSIONS))
+            tables += utils.read_files_parallel(read_table, dir_path, file_names, max_workers=max_workers)
+            metadata += [describe_file(source.replace(os.sep, '/'), name) for name in file_names]
+        return cls.from_tables(tables, metadata)
+
+    def save(self, path: str = STORE_DIR) -> str:
+        """
+        Writes the matrix as values.npy and the metadata codes, categories and start month as metadata.json.
+        Each file is written next to its destination and moved into place, so readers never see a partial file.
+
+        Parameters:
+        path (str): The store directory; created if missing.
+
+        Returns:
+        str: path.
+        """
+        os.makedirs(path, exist_ok=True)
+        metadata = {'start': str(self.start), 'fields': {
+            field: {'categories': self.metadata[field].cat.categories.tolist(),
+                    'codes': self.metadata[field].cat.codes.tolist()} for field in self.metadata.columns}}
+        for name, write in (('values.npy', lambda f: np.save(f, np.ascontiguousarray(self.values))),
+                            ('metadata.json', lambda f: f.write(json.dumps(metadata).encode()))):
+            fd, temporary = tempfile.mkstemp(dir=path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(temporary, os.path.join(path, name))
+        return path
+
+    @classmethod
+    def open(cls, path: str = STORE_DIR, mmap: bool = True) -> 'SeriesStore':
+        """
+        Opens a saved store.
+
+        Parameters:
+        path (str): The store directory.
+        mmap (bool): Whether the matrix is memory-mapped read-only (the default) or read into memory.
+
+        Returns:
+        SeriesStore: The store.
+        """
+        with open(os.path.join(path, 'metadata.json')) as f:
+            metadata = json.load(f)
+        frame = pd.DataFrame({field: pd.Categorical.from_codes(entry['codes'], categories=entry['categories'])
+                              for field, entry in metadata['fields'].items()})
+        values = np.load(os.path.join(path, 'values.npy'), mmap_mode='r' if mmap else None)
+        return cls(values, metadata['start'], frame)
+
+    def select(self, **filters) -> np.ndarray:
+        """
+        The positions of the series whose metadata fields equal the given values (or are in the given lists),
+        found by comparing integer codes.
+
+        Parameters:
+        **filters: Metadata field to value or list of values.
+
+        Returns:
+        np.ndarray: The matching series positions.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for field, value in filters.items():
+            wanted = value if isinstance(value, (list, tuple, set)) else [value]
+            column = self.metadata[field]
+            mask &= np.isin(column.cat.codes.to_numpy(), column.cat.categories.get_indexer(list(wanted)))
+        return np.flatnonzero(mask)
+
+    def query(self, start=None, end=None, **filters) -> pd.DataFrame:
+        """
+        A month x series table of the selected series over a date range.
+
+        Parameters:
+        start: The first month ('2020-01', a Period or a date); None means the first month of the store.
+        end: The last month, included; None means the last month of the store.
+        **filters: As for select.
+
+        Returns:
+        pd.DataFrame: float64 values on a monthly PeriodIndex, with the metadata fields as column levels.
+        """
+        rows = self.select(**filters)
+        first = 0 if start is None else max(pd.Period(start, 'M').ordinal - self.start.ordinal, 0)
+        last = self.values.shape[1] if end is None else max(pd.Period(end, 'M').ordinal - self.start.ordinal + 1, 0)
+        block = np.asarray(self.values[rows, first:last])
+        columns = pd.MultiIndex.from_frame(self.metadata.iloc[rows])
+        return pd.DataFrame(block.T, index=self.periods[first:last], columns=columns)
+
+    def series(self, series_id: str, start=None, end=None, **filters) -> pd.Series:
+        """
+        One series over a date range.
+
+        Parameters:
+        series_id (str): The series id, e.g. 'CES2000000001' or 'Asian'.
+        start, end: As for query.
+        **filters: Further fields (e.g. source) when the id alone is ambiguous.
+
+        Returns:
+        pd.Series: float64 values on a monthly PeriodIndex, named series_id.
+        """
+        table = self.query(start, end, series_id=series_id, **filters)
+        if table.shape[1] != 1:
+            raise ValueError(f'{series_id!r} {filters} matches {table.shape[1]} series, expected one')
+        return table.iloc[:, 0].rename(series_id)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description='Memory-mapped store of the monthly series under Data/')
+    parser.add_argument('data_dir', nargs='?', default=DATA_DIR)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+    print(SeriesStore.from_directories(data_dir=args.data_dir).save(args.store_dir))
+    print(SeriesStore.open(args.store_dir))
+
+
+if __name__ == '__main__':
+    cli()
+
+
+# Unit tests build a store from the earnings tables and check it against their summary csv
+
+class TestSeriesStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.store = SeriesStore.from_directories(['data-bls-gov/Average_Weekly_Earnings', 'USBLS/Race'], max_workers=1)
+        cls.summary = pd.read_csv(os.path.join(DATA_DIR, 'data-bls-gov', 'Average_Weekly_Earnings_summary.csv'))
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_matches_the_summary_table(self):
+        for ces, table in self.summary.groupby('CES'):
+            series = self.store.series(ces)
+            expected = table[MONTHS].to_numpy().ravel()
+            months = pd.period_range(f"{table['Year'].min()}-01", periods=len(expected), freq='M')
+            np.testing.assert_array_equal(series[months].to_numpy(), expected)
+        self.assertEqual(set(self.store.metadata['data_type'].dropna()), {'11'})
+
+    def test_saved_store_is_memory_mapped_and_queries_agree(self):
+        opened = SeriesStore.open(self.store.save(self.folder))
+        self.assertIsInstance(opened.values, np.memmap)
+        self.assertEqual(opened.start, self.store.start)
+        pd.testing.assert_frame_equal(opened.metadata, self.store.metadata)
+        for filters in ({}, {'source': 'USBLS/Race'}, {'industry': ['Construction', 'Mining and logging']}):
+            pd.testing.assert_frame_equal(opened.query('2015-06', '2016-05', **filters),
+                                          self.store.query('2015-06', '2016-05', **filters))
+
+    def test_query_by_date_range_and_metadata(self):
+        table = self.store.query('2020-03', '2020-05', industry='Construction')
+        self.assertEqual(table.index.astype(str).tolist(), ['2020-03', '2020-04', '2020-05'])
+        self.assertEqual(table.columns.get_level_values('series_id').tolist(), ['CES2000000011'])
+        self.assertEqual(self.store.query('1900-01', '1900-12').shape[0], 0)
+        self.assertEqual(len(self.store.select(source='USBLS/Race')), len(os.listdir(os.path.join(DATA_DIR, 'USBLS',
+                                                                                                   'Race'))))
+        with self.assertRaises(ValueError):
+            self.store.series('nonexistent')
@@ -0,0 +1,63 @@
+import io
+
+import openpyxl
+
+# The xlsx layouts of the BLS servlet, shared by the scraper and the stand-in server that mimics it
+
+
+# Rows of a downloaded table as (header, {Year: [Jan..Dec values]}); source is a path or the raw xlsx bytes
+def ReadSeriesTable(source):
+    workbook = openpyxl.load_workbook(io.BytesIO(source) if isinstance(source, bytes) else source, read_only=True)
+    header, rows = None, {}
+    sheet = workbook.worksheets[0]
+    # Some BLS exports carry a stale dimension tag that makes read-only mode stop after the first row
+    sheet.reset_dimensions()
+    for values in sheet.iter_rows(values_only=True):
+        if header is None:
+            if values and values[0] == 'Year':
+                header = list(values)
+        elif values and isinstance(values[0], (int, float)):
+            rows[int(values[0])] = PadRow(values, header)
+    workbook.close()
+    return header, rows
+
+
+# Month values of a year row, padded with None where the sheet stores no trailing cells
+def PadRow(values, header):
+    months = list(values[1:len(header)])
+    return months + [None] * (len(header) - 1 - len(months))
+
+
+# Serialise rows back into the same single-sheet layout the servlet returns
+def WriteSeriesTable(header, rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'BLS Data Series'
+    sheet.append(header)
+    for year in sorted(rows):
+        sheet.append([year] + rows[year])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+# Split a multi-series report into {SeriesId: (header, rows)}: every 'Series Id:' line opens a block whose
+# 'Year' header row and year rows follow, whether the blocks are stacked on one sheet or one per sheet
+def SplitSeriesReport(content):
+    workbook = openpyxl.load_workbook(io.BytesIO(content), read_only=True)
+    tables, current = {}, None
+    for sheet in workbook.worksheets:
+        sheet.reset_dimensions()
+        for values in sheet.iter_rows(values_only=True):
+            if not values or values[0] is None:
+                continue
+            if values[0] == 'Series Id:':
+                current = tables[str(values[1]).strip()] = [None, {}]
+            elif current is None:
+                continue
+            elif values[0] == 'Year':
+                current[0] = list(values)
+            elif current[0] is not None and isinstance(values[0], (int, float)):
+                current[1][int(values[0])] = PadRow(values, current[0])
+    workbook.close()
+    return {SeriesId: (header, rows) for SeriesId, (header, rows) in tables.items() if header is not None}
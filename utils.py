@@ -1,6 +1,14 @@
 import pandas as pd
+import openpyxl
 import os
-import calendar
+import csv
+import gzip
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+import dimensions
+import excel_cache
+import periods
 
 # Define global variable:
 isced_education_mapping = {
@@ -40,19 +48,100 @@ education_level_order = [
     "Doctoral degree"
 ]
 
+# The country names of the OECD Education at a Glance exports that are not in european_countries, under both the
+# older and the current OECD spellings, and the cross-country averages those exports carry as rows
+oecd_countries = [
+    'Argentina', 'Australia', 'Brazil', 'Canada', 'Chile', "China (People's Republic of)", 'China', 'Colombia',
+    'Costa Rica', 'Czechia', 'India', 'Indonesia', 'Israel', 'Japan', 'Korea', 'Mexico', 'New Zealand', 'Peru',
+    'Saudi Arabia', 'Slovak Republic', 'South Africa', 'Türkiye', 'United States',
+    'OECD average', 'EU22 average', 'EU25 average', 'Partner average', 'G20 average'
+]
+
+# ISCED levels of those exports that have no generic education level
+unmapped_isced_levels = ['All levels of education', 'Total', 'Early childhood education']
+
+# Integer-coded vocabularies of the loaders, shared through the dimensions registry. They are closed, so every
+# process gives a label the same code whatever order it reads files in; read_oecd_csv rejects labels not listed here
+COUNTRY = dimensions.register('country', european_countries + oecd_countries)
+EUROPEAN_COUNTRY = dimensions.register('european_country', european_countries)
+ISCED_LEVEL = dimensions.register('isced_level', list(isced_education_mapping) + unmapped_isced_levels)
+EDUCATION_LEVEL = dimensions.register('education_level', education_level_order, ordered=True)
+UK_ETHNICITY = dimensions.register('uk_ethnicity', ['Asian', 'Black', 'White', 'Mixed', 'Other'])
+
+
+def read_xlsx_table(full_path, header_label: str = 'Year', header_row: int = None) -> pd.DataFrame:
+    """
+    Streams the first sheet of a BLS or Eurostat Excel export in read-only mode and materialises only its data table.
+    The header row is the first row whose first cell is header_label (or row header_row, 0-indexed, when given);
+    the table ends at the first blank row, where both sources start their footnotes. Columns with an empty header,
+    such as Eurostat's observation flags, and rows without any value, such as its 'GEO (Labels)' line, are skipped,
+    and the value cells are parsed into float64 columns with placeholders like ':' becoming NaN.
+
+    Parameters:
+    full_path (str or file-like): The Excel file.
+    header_label (str): The first cell of the header row, 'Year' for BLS and 'TIME' for Eurostat exports.
+    header_row (int): The 0-indexed header row; None finds it by header_label.
+
+    Returns:
+    pandas.DataFrame: One row per data row, with the label column (named header_label) first, then one float64
+                      column per header cell.
+
+    DocTest:
+    >>> import io
+    >>> workbook = openpyxl.Workbook()
+    >>> for row in [['Dataset:', 'une_rt_a'], [], ['TIME', '2021', '', '2022', ''], ['GEO (Labels)', '', '', '', ''],
+    ...             ['EU', 16.6, 'b', 14.5, ''], [], ['Special value'], [':', 'not available']]:
+    ...     workbook.active.append(row)
+    >>> buffer = io.BytesIO()
+    >>> workbook.save(buffer)
+    >>> read_xlsx_table(buffer, header_label='TIME')
+      TIME  2021  2022
+    0   EU  16.6  14.5
+    """
+    workbook = openpyxl.load_workbook(full_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        # Exports often carry stale dimensions that would cut read-only iteration short
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        header = None
+        for index, row in enumerate(rows):
+            first = row[0] if row else None
+            if index == header_row or (header_row is None and isinstance(first, str) and first.strip() == header_label):
+                header = row
+                break
+        if header is None:
+            raise ValueError(f"No '{header_label}' header row in {full_path}")
+        keep = [i for i, name in enumerate(header) if i > 0 and name not in (None, '')]
+        labels, values = [], []
+        for row in rows:
+            if not row or row[0] in (None, ''):
+                break
+            cells = [row[i] if i < len(row) else None for i in keep]
+            if all(cell in (None, '') for cell in cells):
+                continue
+            labels.append(row[0])
+            values.append(cells)
+    finally:
+        workbook.close()
+    columns = [str(header[i]).strip() for i in keep]
+    df = pd.DataFrame(values, columns=columns, dtype=object).apply(pd.to_numeric, errors='coerce').astype('float64')
+    df.insert(0, str(header[0]).strip(), labels)
+    return df
+
 
-def read_usbls_data(dir_path: str, file_name: str, blank_row: int) -> pd.DataFrame:
+def read_usbls_data(dir_path: str, file_name: str, blank_row: int = None) -> pd.DataFrame:
     """
        Reads an Excel file containing US Bureau of Labor Statistics data from the specified directory,
-       skips the rows up to the specified blank row, and restructures the data into a long format with
+       locates the 'Year' header row, and restructures the data into a long format with
        months and corresponding values under each age group (inferred from the file name) as columns.
 
        Parameters:
        dir_path (str): The directory path where the Excel file is located.
        file_name (str): The name of the Excel file, including the extension. The part before the extension
                         is used to label the data column for the age group.
-       blank_row (int): The number of initial rows to skip in the Excel file (0-indexed), typically used to
-                        skip header information or blank rows.
+       blank_row (int): The number of initial rows to skip in the Excel file (0-indexed), i.e. the row of the
+                        'Year' header. Default None finds the header row from the sheet layout.
 
        Returns:
        pandas.DataFrame: A DataFrame indexed by 'Year' and 'Month' columns, with one additional column
@@ -61,8 +150,10 @@ def read_usbls_data(dir_path: str, file_name: str, blank_row: int) -> pd.DataFra
        """
     # Construct the full file path
     full_path = os.path.join(dir_path, file_name)
-    # Read the Excel file
-    df = pd.read_excel(full_path, skiprows=blank_row)
+    # Read only the year rows of the Excel file, parsed once and then served from the columnar cache
+    options = {'header_label': 'Year'} if blank_row is None else {'header_label': 'Year', 'header_row': blank_row}
+    df = excel_cache.cached_read('utils.read_xlsx_table', full_path, **options)
+    df['Year'] = df['Year'].astype('int64')
 
     month_column = df.columns.tolist()
     month_column.remove('Year')
@@ -74,37 +165,98 @@ def read_usbls_data(dir_path: str, file_name: str, blank_row: int) -> pd.DataFra
     return df
 
 
-def concatenate_usbls_files(dir_path: str, blank_row: int, year_range: tuple = (1980, 2024)):
+def list_excel_files(dir_path: str) -> list:
+    """
+    Lists the Excel files in a directory in sorted order, skipping Office lock files, so that loaders
+    produce the same columns in the same order on every platform.
+
+    Parameters:
+    dir_path (str): The directory path to list.
+
+    Returns:
+    list: The sorted Excel file names.
+    """
+    return sorted(file_name for file_name in os.listdir(dir_path)
+                  if file_name.endswith(('.xlsx', '.xls')) and not file_name.startswith('~$'))
+
+
+def read_files_parallel(reader, dir_path: str, file_names: list, *args, max_workers: int = None) -> list:
+    """
+    Calls reader(dir_path, file_name, *args) for every file name, in a process pool when there is more than one
+    file and more than one worker, so the Excel parsing of a large directory runs on all cores.
+
+    Parameters:
+    reader (callable): A module-level function taking (dir_path, file_name, *args) and returning a DataFrame.
+    dir_path (str): The directory path where the files are located.
+    file_names (list): The file names to read.
+    *args: Extra arguments passed on to reader.
+    max_workers (int): The number of worker processes. Default is one per CPU; 1 reads in this process.
+
+    Returns:
+    list: The DataFrames, in the order of file_names.
+    """
+    max_workers = min(max_workers or os.cpu_count() or 1, len(file_names))
+    if max_workers <= 1:
+        return [reader(dir_path, file_name, *args) for file_name in file_names]
+    with ProcessPoolExecutor(max_workers) as pool:
+        futures = [pool.submit(reader, dir_path, file_name, *args) for file_name in file_names]
+        return [future.result() for future in futures]
+
+
+def read_usbls_monthly(dir_path: str, file_name: str, blank_row: int) -> pd.DataFrame:
+    """
+    Reads one US Bureau of Labor Statistics file with read_usbls_data and replaces the month abbreviations in the
+    index with month numbers, ready to be aligned with the other files of a directory.
+
+    Parameters:
+    dir_path (str): The directory path where the Excel file is located.
+    file_name (str): The name of the Excel file, including the extension.
+    blank_row (int): The number of initial rows to skip in the Excel file.
+
+    Returns:
+    pandas.DataFrame: A DataFrame indexed by 'Year' and numeric 'Month'.
+    """
+    df = read_usbls_data(dir_path, file_name, blank_row)
+    # The abbreviations are parsed once per distinct level value, not once per row
+    months = periods.parse_month(df.index.levels[df.index.names.index('Month')])
+    return df.set_axis(df.index.set_levels(months, level='Month'))
+
+
+def concatenate_usbls_files(dir_path: str, blank_row: int = None, year_range: tuple = (1980, 2024),
+                            max_workers: int = None):
     """
     Reads multiple Excel files from a specified directory, each containing US Bureau of Labor Statistics data.
     Each file is processed to skip the initial rows up to the specified blank row and restructured into a long format.
-    The data from all files is then concatenated into a single DataFrame.
+    The files are parsed in parallel and aligned on (Year, Month) in a single concatenation, with one column per
+    file in file name order.
 
     Parameters:
     dir_path (str): The directory path where the Excel files are located.
     blank_row (int): The number of initial rows to skip in the Excel files (0-indexed), typically used to
-                     skip header information or blank rows.
+                     skip header information or blank rows. Default None finds the header row in each file.
     year_range (tuple): A tuple containing the start and end years for filtering the data. Default is (1980, 2024).
+    max_workers (int): The number of worker processes used to parse the files. Default is one per CPU.
 
     Returns:
     pandas.DataFrame: A DataFrame indexed by 'Year' and 'Month' columns, with additional columns
                       representing the unemployment rate for the specific age groups, labeled by the file name prefix.
                       The DataFrame includes data from all the Excel files in the specified directory.
+
+    DocTest:
+    >>> race_dir = os.path.join(os.path.dirname(__file__), 'Data', 'USBLS', 'Race')
+    >>> df = concatenate_usbls_files(race_dir, max_workers=2)
+    >>> list(df.columns)
+    ['Asian', 'Black or African American', 'Hispanic or Latino', 'White']
+    >>> df.loc[(1980, 1)].tolist()
+    [nan, 13.2, 8.7, 6.1]
+    >>> df.equals(concatenate_usbls_files(race_dir, blank_row=12, max_workers=1))
+    True
     """
     start_year, end_year = year_range
-    combined_df = None
-    files = os.listdir(dir_path)
-    month_to_num = {name[:3]: num for num, name in enumerate(calendar.month_abbr) if num}
-    for file in files:
-        df = read_usbls_data(dir_path, file, blank_row)
-        df.reset_index(inplace=True)
-        df['Month'] = df['Month'].map(month_to_num)
-        df.set_index(['Year', 'Month'], inplace=True)
-        if combined_df is None:
-            combined_df = df
-        else:
-            combined_df = pd.merge(combined_df, df, left_index=True, right_index=True, how='right')
-    combined_df.sort_index(inplace=True)
+    frames = read_files_parallel(read_usbls_monthly, dir_path, list_excel_files(dir_path), blank_row,
+                                 max_workers=max_workers)
+    # One outer join on the shared (Year, Month) index instead of a merge per file
+    combined_df = pd.concat(frames, axis=1, join='outer', sort=True)
     # Filter the data based on the year range
     combined_df = combined_df.loc[start_year:end_year]
     return combined_df
@@ -112,8 +264,8 @@ def concatenate_usbls_files(dir_path: str, blank_row: int, year_range: tuple = (
 
 def read_eurostat_data(dir_path: str, file_name: str) -> pd.DataFrame:
     """
-    Reads an Excel file containing Eurostat data from the specified directory,
-    removes unnecessary rows and columns, and restructures the data into a long format with
+    Reads an Excel file containing Eurostat data from the specified directory, keeping only the 'TIME' table
+    between the metadata header and the footnotes, and restructures the data into a long format with
     'Year' as the index and the file name prefix as the column name.
 
     Parameters:
@@ -122,42 +274,208 @@ def read_eurostat_data(dir_path: str, file_name: str) -> pd.DataFrame:
                      is used to label the data column.
 
     Returns:
-    pandas.DataFrame: A DataFrame indexed by 'Year', with one additional column
+    pandas.DataFrame: A DataFrame indexed by integer 'Year', with one additional float column
                       representing the unemployment rate, labeled by the file name prefix.
     """
     full_path = os.path.join(dir_path, file_name)
-    df_eu_age = pd.read_excel(full_path, skiprows=10)
-    df_eu_age = df_eu_age.iloc[1:-5]  # Remove last 5 rows
-    df_eu_age = df_eu_age.filter(regex='^(?!Unnamed)')  # Remove Unnamed columns
+    df_eu_age = excel_cache.cached_read('utils.read_xlsx_table', full_path, header_label='TIME')
     df_eu_age = df_eu_age.drop('TIME', axis=1)
     df_eu_age = df_eu_age.melt(var_name='Year', value_name=file_name.split('.')[0])
+    df_eu_age['Year'] = df_eu_age['Year'].astype('int64')
     df_eu_age.set_index('Year', inplace=True)
     return df_eu_age
 
 
-def merge_eurostat_data(dir_path: str) -> pd.DataFrame:
+def open_eurostat_bulk(source):
+    """
+    Opens a Eurostat bulk download for streaming text reads, decompressing gzip on the fly.
+
+    Parameters:
+    source (str or binary file-like): A path ending in '.gz' for compressed files, or an open binary stream,
+                                      whose gzip header is detected.
+
+    Returns:
+    A text stream to iterate line by line.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if str(source).endswith('.gz'):
+            return gzip.open(source, 'rt', encoding='utf-8')
+        return open(source, encoding='utf-8', newline='')
+    magic = source.read(2)
+    source.seek(0)
+    if magic == b'\x1f\x8b':
+        return gzip.open(source, 'rt', encoding='utf-8')
+    return io.TextIOWrapper(source, encoding='utf-8', newline='')
+
+
+def parse_eurostat_value(cell: str) -> float:
+    """
+    Parses one Eurostat observation such as '20.2 b' (value and flags) or ': c' (not available) into a float.
+
+    Parameters:
+    cell (str): The observation text.
+
+    Returns:
+    float: The value, or NaN when it is not available.
+
+    DocTest:
+    >>> parse_eurostat_value('20.2 b'), parse_eurostat_value(': c')
+    (20.2, nan)
+    """
+    try:
+        return float(cell.strip().split(' ')[0])
+    except ValueError:
+        return float('nan')
+
+
+# The series the Eurostat Excel exports under Data/Eurostat/Age hold: annual rates in percent of the labour force,
+# both sexes, all ISCED levels, for the EU as of 2020
+EUROSTAT_DEFAULT_CODES = {'freq': 'A', 'unit': 'PC_ACT', 'sex': 'T', 'isced11': 'TOTAL', 'geo': 'EU27_2020'}
+
+
+def read_eurostat_bulk(source, filters: dict = None, column_dimension: str = 'age',
+                       defaults: dict = EUROSTAT_DEFAULT_CODES) -> pd.DataFrame:
+    """
+    Streams a Eurostat bulk download, either the tab-separated format ('freq,age,unit,sex,geo\\TIME_PERIOD' header,
+    one row per series, one column per period) or SDMX-CSV (one observation per line with TIME_PERIOD and OBS_VALUE
+    columns), plain or gzip-compressed. Lines are filtered on their dimension codes as they are read, so only the
+    selected series are ever parsed or held in memory.
+
+    Parameters:
+    source (str or binary file-like): The bulk file, e.g. 'une_rt_a.tsv.gz'.
+    filters (dict): Maps a dimension to the code or list of codes to keep, e.g. {'sex': 'T', 'geo': 'EU27_2020'}.
+    column_dimension (str or list): The dimension(s) whose codes label the output columns; the filters must leave
+                                    one series per label.
+    defaults (dict): The code kept for each dimension of the file that is neither in filters nor a column
+                     dimension, so a file with several countries, sexes or units gives the series of the Excel
+                     exports unless told otherwise. Default is EUROSTAT_DEFAULT_CODES; pass {} to keep every code.
+
+    Returns:
+    pandas.DataFrame: A DataFrame indexed by integer 'Year' for annual data (string 'Period' otherwise), with one
+                      float column per selected series, in sorted order.
+
+    DocTest:
+    >>> bulk = (b'freq,age,unit,sex,geo\\\\TIME_PERIOD\\t2021 \\t2022 \\n'
+    ...         b'A,Y15-24,PC_ACT,T,EU27_2020\\t16.6 b\\t14.5 \\n'
+    ...         b'A,Y15-24,PC_ACT,T,FR\\t18.9 \\t17.3 \\n'
+    ...         b'A,Y25-54,PC_ACT,T,EU27_2020\\t6.4 \\t: \\n')
+    >>> read_eurostat_bulk(io.BytesIO(gzip.compress(bulk)), filters={'geo': 'EU27_2020'})
+          Y15-24  Y25-54
+    Year                
+    2021    16.6     6.4
+    2022    14.5     NaN
+    >>> read_eurostat_bulk(io.BytesIO(gzip.compress(bulk)), filters={'age': 'Y15-24'}, column_dimension='geo')
+          EU27_2020    FR
+    Year                 
+    2021       16.6  18.9
+    2022       14.5  17.3
+    """
+    wanted = {dimension: {codes} if isinstance(codes, str) else set(codes) for dimension, codes in (filters or {}).items()}
+    labels = [column_dimension] if isinstance(column_dimension, str) else list(column_dimension)
+    series = {}
+    with open_eurostat_bulk(source) as f:
+        first = f.readline().rstrip('\r\n')
+        if '\t' in first:
+            keys, *period_labels = first.split('\t')
+            dimension_names = keys.split('\\')[0].split(',')
+            period_labels = [period.strip() for period in period_labels]
+            rows = (line.rstrip('\r\n').split('\t') for line in f)
+            rows = ((row[0].split(','), None, row[1:]) for row in rows)
+        else:
+            dimension_names = next(csv.reader([first]))
+            period, value = dimension_names.index('TIME_PERIOD'), dimension_names.index('OBS_VALUE')
+            rows = ((row, row[period], row[value]) for row in csv.reader(f))
+        missing = [dimension for dimension in list(wanted) + labels if dimension not in dimension_names]
+        if missing:
+            raise ValueError(f'Unknown Eurostat dimensions {missing}; the file has {dimension_names}')
+        for dimension, code in defaults.items():
+            if dimension in dimension_names and dimension not in wanted and dimension not in labels:
+                wanted[dimension] = {code}
+        positions = [(dimension_names.index(dimension), codes) for dimension, codes in wanted.items()]
+        label_positions = [dimension_names.index(dimension) for dimension in labels]
+        for codes, observation_period, values in rows:
+            if len(codes) < len(dimension_names) or any(codes[i] not in allowed for i, allowed in positions):
+                continue
+            label = ','.join(codes[i] for i in label_positions)
+            if observation_period is None:
+                if label in series:
+                    raise ValueError(f'Filters leave several series labelled {label}; filter on more dimensions')
+                series[label] = dict(zip(period_labels, map(parse_eurostat_value, values)))
+            else:
+                observations = series.setdefault(label, {})
+                if observation_period in observations:
+                    raise ValueError(f'Filters leave several series labelled {label}; filter on more dimensions')
+                observations[observation_period] = parse_eurostat_value(values)
+    df = pd.DataFrame(series, dtype='float64')
+    df = df[sorted(df.columns)]
+    if len(df.index) and all(str(period).isdigit() for period in df.index):
+        df.index = df.index.astype('int64').rename('Year')
+    else:
+        df.index = df.index.astype(str).rename('Period')
+    return df.sort_index()
+
+
+def eurostat_age_label(code: str) -> str:
+    """
+    The column label the Eurostat Excel exports under Data/Eurostat/Age are saved with for a bulk-file age code
+    ('Y15-24' is '15-24years'); codes without an Excel counterpart, such as 'Y_GE15', are kept as they are.
+
+    Parameters:
+    code (str): The age code.
+
+    Returns:
+    str: The label.
+
+    DocTest:
+    >>> eurostat_age_label('Y15-24'), eurostat_age_label('Y_GE15')
+    ('15-24years', 'Y_GE15')
+    """
+    bounds = code[1:].split('-')
+    if code.startswith('Y') and len(bounds) == 2 and all(bound.isdigit() for bound in bounds):
+        return f'{bounds[0]}-{bounds[1]}years'
+    return code
+
+
+def merge_eurostat_data(dir_path: str, max_workers: int = None, filters: dict = None) -> pd.DataFrame:
     """
     Reads multiple Excel files from a specified directory, each containing Eurostat data.
     Each file is processed to remove unnecessary rows and columns and restructured into a long format.
-    The data from all files is then merged into a single DataFrame.
+    The files are parsed in parallel and aligned on 'Year' in a single concatenation, with one column per file
+    in file name order. Given a Eurostat bulk file instead of a directory, it streams that file with
+    read_eurostat_bulk and returns one column per age band, labelled as the Excel files of that band are
+    (see eurostat_age_label), so both sources give the same frame.
 
     Parameters:
-    dir_path (str): The directory path where the Excel files are located.
+    dir_path (str): The directory path where the Excel files are located, or the path of a bulk TSV/SDMX-CSV
+                    download such as 'une_rt_a.tsv.gz'.
+    max_workers (int): The number of worker processes used to parse the files. Default is one per CPU.
+    filters (dict): For a bulk file, the dimension codes to keep, e.g. {'geo': 'FR'}; dimensions left out keep
+                    the codes of the Excel exports (see read_eurostat_bulk and EUROSTAT_DEFAULT_CODES).
 
     Returns:
     pandas.DataFrame: A DataFrame indexed by 'Year', with additional columns
                       representing the unemployment rate from each file, labeled by the file name prefix.
                       The DataFrame includes unemployment rate from all the Excel files in the specified directory.
+
+    DocTest:
+    >>> import tempfile
+    >>> bulk = os.path.join(tempfile.mkdtemp(), 'une_rt_a.tsv')
+    >>> with open(bulk, 'w') as f:
+    ...     _ = f.write('freq,age,unit,sex,geo\\\\TIME_PERIOD\\t2022 \\nA,Y15-24,PC_ACT,T,EU27_2020\\t14.5 \\n'
+    ...                 'A,Y15-24,PC_ACT,F,EU27_2020\\t14.1 \\nA,Y15-24,PC_ACT,T,FR\\t17.3 \\n'
+    ...                 'A,Y25-54,PC_ACT,T,EU27_2020\\t5.4 \\nA,Y55-64,PC_ACT,T,EU27_2020\\t4.8 \\n')
+    >>> merge_eurostat_data(bulk)
+          15-24years  25-54years  55-64years
+    Year                                    
+    2022        14.5         5.4         4.8
+    >>> merge_eurostat_data(bulk, filters={'geo': 'FR'}).columns.tolist()
+    ['15-24years']
     """
-    combined_df = None
-    for file_name in os.listdir(dir_path):
-        if file_name.endswith('.xlsx'):
-            new_df = read_eurostat_data(dir_path, file_name)
-        if combined_df is None:
-            combined_df = new_df
-        else:
-            combined_df = pd.merge(combined_df, new_df, left_index=True, right_index=True, how='left')
-    return combined_df
+    if os.path.isfile(dir_path):
+        df = read_eurostat_bulk(dir_path, filters)
+        return df.rename(columns=eurostat_age_label)
+    frames = read_files_parallel(read_eurostat_data, dir_path, list_excel_files(dir_path), max_workers=max_workers)
+    return pd.concat(frames, axis=1, join='outer', sort=True)
 
 
 def process_onsgovuk_data(df_uk: pd.DataFrame) -> pd.DataFrame:
@@ -185,21 +503,86 @@ def process_onsgovuk_data(df_uk: pd.DataFrame) -> pd.DataFrame:
     0         2020-01-01    5.0    6.0
     1         2020-02-01    4.0    7.0
     """
-    df_uk['time'] = pd.to_datetime(df_uk['time'].str.split('-').str[0], format='%b%Y')  # Extract the month and year
+    # Whole columns are replaced on a shallow copy, so the caller's frame is left as it was
+    df_uk = df_uk.copy(deep=False)
+    df_uk['time'] = periods.parse_dates(df_uk['time'], 'M')  # The first month of 'Jan2020-Mar2020' ranges
     # Ensure the 'value' column is numeric
     df_uk['value'] = pd.to_numeric(df_uk['value'], errors='coerce')
+    # Code the ethnicity groups once per distinct label; groups outside the five reported ones become NaN
+    ethnicity = UK_ETHNICITY.encode(df_uk['ethnicity'])
     # Group the data by 'time' and 'ethnicity', and calculate the average unemployment rate of different geographic
     # regions
-    average_unemployment_by_race = df_uk.groupby(['time', 'ethnicity'])['value'].mean().reset_index()
+    average_unemployment_by_race = df_uk.groupby(['time', ethnicity], observed=True)['value'].mean().reset_index()
     # Pivot the table again to get the desired format with 'time' as the index
     average_unemployment_by_race = average_unemployment_by_race.pivot_table(index='time', columns='ethnicity',
-                                                                            values='value')
+                                                                            values='value', observed=True)
     average_unemployment_by_race = average_unemployment_by_race.filter(
         items=['Asian', 'Black', 'White', 'Mixed', 'Other'])
     average_unemployment_by_race = average_unemployment_by_race.dropna(how='all')
     return average_unemployment_by_race
 
 
+OECD_COLUMNS = ['Country', 'YEAR', 'ISCED 2011 A education level', 'Value']
+
+
+def read_oecd_csv(file_path, countries: list = None, years: tuple = None, columns: list = None, filters: dict = None,
+                  chunksize: int = 100_000) -> pd.DataFrame:
+    """
+    Reads an OECD.Stat CSV export such as EducationalAttainment.csv, pushing the selection into the read: only the
+    needed columns are parsed, with typed dtypes, and the file is scanned in chunks that are filtered on country,
+    year and any other column before being kept. Peak memory follows the selection rather than the file size.
+
+    Parameters:
+    file_path (str or file-like): The OECD CSV export.
+    countries (list): The 'Country' names to keep; None keeps all.
+    years (tuple): The inclusive (first, last) 'YEAR' range to keep; None keeps all.
+    columns (list): The columns to return. Default is OECD_COLUMNS, the ones the process_oecd_* functions use.
+    filters (dict): Maps further columns to the value or list of values to keep, e.g. {'Sex': 'Total'}.
+    chunksize (int): The number of lines parsed per chunk.
+
+    Returns:
+    pd.DataFrame: The selected rows with 'YEAR' as int64, 'Value' as float64, and 'Country' and
+                  'ISCED 2011 A education level' coded as COUNTRY and ISCED_LEVEL categoricals. A selected row
+                  whose country or ISCED level those vocabularies do not list raises a ValueError.
+
+    DocTest:
+    >>> csv_text = io.StringIO('COUNTRY,Country,ISCED 2011 A education level,Sex,YEAR,Value,Flags\\n'
+    ...                        'FRA,France,Doctoral or equivalent education,Total,2020,5,\\n'
+    ...                        'USA,United States,Doctoral or equivalent education,Total,2020,2,\\n'
+    ...                        'FRA,France,Doctoral or equivalent education,Women,2020,4,\\n'
+    ...                        'FRA,France,Doctoral or equivalent education,Total,2010,7,\\n')
+    >>> read_oecd_csv(csv_text, countries=['France'], years=(2015, 2022), filters={'Sex': 'Total'}, chunksize=2)
+      Country  YEAR      ISCED 2011 A education level  Value
+    0  France  2020  Doctoral or equivalent education    5.0
+    >>> read_oecd_csv(io.StringIO('Country,ISCED 2011 A education level,YEAR,Value\\nAtlantis,Tertiary education,2020,5\\n'))
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown country labels ['Atlantis']
+    """
+    columns = list(columns or OECD_COLUMNS)
+    filters = {column: [values] if isinstance(values, str) else list(values) for column, values in (filters or {}).items()}
+    if countries is not None:
+        filters['Country'] = list(countries)
+    usecols = list(dict.fromkeys(columns + list(filters) + (['YEAR'] if years else [])))
+    dtypes = {column: dtype for column, dtype in {'YEAR': 'int64', 'Value': 'float64'}.items() if column in usecols}
+    dtypes.update({column: str for column in usecols if column not in dtypes})
+    selected = []
+    for chunk in pd.read_csv(file_path, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+        mask = pd.Series(True, index=chunk.index)
+        for column, values in filters.items():
+            mask &= chunk[column].isin(values)
+        if years:
+            mask &= chunk['YEAR'].between(*years)
+        selected.append(chunk.loc[mask, columns])
+    df = pd.concat(selected, ignore_index=True) if selected else pd.DataFrame(columns=columns).astype(
+        {column: dtype for column, dtype in dtypes.items() if column in columns})
+    # Code the labels once the selection is small; chunks coded separately could not be concatenated as categoricals
+    for column, dimension in (('Country', COUNTRY), ('ISCED 2011 A education level', ISCED_LEVEL)):
+        if column in df:
+            df[column] = dimension.encode(df[column], strict=True)
+    return df
+
+
 def process_oecd_education_data(df_oecd_education: pd.DataFrame) -> pd.DataFrame:
     """
     Adjusts the education level descriptions to a more generic classification and computes the average
@@ -207,8 +590,9 @@ def process_oecd_education_data(df_oecd_education: pd.DataFrame) -> pd.DataFrame
     The DataFrame is then pivoted for easy visualization and analysis.
 
     Parameters:
-    df_oecd_education (pd.DataFrame): A DataFrame containing columns 'Country', 'Education Level', and 'Value'
-                                      where 'Value' typically represents an unemployment rate.
+    df_oecd_education (pd.DataFrame or str): A DataFrame containing columns 'Country', 'Education Level', and 'Value'
+                                      where 'Value' typically represents an unemployment rate, or the path of the
+                                      OECD CSV export, which is then read with only the European rows materialised.
 
     Returns:
     pd.DataFrame: A DataFrame suitable for plotting that includes the country, remapped education levels, and
@@ -241,23 +625,31 @@ def process_oecd_education_data(df_oecd_education: pd.DataFrame) -> pd.DataFrame
     14    Italy                    Master's degree                8.0
     15    Spain                    Master's degree                NaN
     """
-    df_oecd_education.rename(columns={'ISCED 2011 A education level': 'Education Level'}, inplace=True)
-    # # Group the data by 'Country' and 'Education Level', to calculate the average unemployment rate over years
-    # df_oecd_education = df_oecd_education.groupby(['Country', 'Education Level'])['Value'].mean().reset_index()
     # List of European countries according to the United Nations geoscheme for Europe.
     global european_countries
-    # Filter out non-European countries
-    df_oecd_education_europe = df_oecd_education[df_oecd_education['Country'].isin(european_countries)]
+    if isinstance(df_oecd_education, (str, os.PathLike)):
+        # Only the European rows of the export are ever parsed
+        df_oecd_education = read_oecd_csv(df_oecd_education, countries=european_countries)
+    df_oecd_education = df_oecd_education.rename(columns={'ISCED 2011 A education level': 'Education Level'},
+                                                 copy=False)
+    # # Group the data by 'Country' and 'Education Level', to calculate the average unemployment rate over years
+    # df_oecd_education = df_oecd_education.groupby(['Country', 'Education Level'])['Value'].mean().reset_index()
+    # Code the countries once per distinct name; non-European countries have no code and are filtered out
+    europe = EUROPEAN_COUNTRY.encode(df_oecd_education['Country'])
+    df_oecd_education_europe = df_oecd_education[europe.notna()].assign(Country=europe)
     # Reset index after filtering
     df_oecd_education_europe = df_oecd_education_europe.reset_index(drop=True)
     # Reference the global variable dictionary to map ISCED defined education levels to the generic education levels
     global isced_education_mapping
-    # Apply the mapping to create a new 'General Education Level' column
-    df_oecd_education_europe['General Education Level'] = df_oecd_education_europe['Education Level'].map(
-        isced_education_mapping)
-    # Group by the 'Country' and the new 'Generic Education Level' and calculate the mean of 'Value'
+    # Apply the mapping to the level codes to create a new 'General Education Level' column
+    df_oecd_education_europe['General Education Level'] = ISCED_LEVEL.recode(
+        df_oecd_education_europe['Education Level'], isced_education_mapping, EDUCATION_LEVEL)
+    # Group by the 'Country' and the new 'Generic Education Level' codes and calculate the mean of 'Value'
     df_oecd_education_grouped = \
-        df_oecd_education_europe.groupby(['Country', 'General Education Level'], as_index=False)['Value'].mean()
+        df_oecd_education_europe.groupby(['Country', 'General Education Level'], as_index=False,
+                                         observed=True)['Value'].mean()
+    # The grouped frame is small; back to labels so the pivot orders countries and levels by name
+    df_oecd_education_grouped = df_oecd_education_grouped.astype({'Country': str, 'General Education Level': str})
     # Pivot the dataframe to reshape it for plotting
     pivot_df = df_oecd_education_grouped.pivot(index='Country', columns='General Education Level', values='Value')
     # Reset index to make 'Country' a column again
@@ -283,7 +675,8 @@ def process_oecd_specific_countries(df_oecd: pd.DataFrame, countries: list):
     a specified order for better viewing.
 
     Parameters:
-    df_oecd (pd.DataFrame): A DataFrame containing OECD data with columns 'Country', 'YEAR', 'ISCED 2011 A education level', and 'Value'.
+    df_oecd (pd.DataFrame or str): A DataFrame containing OECD data with columns 'Country', 'YEAR', 'ISCED 2011 A education level', and 'Value',
+                                   or the path of the OECD CSV export, which is then read with only the rows of countries materialised.
     countries (list): A list of countries to filter the DataFrame.
 
     Returns:
@@ -306,20 +699,28 @@ def process_oecd_specific_countries(df_oecd: pd.DataFrame, countries: list):
     >>> processed_data.fillna(0).equals(expected_df.fillna(0))
     True
     """
-    df_oecd.rename(columns={'ISCED 2011 A education level': 'Education Level', 'Value': 'Unemployment Rate'},
-                   inplace=True)
-    df_oecd_countries = df_oecd[df_oecd['Country'].isin(countries)][
-        ['Country', 'YEAR', 'Education Level', 'Unemployment Rate']]
+    if isinstance(df_oecd, (str, os.PathLike)):
+        df_oecd = read_oecd_csv(df_oecd, countries=countries)
+    df_oecd = df_oecd.rename(columns={'ISCED 2011 A education level': 'Education Level', 'Value': 'Unemployment Rate'},
+                             copy=False)
+    # Filter on country codes rather than comparing every name
+    country = COUNTRY.encode(df_oecd['Country'])
+    wanted = COUNTRY.encode(pd.Series(countries, dtype=object)).cat.codes.unique()
+    selected = country.cat.codes.isin(wanted[wanted >= 0])
+    df_oecd_countries = df_oecd[selected][['Country', 'YEAR', 'Education Level', 'Unemployment Rate']].assign(
+        Country=country)
 
     # Reference the global variable dictionary to map ISCED defined education levels to the generic education levels
     global isced_education_mapping
 
-    # Normalize the 'Education Level' values in the DataFrame and then map
-    df_oecd_countries['General Education Level'] = df_oecd_countries['Education Level'].str.strip().map(
-        isced_education_mapping)
+    # Normalize the 'Education Level' values in the DataFrame and then map their codes
+    df_oecd_countries['General Education Level'] = ISCED_LEVEL.recode(
+        df_oecd_countries['Education Level'], isced_education_mapping, EDUCATION_LEVEL)
 
-    df_oecd_countries = df_oecd_countries.groupby(['Country', 'YEAR', 'General Education Level'])[
+    df_oecd_countries = df_oecd_countries.groupby(['Country', 'YEAR', 'General Education Level'], observed=True)[
         'Unemployment Rate'].mean().reset_index()
+    # The grouped frame is small; country labels again so the result is indexed by name
+    df_oecd_countries['Country'] = df_oecd_countries['Country'].astype(str)
     global education_level_order
     # Convert the 'Education Level' column to a categorical type with the specified order for better viewing
     df_oecd_countries['Education Level'] = pd.Categorical(
@@ -350,7 +751,7 @@ def process_StatsGovCN_data(china_educated_year: pd.DataFrame, unemployment_file
         ['year', 'province', '人均受教育年限']].rename(columns={'人均受教育年限': 'Average Educated Years'})
     china_national_educated_year = china_educated_year[china_educated_year['province'] == '全国'][
         ['year', 'Average Educated Years']]
-    china_unemployment_rate = pd.read_excel(unemployment_file_path)[
+    china_unemployment_rate = excel_cache.read_excel(unemployment_file_path)[
         ['year', 'province', '城镇登记失业率(%)']].rename(columns={'城镇登记失业率(%)': 'Unemployment Rate'})
     china_national_unemployment_rate = china_unemployment_rate.groupby('year')['Unemployment Rate'].mean().reset_index()
     china_merged_df = china_national_educated_year.merge(china_national_unemployment_rate, how='inner',
@@ -0,0 +1,243 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from periods import parse_years
+
+
+def to_float(values) -> np.ndarray:
+    """
+    Converts a block of cells to a float64 matrix, with the placeholders exports use for missing observations
+    ('..', ':', '-', ...) and any other non-numeric cell as NaN. Numeric blocks are converted without looking at the cells.
+
+    Parameters:
+    values (pd.DataFrame or np.ndarray): The cells.
+
+    Returns:
+    np.ndarray: The float64 matrix, shaped like values.
+
+    DocTest:
+    >>> to_float(pd.DataFrame({'a': ['1.5', '..', 2], 'b': [None, ' 3 ', 'x']})).tolist()
+    [[1.5, nan], [nan, 3.0], [2.0, nan]]
+    """
+    if isinstance(values, pd.DataFrame):
+        if all(pd.api.types.is_numeric_dtype(dtype) for dtype in values.dtypes):
+            return values.to_numpy(dtype=np.float64)
+        values = values.to_numpy(dtype=object)
+    values = np.asarray(values)
+    if values.dtype != object:
+        return values.astype(np.float64)
+    # to_numeric ignores surrounding whitespace and turns the placeholders, like any other text, into NaN
+    return pd.to_numeric(pd.Series(values.ravel()), errors='coerce').to_numpy(dtype=np.float64).reshape(values.shape)
+
+
+def find_header(df: pd.DataFrame, max_rows: int = 30) -> int:
+    """
+    Finds the row holding the year header of an export read without one, e.g. a World Bank sheet whose first row
+    is blank or an OECD sheet with metadata lines above the table.
+
+    Parameters:
+    df (pd.DataFrame): The sheet as read.
+    max_rows (int): How many rows to search.
+
+    Returns:
+    int: The position of the row with the most year cells, or -1 if the column labels already hold more years.
+    """
+    best, best_count = -1, int((parse_years(df.columns) > 0).sum())
+    for position in range(min(max_rows, len(df))):
+        count = int((parse_years(df.iloc[position]) > 0).sum())
+        if count > best_count:
+            best, best_count = position, count
+    return best
+
+
+class YearMatrix:
+    """
+    A wide year-as-column export (World Bank, OECD) held as an entity x year float64 matrix, with the identifying
+    columns (country, indicator, ...) as categoricals alongside. The source is parsed once; any country or indicator
+    is then a row selection instead of another transpose of the source.
+    """
+
+    def __init__(self, entities: pd.DataFrame, years: np.ndarray, values: np.ndarray):
+        self.entities = entities.reset_index(drop=True)
+        self.years = np.asarray(years, dtype=np.int64)
+        self.values = values
+
+    def __repr__(self):
+        return (f"YearMatrix({len(self.entities)} entities x {len(self.years)} years, "
+                f"ids={list(self.entities.columns)})")
+
+    @classmethod
+    def from_wide(cls, df: pd.DataFrame, id_columns=None, dropna: bool = True) -> 'YearMatrix':
+        """
+        Parses a wide export. The year header may be the column labels or any of the first rows (read without
+        a header); columns whose label is not a year are identifiers, except those that are entirely empty.
+
+        Parameters:
+        df (pd.DataFrame): The export as read by pd.read_excel or pd.read_csv.
+        id_columns (list): The identifier columns to keep; None keeps every non-empty non-year column.
+        dropna (bool): Whether entities without any observation (e.g. footnote lines) are dropped.
+
+        Returns:
+        YearMatrix: The parsed table.
+
+        DocTest:
+        >>> sheet = pd.DataFrame({0: ['Country Name', 'Germany', 'France'], 1: ['Indicator Name', 'GDP', 'GDP'],
+        ...                       2: ['1960', '..', 2.5], 3: [1961.0, 4.0, 3.5]})
+        >>> matrix = YearMatrix.from_wide(sheet)
+        >>> matrix
+        YearMatrix(2 entities x 2 years, ids=['Country Name', 'Indicator Name'])
+        >>> matrix.series(**{'Country Name': 'Germany'})
+        Year
+        1960    NaN
+        1961    4.0
+        dtype: float64
+        """
+        header = find_header(df)
+        if header >= 0:
+            df = df.iloc[header + 1:].set_axis(df.iloc[header].tolist(), axis=1)
+        years = parse_years(df.columns)
+        is_year = years > 0
+        values = to_float(df.loc[:, is_year])
+        if id_columns is None:
+            labels = df.loc[:, ~is_year]
+            id_columns = [column for column, empty in zip(labels.columns, labels.isna().all()) if not empty]
+        entities = pd.DataFrame({str(column): df[column].astype(str).str.strip().astype('category')
+                                 for column in id_columns})
+        if dropna:
+            observed = ~np.isnan(values).all(axis=1)
+            entities, values = entities[observed], values[observed]
+        return cls(entities, years[is_year], values)
+
+    def select(self, **criteria) -> 'YearMatrix':
+        """
+        The entities whose identifier columns equal the given values (or are in the given lists).
+
+        Parameters:
+        **criteria: Identifier column name to value or list of values.
+
+        Returns:
+        YearMatrix: The selected rows, sharing the year axis.
+        """
+        mask = np.ones(len(self.entities), dtype=bool)
+        for column, value in criteria.items():
+            wanted = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= self.entities[column].isin(wanted).to_numpy()
+        return YearMatrix(self.entities[mask], self.years, self.values[mask])
+
+    def series(self, **criteria) -> pd.Series:
+        """
+        The observations of the single entity matching criteria, indexed by year.
+
+        Parameters:
+        **criteria: As for select; may be empty when the matrix holds one entity.
+
+        Returns:
+        pd.Series: float64 values indexed by an int64 'Year' index.
+        """
+        selected = self.select(**criteria)
+        if len(selected.entities) != 1:
+            raise ValueError(f'{criteria} matches {len(selected.entities)} entities, expected one')
+        return pd.Series(selected.values[0], index=pd.Index(self.years, name='Year'))
+
+    def frame(self, column: str, **criteria) -> pd.DataFrame:
+        """
+        A year x entity table of the selected rows, with one column per value of an identifier column,
+        e.g. one column per indicator of a country.
+
+        Parameters:
+        column (str): The identifier column whose values become the column labels.
+        **criteria: As for select.
+
+        Returns:
+        pd.DataFrame: float64 values indexed by an int64 'Year' index.
+        """
+        selected = self.select(**criteria)
+        return pd.DataFrame(selected.values.T, index=pd.Index(self.years, name='Year'),
+                            columns=selected.entities[column].astype(str).tolist())
+
+    def long(self, dropna: bool = True) -> pd.DataFrame:
+        """
+        The typed long table: the categorical identifier columns, an int64 'Year' and a float64 'value'.
+
+        Parameters:
+        dropna (bool): Whether missing observations are left out.
+
+        Returns:
+        pd.DataFrame: One row per entity and year.
+        """
+        rows = np.repeat(np.arange(len(self.entities)), len(self.years))
+        long = self.entities.iloc[rows].reset_index(drop=True)
+        long['Year'] = np.tile(self.years, len(self.entities))
+        long['value'] = self.values.ravel()
+        return long[long['value'].notna()].reset_index(drop=True) if dropna else long
+
+
+def read_wide(path: str, id_columns=None, **kwargs) -> YearMatrix:
+    """
+    Reads a whole wide export, .xlsx or .csv (World Bank CSVs carry metadata lines above the header), into a
+    YearMatrix in one pass.
+
+    Parameters:
+    path (str): The export file.
+    id_columns (list): As for YearMatrix.from_wide.
+    **kwargs: Passed to pd.read_excel (e.g. sheet_name) or csv.reader (e.g. delimiter).
+
+    Returns:
+    YearMatrix: The parsed table.
+    """
+    if path.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(path, header=None, **kwargs)
+    else:
+        # The metadata lines above the header are shorter than the table rows, which pd.read_csv cannot take
+        with open(path, newline='', encoding=kwargs.pop('encoding', 'utf-8-sig')) as f:
+            rows = list(csv.reader(f, **kwargs))
+        width = max(len(row) for row in rows)
+        df = pd.DataFrame([row + [''] * (width - len(row)) for row in rows], dtype=object).replace('', np.nan)
+    return YearMatrix.from_wide(df, id_columns)
+
+
+# Unit tests parse World Bank and OECD layouts and check them against the transposes they replace
+
+MIN_WAGE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data', 'european data', 'min wage hourly.xlsx')
+
+
+class TestYearMatrix(unittest.TestCase):
+    def test_world_bank_csv_with_metadata_lines(self):
+        content = ('"Data Source","World Development Indicators",\n\n"Last Updated Date","2024-03-28",\n\n'
+                   '"Country Name","Country Code","Indicator Name","Indicator Code","1960","1961","1962",\n'
+                   '"Germany","DEU","GDP (current US$)","NY.GDP.MKTP.CD","..","1.5","2.5",\n'
+                   '"Germany","DEU","Unemployment, total","SL.UEM.TOTL.ZS","","4.1","4.2",\n'
+                   '"France","FRA","GDP (current US$)","NY.GDP.MKTP.CD","1.0","1.1","",\n')
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            matrix = read_wide(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(matrix.years.tolist(), [1960, 1961, 1962])
+        self.assertEqual(list(matrix.entities.columns), ['Country Name', 'Country Code', 'Indicator Name',
+                                                         'Indicator Code'])
+        germany = matrix.frame('Indicator Code', **{'Country Code': 'DEU'})
+        self.assertEqual(list(germany.columns), ['NY.GDP.MKTP.CD', 'SL.UEM.TOTL.ZS'])
+        self.assertEqual(germany.loc[1962].tolist(), [2.5, 4.2])
+        long = matrix.long()
+        self.assertEqual(len(long), 6)
+        self.assertEqual((str(long['Year'].dtype), str(long['value'].dtype)), ('int64', 'float64'))
+        self.assertEqual(str(long['Country Code'].dtype), 'category')
+
+    def test_oecd_sheet_matches_per_country_transpose(self):
+        sheet = pd.read_excel(MIN_WAGE_FILE, header=None)
+        matrix = YearMatrix.from_wide(sheet)
+        self.assertEqual(list(matrix.entities.columns), ['Country'])
+        self.assertNotIn('Data extracted', ' '.join(matrix.entities['Country'].astype(str)))
+        old = pd.read_excel(MIN_WAGE_FILE, skiprows=5)
+        old = old.drop(old.columns[[1]], axis=1).set_index('Country').dropna(how='all')
+        for country in ('United States', 'Belgium', 'Romania'):
+            expected = pd.to_numeric(old.loc[country].replace('..', np.nan))
+            np.testing.assert_array_equal(matrix.series(Country=country).to_numpy(), expected.to_numpy())